@@ -1,9 +1,34 @@
+import asyncio
+import collections
 import httpx
 import json
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from config import settings
-from database import db
-from validation import validator
+from http_client import get_http_client
+from singleflight import SingleFlight
+from stream_json import IncrementalJSONParser
+from database import get_db
+from async_db import get_adb
+from glossary import get_glossary
+from language import DIRECTIONS, JA, ZH, detect_language
+from segmentation import split_segments
+from upstream_guard import UpstreamUnavailable, upstream_guard
+from metrics import (CACHE_LOOKUPS, PARSE_FAILURES, STAGE_SECONDS, UPSTREAM_REQUESTS, UPSTREAM_SECONDS,
+                     UPSTREAM_TOKENS, registry)
+from validation import get_validator
+
+# 相同文本的并发翻译请求合并器
+translation_flight = SingleFlight()
+registry.counter_func("translator_coalescing_leaders_total", "请求合并中实际执行的上游翻译调用数",
+                      lambda: translation_flight.leaders)
+registry.counter_func("translator_coalesced_waiters_total", "被合并、直接等待已有调用的请求数",
+                      lambda: translation_flight.coalesced_waiters)
+registry.counter_func("translator_coalescing_failures_total", "合并调用执行失败次数",
+                      lambda: translation_flight.failures)
+registry.counter_func("translator_coalescing_cancelled_waiters_total", "等待合并结果时中途断开的请求数",
+                      lambda: translation_flight.cancelled_waiters)
+registry.gauge("translator_coalescing_in_flight", "正在进行的合并调用数", lambda: len(translation_flight._inflight))
 
 # 极简AI提示词
 TRANSLATION_PROMPT = """请翻译以下文本并返回JSON格式：
@@ -24,66 +49,212 @@ JSON格式：
   }}]
 }}"""
 
-async def translate_text(text: str, client_ip: str = None, user_agent: str = None) -> Dict[str, Any]:
+# 本地已判定翻译方向时使用的精简提示词：语言和方向不再由模型输出
+DIRECTIONAL_PROMPTS = {
+    ZH: """中文译日语，只返回JSON：
+文本：{user_input}
+{{"word_category":"地名|大学|交通|计算机|医学|法律|经济|机构|通用词汇","translations":[{{"original":"原文","target":"日语","reading":{{"hiragana":"日语假名读音"}},"meaning":"简要释义","examples":[{{"sentence":"日语例句","translation":"中文"}}]}}]}}""",
+    JA: """日语译中文，只返回JSON：
+文本：{user_input}
+{{"word_category":"地名|大学|交通|计算机|医学|法律|经济|机构|通用词汇","translations":[{{"original":"原文","target":"中文","reading":{{"hiragana":"原文假名读音"}},"meaning":"简要释义","examples":[{{"sentence":"日语例句","translation":"中文"}}]}}]}}""",
+}
+
+# 批量提示词：多条文本一次调用，按编号返回
+BATCH_TRANSLATION_PROMPT = """请逐条翻译以下编号文本并返回JSON格式：
+
+文本：
+{numbered_items}
+
+JSON格式（results 按编号逐条对应，每条字段与单条翻译相同）：
+{{
+  "results": [{{
+    "id": 1,
+    "detected_language": "中文|日语",
+    "translation_direction": "中→日|日→中",
+    "word_category": "地名|大学|交通|计算机|医学|法律|经济|机构|通用词汇",
+    "translations": [{{
+      "original": "原文",
+      "target": "翻译结果", 
+      "reading": {{"hiragana": "假名读音（日语时提供）"}},
+      "meaning": "简要释义",
+      "examples": [{{"sentence": "例句", "translation": "例句翻译"}}]
+    }}]
+  }}]
+}}"""
+
+async def translate_text(text: str, client_ip: str = None, user_agent: str = None,
+                         segmented: bool = False) -> Dict[str, Any]:
     """
     V2.0 增强翻译API - 集成缓存和验证
+    segmented=True 时按句切分，每句单独查缓存，未命中的句子并发翻译后按原顺序拼回
     """
+    started = time.perf_counter()
     try:
         # 1. 请求验证
         if client_ip:
-            is_valid, error_msg = validator.validate_request(text, client_ip, user_agent)
+            with STAGE_SECONDS.time("validation"):
+                is_valid, error_msg = get_validator().validate_request(text, client_ip, user_agent)
             if not is_valid:
                 return {"error": error_msg}
         
-        # 2. 检查缓存
-        cached_result = db.get_cached_translation(text)
-        if cached_result:
-            print(f"缓存命中: {text} (命中次数: {cached_result.get('cache_hit_count', 1)})")
-            # 更新统计信息（缓存命中）
-            if client_ip:
-                db._update_daily_stats(
-                    db._get_connection(), 
-                    cached_result.get('detected_language', '未知'),
-                    cached_result.get('detected_language', '未知'), 
-                    cached_result.get('word_category', '通用词汇'),
-                    is_cache_hit=True
-                )
-            return {"success": True, "data": cached_result}
-        
-        # 3. 调用AI翻译
-        print(f"AI翻译: {text}")
-        result = await _call_ai_translation(text)
-        
-        if "error" in result:
-            return result
-        
-        # 4. 保存到数据库
-        if "success" in result and "data" in result:
-            translation_data = result["data"]
-            db.save_translation(text, translation_data, client_ip, user_agent)
-            return result
-        else:
-            # 兼容旧格式
-            db.save_translation(text, result, client_ip, user_agent)
-            return {"success": True, "data": result}
+        if segmented:
+            segments = split_segments(text)
+            if len(segments) > 1:
+                return await _translate_segments(text, segments, client_ip, user_agent)
+        
+        return await _resolve_text(text, client_ip, user_agent)
             
     except Exception as e:
         print(f"翻译处理错误: {e}")
         return {"error": f"处理失败: {str(e)}"}
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, "total")
 
-async def _call_ai_translation(text: str) -> Dict[str, Any]:
-    """调用AI翻译服务"""
-    if len(text) > settings.max_text_length:
-        return {"error": f"文本长度超过限制（{settings.max_text_length}字符）"}
+async def _resolve_text(text: str, client_ip: str = None, user_agent: str = None) -> Dict[str, Any]:
+    """词表 → 缓存 → AI翻译，依次查找一条文本（已通过验证）"""
+    # 2. 离线词表：固定词条直接返回
+    glossary_result = get_glossary().lookup(text)
+    if glossary_result:
+        CACHE_LOOKUPS.inc("glossary")
+        if client_ip:
+            get_adb().record_daily_stats_nowait(
+                glossary_result.get('detected_language', '未知'),
+                glossary_result.get('detected_language', '未知'),
+                glossary_result.get('word_category', '通用词汇'),
+                is_cache_hit=True
+            )
+        return {"success": True, "data": glossary_result}
+    
+    # 3. 检查缓存（SQLite操作在线程中执行，不阻塞事件循环）
+    with STAGE_SECONDS.time("cache_lookup"):
+        cached_result = await get_adb().get_cached_translation(text)
+    if cached_result:
+        CACHE_LOOKUPS.inc("hit")
+        print(f"缓存命中: {text} (命中次数: {cached_result.get('cache_hit_count', 1)})")
+        # 更新统计信息（缓存命中）
+        if client_ip:
+            get_adb().record_daily_stats_nowait(
+                cached_result.get('detected_language', '未知'),
+                cached_result.get('detected_language', '未知'), 
+                cached_result.get('word_category', '通用词汇'),
+                is_cache_hit=True
+            )
+        return {"success": True, "data": cached_result}
     
-    # 直接使用极简提示词
-    prompt = TRANSLATION_PROMPT.format(user_input=text)
+    # 4. 调用AI翻译（相同文本的并发请求合并为一次上游调用）
+    CACHE_LOOKUPS.inc("miss")
+    text_hash = get_db()._generate_text_hash(text)
+    return await translation_flight.do(
+        text_hash, lambda: _translate_and_save(text, client_ip, user_agent)
+    )
+
+async def _translate_segments(text: str, segments: List[str], client_ip: str = None,
+                              user_agent: str = None) -> Dict[str, Any]:
+    """
+    分句翻译：每句按自己的哈希查词表和缓存，未命中的句子并发翻译并各自保存
+    任一句失败则整段返回错误（已成功的句子已写入缓存，重试时直接命中）
+    """
+    unique = list(dict.fromkeys(segments))
+    semaphore = asyncio.Semaphore(settings.segment_max_concurrency)
     
+    async def resolve(segment: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await _resolve_text(segment, client_ip, user_agent)
+    
+    resolved = dict(zip(unique, await asyncio.gather(*(resolve(segment) for segment in unique))))
+    for segment in unique:
+        if "error" in resolved[segment]:
+            return {"error": f"分句翻译失败（{segment}）: {resolved[segment]['error']}"}
+    
+    parts = [resolved[segment]["data"] for segment in segments]
+    glossary_hits = sum(1 for data in parts if data.get("from_glossary"))
+    cache_hits = sum(1 for data in parts if data.get("from_cache"))
+    return {
+        "success": True,
+        "data": _merge_segments(text, segments, parts),
+        "summary": {
+            "segments": len(segments),
+            "glossary_hits": glossary_hits,
+            "cache_hits": cache_hits,
+            "translated": len(segments) - glossary_hits - cache_hits
+        }
+    }
+
+def _merge_segments(text: str, segments: List[str], parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """把各句结果按原顺序拼成与单条翻译相同的结构，逐句结果放在 segments 中"""
+    firsts = [(data.get("translations") or [{}])[0] for data in parts]
+    language = collections.Counter(data.get("detected_language", "未知") for data in parts).most_common(1)[0][0]
+    direction = next((data.get("translation_direction", "未知") for data in parts
+                      if data.get("detected_language", "未知") == language), "未知")
+    category = collections.Counter(data.get("word_category", "通用词汇") for data in parts).most_common(1)[0][0]
+    return {
+        "detected_language": language,
+        "translation_direction": direction,
+        "word_category": category,
+        "translations": [{
+            "original": text,
+            "target": "".join(first.get("target", "") for first in firsts),
+            "reading": {"hiragana": "".join((first.get("reading") or {}).get("hiragana", "") for first in firsts)},
+            "meaning": "；".join(first["meaning"] for first in firsts if first.get("meaning")),
+            "examples": []
+        }],
+        "segments": [{"original": segment, **data} for segment, data in zip(segments, parts)],
+        "from_cache": all(data.get("from_cache") or data.get("from_glossary") for data in parts)
+    }
+
+async def _translate_and_save(text: str, client_ip: str = None, user_agent: str = None) -> Dict[str, Any]:
+    """调用AI翻译并保存结果（同一文本同一时刻只执行一次）"""
+    print(f"AI翻译: {text}")
+    result = await _call_ai_translation(text)
+    
+    if "error" in result:
+        return result
+    
+    # 5. 保存到数据库
+    if "success" in result and "data" in result:
+        translation_data = result["data"]
+        with STAGE_SECONDS.time("save"):
+            await get_adb().save_translation(text, translation_data, client_ip, user_agent)
+        return result
+    else:
+        # 兼容旧格式
+        with STAGE_SECONDS.time("save"):
+            await get_adb().save_translation(text, result, client_ip, user_agent)
+        return {"success": True, "data": result}
+
+def _build_prompt(text: str) -> Tuple[str, Optional[str]]:
+    """本地判定翻译方向并选择提示词，返回 (提示词, 语言)；无法判定时使用通用提示词"""
+    language = detect_language(text)
+    if language is None:
+        return TRANSLATION_PROMPT.format(user_input=text), None
+    return DIRECTIONAL_PROMPTS[language].format(user_input=text), language
+
+def _max_tokens_for(text: str) -> int:
+    """按输入长度估算输出上限，短词条不必预留1000个token"""
+    return min(settings.completion_max_tokens,
+               settings.completion_base_tokens + settings.completion_tokens_per_char * len(text))
+
+def _with_direction(data: Any, language: Optional[str]) -> Any:
+    """补上本地判定的语言和方向（放在最前面，与通用提示词的输出顺序一致）"""
+    if language is None or not isinstance(data, dict):
+        return data
+    return {**DIRECTIONS[language], **{key: value for key, value in data.items() if key not in DIRECTIONS[language]}}
+
+def _record_usage(usage: Optional[Dict[str, Any]], prompt_kind: str):
+    """记录上游返回的token用量"""
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if isinstance(usage.get(kind), (int, float)):
+            UPSTREAM_TOKENS.observe(usage[kind], kind[:-len("_tokens")], prompt_kind)
+
+async def _request_completion(prompt: str, max_tokens: int = 1000, prompt_kind: str = "generic") -> str:
+    """发送chat/completions请求，返回模型输出文本"""
     payload = {
         "model": "deepseek-chat",
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.3,
-        "max_tokens": 1000
+        "max_tokens": max_tokens
     }
     
     headers = {
@@ -91,74 +262,457 @@ async def _call_ai_translation(text: str) -> Dict[str, Any]:
         "Content-Type": "application/json"
     }
     
-    try:
-        async with httpx.AsyncClient() as client:
+    # 使用应用级共享连接池，复用keep-alive连接
+    client = get_http_client()
+    
+    async def send() -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
             response = await client.post(
                 settings.deepseek_api_url,
                 json=payload,
-                headers=headers,
-                timeout=30.0
+                headers=headers
             )
-            response.raise_for_status()
-            
-            result = response.json()
-            ai_response = result["choices"][0]["message"]["content"]
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+            raise
+        finally:
+            UPSTREAM_REQUESTS.inc("completion", status)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, "completion", prompt_kind)
+        response.raise_for_status()
+        return response
+    
+    # 并发上限、熔断和可重试失败的退避重试
+    response = await upstream_guard.call(send)
+    result = response.json()
+    _record_usage(result.get("usage"), prompt_kind)
+    return result["choices"][0]["message"]["content"]
+
+def _extract_json(ai_response: str) -> Any:
+    """从模型输出中截取JSON对象并解析"""
+    json_start = ai_response.find('{')
+    json_end = ai_response.rfind('}') + 1
+    return json.loads(ai_response[json_start:json_end])
+
+async def _call_ai_translation(text: str) -> Dict[str, Any]:
+    """调用AI翻译服务"""
+    if len(text) > settings.max_text_length:
+        return {"error": f"文本长度超过限制（{settings.max_text_length}字符）"}
+    
+    # 能在本地判定方向时使用更短的单向提示词
+    prompt, language = _build_prompt(text)
+    
+    try:
+        ai_response = await _request_completion(prompt, max_tokens=_max_tokens_for(text),
+                                                 prompt_kind=language or "generic")
+        
+        # 解析JSON响应
+        try:
+            with STAGE_SECONDS.time("parse"):
+                parsed_response = _extract_json(ai_response)
             
-            # 解析JSON响应
-            try:
-                json_start = ai_response.find('{')
-                json_end = ai_response.rfind('}') + 1
-                json_str = ai_response[json_start:json_end]
-                parsed_response = json.loads(json_str)
-                
-                return {"success": True, "data": parsed_response}
-            except json.JSONDecodeError:
-                # 解析失败时返回基本结构
-                return {
-                    "success": True,
-                    "data": {
-                        "detected_language": "未知",
-                        "translation_direction": "未知",
-                        "word_category": "通用词汇",
-                        "translations": [{
-                            "original": text,
-                            "target": ai_response,
-                            "reading": {"hiragana": ""},
-                            "meaning": "AI返回格式异常",
-                            "examples": []
-                        }]
-                    }
+            return {"success": True, "data": _with_direction(parsed_response, language)}
+        except json.JSONDecodeError:
+            PARSE_FAILURES.inc("single")
+            # 解析失败时返回基本结构
+            return {
+                "success": True,
+                "data": {
+                    "detected_language": "未知",
+                    "translation_direction": "未知",
+                    **DIRECTIONS.get(language, {}),
+                    "word_category": "通用词汇",
+                    "translations": [{
+                        "original": text,
+                        "target": ai_response,
+                        "reading": {"hiragana": ""},
+                        "meaning": "AI返回格式异常",
+                        "examples": []
+                    }]
                 }
-                
+            }
+            
+    except UpstreamUnavailable as e:
+        return {"error": f"翻译服务繁忙，请稍后重试: {str(e)}"}
     except httpx.HTTPError as e:
         return {"error": f"API请求失败: {str(e)}"}
     except Exception as e:
         return {"error": f"处理失败: {str(e)}"}
 
+async def translate_text_stream(text: str, client_ip: str = None,
+                                user_agent: str = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    流式翻译：逐个产出 (事件名, 数据)
+    detected_language 等顶层字段和每条 translation 解析完成后立即产出，最后产出 done
+    客户端中途断开时上游读取仍在后台完成，并照常写入缓存
+    """
+    started = time.perf_counter()
+    
+    # 1. 请求验证
+    if client_ip:
+        is_valid, error_msg = get_validator().validate_request(text, client_ip, user_agent)
+        if not is_valid:
+            yield "error", {"error": error_msg}
+            return
+    
+    # 2. 离线词表或缓存命中时一次性产出全部字段
+    cached_result = get_glossary().lookup(text) or await get_adb().get_cached_translation(text)
+    if cached_result:
+        CACHE_LOOKUPS.inc("glossary" if cached_result.get("from_glossary") else "hit")
+        if client_ip:
+            get_adb().record_daily_stats_nowait(
+                cached_result.get('detected_language', '未知'),
+                cached_result.get('detected_language', '未知'),
+                cached_result.get('word_category', '通用词汇'),
+                is_cache_hit=True
+            )
+        for key, value in cached_result.items():
+            if key == "translations":
+                for translation in value:
+                    yield "translation", translation
+            elif key not in ("from_cache", "from_glossary", "cache_hit_count"):
+                yield key, value
+        yield "done", {"success": True, "data": cached_result,
+                       "timing": {"first_field_ms": 0.0, "total_ms": round((time.perf_counter() - started) * 1000, 2)}}
+        return
+    
+    # 3. 后台任务读取上游流，事件经队列转发给客户端
+    CACHE_LOOKUPS.inc("miss")
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.ensure_future(_stream_and_save(text, events, client_ip, user_agent))
+    first_field_ms = None
+    try:
+        while True:
+            name, data = await events.get()
+            if name == "done":
+                data["timing"] = {
+                    "first_field_ms": first_field_ms,
+                    "total_ms": round((time.perf_counter() - started) * 1000, 2)
+                }
+            elif name != "error" and first_field_ms is None:
+                first_field_ms = round((time.perf_counter() - started) * 1000, 2)
+            yield name, data
+            if name in ("done", "error"):
+                break
+    finally:
+        if not task.done():
+            # 客户端断开：不取消上游任务，让它完成并保存结果
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+async def _stream_and_save(text: str, events: asyncio.Queue,
+                           client_ip: str = None, user_agent: str = None):
+    """读取上游流式输出，增量解析后放入队列，结束时保存完整结果"""
+    parser = IncrementalJSONParser()
+    prompt, language = _build_prompt(text)
+    try:
+        # 本地已判定的语言和方向无需等待模型，立即推送（模型若仍输出则不再重复推送）
+        known = DIRECTIONS.get(language, {})
+        for key, value in known.items():
+            events.put_nowait((key, value))
+        
+        async for delta in _stream_completion(prompt, max_tokens=_max_tokens_for(text),
+                                              prompt_kind=language or "generic"):
+            for event in parser.feed(delta):
+                if event[0] not in known:
+                    events.put_nowait(event)
+        
+        try:
+            data = _with_direction(parser.result(), language)
+        except json.JSONDecodeError:
+            PARSE_FAILURES.inc("stream")
+            # 解析失败时返回与非流式接口相同的基本结构
+            data = {
+                "detected_language": "未知",
+                "translation_direction": "未知",
+                **DIRECTIONS.get(language, {}),
+                "word_category": "通用词汇",
+                "translations": [{
+                    "original": text,
+                    "target": parser.text,
+                    "reading": {"hiragana": ""},
+                    "meaning": "AI返回格式异常",
+                    "examples": []
+                }]
+            }
+        
+        # 5. 保存到数据库（与非流式接口相同）
+        await get_adb().save_translation(text, data, client_ip, user_agent)
+        events.put_nowait(("done", {"success": True, "data": data}))
+    except UpstreamUnavailable as e:
+        events.put_nowait(("error", {"error": f"翻译服务繁忙，请稍后重试: {str(e)}"}))
+    except httpx.HTTPError as e:
+        events.put_nowait(("error", {"error": f"API请求失败: {str(e)}"}))
+    except Exception as e:
+        print(f"流式翻译处理错误: {e}")
+        events.put_nowait(("error", {"error": f"处理失败: {str(e)}"}))
+
+async def _stream_completion(prompt: str, max_tokens: int = 1000,
+                             prompt_kind: str = "generic") -> AsyncIterator[str]:
+    """以流式模式调用chat/completions，逐段产出模型输出文本"""
+    payload = {
+        "model": "deepseek-chat",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.3,
+        "max_tokens": max_tokens,
+        "stream": True,
+        # 最后一个数据块附带token用量
+        "stream_options": {"include_usage": True}
+    }
+    
+    headers = {
+        "Authorization": f"Bearer {settings.deepseek_api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    client = get_http_client()
+    # 流式调用在整个读取过程中占用一个上游槽位；已开始输出后无法安全重试，因此不重试
+    async with upstream_guard.guarded():
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with client.stream("POST", settings.deepseek_api_url, json=payload, headers=headers) as response:
+                status = str(response.status_code)
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # SSE格式：data: {...}，以 data: [DONE] 结束
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    _record_usage(chunk.get("usage"), prompt_kind)
+                    choices = chunk.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except httpx.HTTPError as e:
+            if status == "error":
+                status = type(e).__name__
+            raise
+        finally:
+            # 耗时统计到流结束（或客户端放弃读取）为止
+            UPSTREAM_REQUESTS.inc("stream", status)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, "stream", prompt_kind)
+
+async def translate_batch(texts: List[str], client_ip: str = None, user_agent: str = None) -> Dict[str, Any]:
+    """
+    批量翻译：缓存批量查询，未命中的条目打包成多条提示词并发翻译
+    单条失败不影响整批，results 与输入一一对应
+    """
+    try:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        
+        # 1. 请求验证（速率限制在缓存查询后按发往上游的条数计）
+        item_errors = {}
+        if client_ip:
+            is_valid, error_msg, item_errors = get_validator().validate_batch_request(texts, client_ip, user_agent)
+            if not is_valid:
+                return {"error": error_msg}
+        
+        for index, text in enumerate(texts):
+            if index in item_errors:
+                results[index] = {"error": item_errors[index]}
+            elif not text.strip():
+                results[index] = {"error": "输入文本不能为空"}
+            elif len(text) > settings.max_text_length:
+                results[index] = {"error": f"输入文本超过{settings.max_text_length}字符限制"}
+        
+        # 离线词表命中的条目直接返回
+        glossary_hits = 0
+        for index, text in enumerate(texts):
+            if results[index] is None:
+                glossary_result = get_glossary().lookup(text)
+                if glossary_result:
+                    results[index] = {"success": True, "data": glossary_result}
+                    glossary_hits += 1
+                    if client_ip:
+                        get_adb().record_daily_stats_nowait(
+                            glossary_result['detected_language'],
+                            glossary_result['detected_language'],
+                            glossary_result['word_category'],
+                            is_cache_hit=True
+                        )
+        
+        # 相同文本只处理一次
+        pending: Dict[str, List[int]] = {}
+        unique_texts: Dict[str, str] = {}
+        for index, text in enumerate(texts):
+            if results[index] is None:
+                text_hash = get_db()._generate_text_hash(text)
+                pending.setdefault(text_hash, []).append(index)
+                unique_texts.setdefault(text_hash, text)
+        
+        # 2. 批量检查缓存
+        cache_hits = 0
+        if unique_texts:
+            cached = await get_adb().get_cached_translations(list(unique_texts.values()))
+            for text_hash, cached_result in cached.items():
+                for index in pending.pop(text_hash, []):
+                    results[index] = {"success": True, "data": cached_result}
+                    cache_hits += 1
+                if client_ip:
+                    get_adb().record_daily_stats_nowait(
+                        cached_result.get('detected_language', '未知'),
+                        cached_result.get('detected_language', '未知'),
+                        cached_result.get('word_category', '通用词汇'),
+                        is_cache_hit=True
+                    )
+        
+        # 3. 未命中的条目分块并发调用AI（每条计一次速率限制）
+        CACHE_LOOKUPS.inc("glossary", amount=glossary_hits)
+        CACHE_LOOKUPS.inc("hit", amount=cache_hits)
+        CACHE_LOOKUPS.inc("miss", amount=sum(len(indexes) for indexes in pending.values()))
+        if client_ip and pending:
+            is_allowed, limit_msg = get_validator().charge_batch(client_ip, len(pending))
+            if not is_allowed:
+                for indexes in pending.values():
+                    for index in indexes:
+                        results[index] = {"error": limit_msg}
+                pending.clear()
+        miss_texts = [unique_texts[text_hash] for text_hash in pending]
+        chunks = _chunk_batch(miss_texts)
+        semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+        
+        async def run_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await _call_ai_batch_translation(chunk)
+        
+        chunk_results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        
+        to_save = []
+        for chunk, items in zip(chunks, chunk_results):
+            for text, item in zip(chunk, items):
+                for index in pending[get_db()._generate_text_hash(text)]:
+                    results[index] = item
+                if "success" in item:
+                    to_save.append((text, item["data"]))
+        
+        # 4. 所有新结果在一个事务中保存
+        if to_save:
+            await get_adb().save_translations(to_save, client_ip, user_agent)
+        
+        failed = sum(1 for item in results if "error" in item)
+        return {
+            "success": True,
+            "results": results,
+            "summary": {
+                "total": len(texts),
+                "glossary_hits": glossary_hits,
+                "cache_hits": cache_hits,
+                "translated": len(texts) - glossary_hits - cache_hits - failed,
+                "failed": failed,
+                "upstream_calls": len(chunks)
+            }
+        }
+        
+    except Exception as e:
+        print(f"批量翻译处理错误: {e}")
+        return {"error": f"处理失败: {str(e)}"}
+
+def _chunk_batch(texts: List[str]) -> List[List[str]]:
+    """按条数和字符数上限把文本分块，每块对应一次上游调用"""
+    chunks = []
+    current, current_chars = [], 0
+    for text in texts:
+        if current and (len(current) >= settings.batch_max_items_per_prompt or
+                        current_chars + len(text) > settings.batch_max_chars_per_prompt):
+            chunks.append(current)
+            current, current_chars = [], 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+async def _call_ai_batch_translation(texts: List[str]) -> List[Dict[str, Any]]:
+    """一次上游调用翻译多条文本，返回与输入一一对应的结果"""
+    if len(texts) == 1:
+        return [await _call_ai_translation(texts[0])]
+    
+    numbered_items = "\n".join(
+        f"{index}. {json.dumps(text, ensure_ascii=False)}" for index, text in enumerate(texts, 1)
+    )
+    prompt = BATCH_TRANSLATION_PROMPT.format(numbered_items=numbered_items)
+    max_tokens = min(settings.batch_max_tokens, settings.batch_tokens_per_item * len(texts))
+    
+    try:
+        ai_response = await _request_completion(prompt, max_tokens=max_tokens, prompt_kind="batch")
+        parsed = _extract_json(ai_response)
+    except UpstreamUnavailable as e:
+        return [{"error": f"翻译服务繁忙，请稍后重试: {str(e)}"} for _ in texts]
+    except httpx.HTTPError as e:
+        return [{"error": f"API请求失败: {str(e)}"} for _ in texts]
+    except json.JSONDecodeError:
+        PARSE_FAILURES.inc("batch")
+        return [{"error": "AI返回格式异常"} for _ in texts]
+    except Exception as e:
+        return [{"error": f"处理失败: {str(e)}"} for _ in texts]
+    
+    # 按编号对应结果
+    by_id = {}
+    for item in parsed.get("results", []) if isinstance(parsed, dict) else []:
+        if isinstance(item, dict) and isinstance(item.get("translations"), list):
+            try:
+                by_id[int(item.pop("id"))] = item
+            except (KeyError, TypeError, ValueError):
+                continue
+    
+    return [
+        {"success": True, "data": by_id[index]} if index in by_id
+        else {"error": "批量翻译结果缺少该条目"}
+        for index in range(1, len(texts) + 1)
+    ]
+
 # 添加工具函数
 def get_translation_history(limit: int = 50, category: str = None) -> List[Dict[str, Any]]:
     """获取翻译历史"""
-    return db.get_translation_history(limit, category)
+    return get_db().get_translation_history(limit, category)
 
 def get_daily_stats(days: int = 7) -> List[Dict[str, Any]]:
     """获取每日统计"""
-    return db.get_daily_stats(days)
+    return get_db().get_daily_stats(days)
 
 def get_popular_translations(limit: int = 20) -> List[Dict[str, Any]]:
     """获取热门翻译"""
-    return db.get_popular_translations(limit)
+    return get_db().get_popular_translations(limit)
+
+async def search_translations(query: str, field: str = "all", mode: str = "contains",
+                              category: str = None, limit: int = 20, cursor: str = None) -> Dict[str, Any]:
+    """搜索已缓存的翻译（原文/译文子串或原文前缀），使用 next_cursor 翻页"""
+    try:
+        return {"success": True, **await get_adb().search_translations(query, field, mode, category, limit, cursor)}
+    except ValueError as e:
+        return {"error": str(e)}
 
 def get_client_status(client_ip: str) -> Dict[str, Any]:
     """获取客户端状态"""
-    return validator.get_client_status(client_ip)
+    return get_validator().get_client_status(client_ip)
 
 def get_system_stats() -> Dict[str, Any]:
     """获取系统统计"""
-    validator_stats = validator.get_system_stats()
+    db = get_db()
+    validator_stats = get_validator().get_system_stats()
+    cache_summary = db.get_cache_summary()
     db_stats = {
         "database": {
             "cache_enabled": True,
-            "total_translations": len(db.get_translation_history(1000)),
-        }
+            "total_translations": cache_summary["total_entries"],
+            "cache_summary": cache_summary,
+            "memory_cache": db.memory_cache.stats() if db.memory_cache is not None else None,
+            "snapshot": db.snapshot.stats() if db.snapshot is not None else None,
+            "eviction": {
+                **db.eviction_stats,
+                "max_rows": settings.cache_max_rows,
+                "max_bytes": settings.cache_max_bytes,
+                "category_ttl": settings.cache_category_ttl
+            },
+        },
+        "glossary": get_glossary().stats(),
+        "upstream": upstream_guard.stats(),
+        "request_coalescing": translation_flight.stats(),
+        "data_access": get_adb().stats()
     }
     return {**validator_stats, **db_stats} 
\ No newline at end of file
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+前端静态资源缓存 - 文件只读一次，gzip/brotli压缩结果常驻内存
+  - 强ETag（内容哈希，每种编码各自一个），If-None-Match 命中时返回304
+  - 压缩在后台线程中进行，完成前先返回未压缩的内容，请求不等待brotli压缩
+  - index.html 中对其他资源的引用改写为带指纹的路径（/assets/style.<哈希>.css），
+    带指纹的资源内容不会变化，可以长期缓存；入口路径每次都向服务器验证
+  - 开发模式下每次请求检查修改时间，文件变化后重新加载
+brotli 为可选依赖（pip install brotli），未安装时只提供gzip
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 小于该大小的文件压缩收益不明显
+_MIN_COMPRESS_SIZE = 256
+# 字节不同的表示必须使用不同的强ETag
+_ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+_FINGERPRINTED = re.compile(r"^(?P<stem>.+)\.(?P<fingerprint>[0-9a-f]{12})(?P<suffix>\.[^.]+)$")
+
+
+class StaticAsset:
+    def __init__(self, name: str, body: bytes, mtime: float):
+        """保存原始内容；压缩变体由 compress() 生成"""
+        self.name = name
+        self.mtime = mtime
+        # 入口页面引用的资源及引用时的指纹
+        self.dependencies: Dict[str, str] = {}
+        self.fingerprint = hashlib.sha256(body).hexdigest()[:12]
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        # text/* 的charset由Response自动补上
+        if content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+
+        self.variants: Dict[str, bytes] = {"identity": body}
+        self.compressed = len(body) < _MIN_COMPRESS_SIZE
+        self._compress_lock = threading.Lock()
+
+    def compress(self):
+        """生成gzip/brotli变体（压缩后不更小时不保留）；完成后整体替换 variants，读取方不加锁"""
+        with self._compress_lock:
+            if self.compressed:
+                return
+            body = self.variants["identity"]
+            compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(body, quality=11)
+            self.variants = {"identity": body,
+                             **{encoding: data for encoding, data in compressed.items() if len(data) < len(body)}}
+            self.compressed = True
+
+    @property
+    def fingerprinted_name(self) -> str:
+        stem, suffix = os.path.splitext(self.name)
+        return f"{stem}.{self.fingerprint}{suffix}"
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.fingerprint}{_ETAG_SUFFIXES[encoding]}"'
+
+    def select(self, accept_encoding: str) -> Tuple[str, bytes]:
+        """按客户端支持的编码选择最小的变体（压缩完成前只有原始内容）"""
+        variants = self.variants
+        accepted = {token.split(";")[0].strip() for token in accept_encoding.lower().split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in variants:
+                return encoding, variants[encoding]
+        return "identity", variants["identity"]
+
+
+class AssetCache:
+    def __init__(self, directory: Path, index: str = "index.html", dev_mode: bool = False,
+                 max_age: int = 31536000):
+        self.directory = Path(directory)
+        self.index = index
+        self.dev_mode = dev_mode
+        self.max_age = max_age
+        self._assets: Dict[str, StaticAsset] = {}
+        # 加载入口页面时会递归加载它引用的资源
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.not_modified = 0
+
+    def _path(self, name: str) -> Path:
+        path = (self.directory / name).resolve()
+        # 只允许访问前端目录下的文件
+        if self.directory.resolve() not in path.parents or not path.is_file():
+            raise HTTPException(status_code=404, detail="资源不存在")
+        return path
+
+    def get(self, name: str) -> StaticAsset:
+        """获取资源；首次访问时加载，开发模式下文件变化后重新加载"""
+        asset = self._assets.get(name)
+        if asset is not None and not self.dev_mode:
+            return asset
+        path = self._path(name)
+        mtime = path.stat().st_mtime
+        if asset is not None and asset.mtime == mtime and not self._dependencies_changed(asset):
+            return asset
+        with self._lock:
+            asset = self._load(name, path, mtime)
+        # 压缩不持有锁，也不阻塞当前请求
+        if not asset.compressed:
+            threading.Thread(target=asset.compress, name=f"compress-{name}", daemon=True).start()
+        return asset
+
+    def _dependencies_changed(self, asset: StaticAsset) -> bool:
+        return any(self.get(name).fingerprint != fingerprint for name, fingerprint in asset.dependencies.items())
+
+    def _load(self, name: str, path: Path, mtime: float) -> StaticAsset:
+        body = path.read_bytes()
+        dependencies: Dict[str, str] = {}
+        if name == self.index:
+            body = self._rewrite_references(body.decode("utf-8"), dependencies).encode("utf-8")
+        asset = StaticAsset(name, body, mtime)
+        asset.dependencies = dependencies
+        self._assets[name] = asset
+        self.loads += 1
+        return asset
+
+    def _rewrite_references(self, html: str, dependencies: Dict[str, str]) -> str:
+        """把 index.html 里对同目录资源的引用替换为带指纹的路径"""
+        def replace(match: re.Match) -> str:
+            name = match.group("name")
+            try:
+                asset = self.get(name)
+            except HTTPException:
+                return match.group(0)
+            dependencies[name] = asset.fingerprint
+            return f'{match.group("attr")}="/assets/{asset.fingerprinted_name}"'
+        return re.sub(r'(?P<attr>href|src)="/?(?P<name>[\w.-]+\.(?:css|js))"', replace, html)
+
+    def preload(self):
+        """预先加载并压缩入口页面及其引用的资源（目录不存在时跳过）"""
+        try:
+            self.get(self.index)
+        except HTTPException:
+            return
+        for asset in list(self._assets.values()):
+            asset.compress()
+
+    def response(self, request: Request, name: str, immutable: bool = False) -> Response:
+        """构造带ETag和压缩的响应；If-None-Match 匹配时返回304"""
+        asset = self.get(name)
+        encoding, body = asset.select(request.headers.get("accept-encoding", ""))
+        etag = asset.etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age}, immutable" if immutable else "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+
+        # 只与本次要返回的表示的ETag比较
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.content_type, headers=headers)
+
+    def fingerprinted_response(self, request: Request, filename: str) -> Response:
+        """处理 /assets/<名称>.<指纹>.<扩展名>；指纹过期时返回当前内容但不长期缓存"""
+        match = _FINGERPRINTED.match(filename)
+        if not match:
+            raise HTTPException(status_code=404, detail="资源不存在")
+        name = match.group("stem") + match.group("suffix")
+        current = self.get(name).fingerprint == match.group("fingerprint")
+        return self.response(request, name, immutable=current)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "assets": len(self._assets),
+            "bytes": {name: {encoding: len(data) for encoding, data in asset.variants.items()}
+                      for name, asset in self._assets.items()},
+            "loads": self.loads,
+            "not_modified": self.not_modified,
+            "brotli": brotli is not None,
+            "dev_mode": self.dev_mode
+        }
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+异步数据访问层 - 将阻塞的SQLite操作移出事件循环
+读操作在专用读线程池中执行，写操作由单个写线程按队列顺序执行
+"""
+import asyncio
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+from database import TranslationDatabase, get_db
+from lazy import LazyInstance, module_getattr
+from metrics import DB_QUEUE_SECONDS, DB_SECONDS
+
+_STOP = object()
+
+
+class AsyncTranslationDatabase:
+    def __init__(self, database: TranslationDatabase, reader_threads: int = 4,
+                 flush_interval: float = 5.0, compaction_interval: float = 300):
+        """初始化读线程池和写队列"""
+        self.db = database
+        self._readers = ThreadPoolExecutor(max_workers=reader_threads,
+                                           thread_name_prefix="db-reader")
+        self._write_queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+
+        # 定时把写回缓冲区的数据交给写线程
+        self.flush_interval = flush_interval
+        self._flush_timer: Optional[threading.Thread] = None
+        self._stop_timer = threading.Event()
+
+        # 定时淘汰与回收：每批作为一次独立写操作排队，不会长时间占用写线程
+        self.compaction_interval = compaction_interval
+        self._compaction_timer: Optional[threading.Thread] = None
+        self._compacting = False
+
+        # 统计计数
+        self.reads = 0
+        self.writes = 0
+        self.write_errors = 0
+
+    # ---------- 线程调度 ----------
+
+    async def _read(self, func: Callable, *args, **kwargs) -> Any:
+        """在读线程池中执行只读操作"""
+        self.reads += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(self._timed_read, func, *args, **kwargs))
+
+    @staticmethod
+    def _timed_read(func: Callable, *args, **kwargs) -> Any:
+        with DB_SECONDS.time("read", func.__name__):
+            return func(*args, **kwargs)
+
+    def _ensure_writer(self):
+        """按需启动写线程"""
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+                self._writer.start()
+                if self.flush_interval > 0:
+                    self._flush_timer = threading.Thread(target=self._flush_timer_loop,
+                                                         name="db-flush-timer", daemon=True)
+                    self._flush_timer.start()
+                if self.compaction_interval > 0:
+                    self._compaction_timer = threading.Thread(target=self._compaction_timer_loop,
+                                                              name="db-compaction-timer", daemon=True)
+                    self._compaction_timer.start()
+
+    def _flush_timer_loop(self):
+        """定时器线程：只负责排队，实际写入仍由写线程完成"""
+        while not self._stop_timer.wait(self.flush_interval):
+            if len(self.db.write_buffer) and not self._closed:
+                self._write_queue.put((self.db.flush, (), {}, None))
+
+    def _compaction_timer_loop(self):
+        """定时器线程：触发一轮后台整理（上一轮未结束时跳过）"""
+        while not self._stop_timer.wait(self.compaction_interval):
+            if not self._compacting and not self._closed:
+                self._compacting = True
+                self._write_queue.put((self._compact_step, (), {}, None))
+
+    def _compact_step(self):
+        """在写线程中执行一批整理；还有剩余时重新排到队尾，让其他写操作先执行"""
+        try:
+            more = self.db.compact_step()
+        except Exception:
+            self._compacting = False
+            raise
+        if more and not self._closed:
+            self._write_queue.put((self._compact_step, (), {}, None))
+        else:
+            self._compacting = False
+
+    def _submit_write(self, func: Callable, args: tuple, kwargs: dict,
+                      future: Optional[asyncio.Future] = None):
+        if self._closed:
+            raise RuntimeError("数据访问层已关闭")
+        self._ensure_writer()
+        self._write_queue.put((func, args, kwargs, future, time.perf_counter()))
+
+    async def _write(self, func: Callable, *args, **kwargs) -> Any:
+        """提交写操作并等待其完成（等待不阻塞事件循环）"""
+        future = asyncio.get_running_loop().create_future()
+        self._submit_write(func, args, kwargs, future)
+        return await future
+
+    def _write_nowait(self, func: Callable, *args, **kwargs):
+        """提交写操作后立即返回，不等待结果"""
+        self._submit_write(func, args, kwargs)
+
+    def _writer_loop(self):
+        """写线程：串行执行队列中的写操作"""
+        while True:
+            item = self._write_queue.get()
+            if item is _STOP:
+                break
+
+            # 定时器排入的任务没有入队时间
+            func, args, kwargs, future, *enqueued = item
+            if enqueued:
+                DB_QUEUE_SECONDS.observe(time.perf_counter() - enqueued[0])
+            try:
+                with DB_SECONDS.time("write", func.__name__):
+                    result = func(*args, **kwargs)
+                self.writes += 1
+            except Exception as e:
+                self.write_errors += 1
+                print(f"数据库写操作失败: {e}")
+                if future is not None:
+                    self._resolve(future, exception=e)
+                continue
+
+            if future is not None:
+                self._resolve(future, result=result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None, exception: Exception = None):
+        """从写线程安全地设置事件循环中的Future"""
+        def _set():
+            if future.done():
+                return
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+        try:
+            future.get_loop().call_soon_threadsafe(_set)
+        except RuntimeError:
+            # 事件循环已关闭，结果无人等待
+            pass
+
+    def close(self):
+        """写回累积数据并停止线程（应用关闭时调用）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_timer.set()
+        if self._flush_timer is not None:
+            self._flush_timer.join()
+            self._flush_timer = None
+        if self._compaction_timer is not None:
+            self._compaction_timer.join()
+            self._compaction_timer = None
+        if self._writer is not None:
+            # 最后一次写回排在所有已提交的写操作之后
+            self._write_queue.put((self.db.flush, (), {}, None))
+            self._write_queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        else:
+            self.db.flush()
+        self._readers.shutdown(wait=True)
+        self.db.close()
+
+    # ---------- 读操作 ----------
+
+    async def get_cached_translation(self, text: str) -> Optional[Dict[str, Any]]:
+        """查询缓存；命中次数的更新交给写线程"""
+        cached = await self._read(self.db.find_cached_translation, text)
+        if cached:
+            self._write_nowait(self.db.record_cache_hit, text)
+        return cached
+
+    async def get_cached_translations(self, texts: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量查询缓存，返回 {text_hash: 结果}"""
+        found = await self._read(self.db.find_cached_translations, texts)
+        if found:
+            hit_texts = [text for text in texts if self.db._generate_text_hash(text) in found]
+            self._write_nowait(self.db.record_cache_hits, hit_texts)
+        return found
+
+    async def get_translation_history(self, limit: int = 50, category: str = None) -> List[Dict[str, Any]]:
+        return await self._read(self.db.get_translation_history, limit, category)
+
+    async def get_daily_stats(self, days: int = 7) -> List[Dict[str, Any]]:
+        return await self._read(self.db.get_daily_stats, days)
+
+    async def get_popular_translations(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return await self._read(self.db.get_popular_translations, limit)
+
+    async def search_translations(self, query: str, field: str = "all", mode: str = "contains",
+                                  category: str = None, limit: int = 20, cursor: str = None) -> Dict[str, Any]:
+        return await self._read(self.db.search_translations, query, field, mode, category, limit, cursor)
+
+    # ---------- 写操作 ----------
+
+    async def save_translation(self, text: str, result: Dict[str, Any],
+                               user_ip: str = None, user_agent: str = None) -> bool:
+        return await self._write(self.db.save_translation, text, result, user_ip, user_agent)
+
+    async def save_translations(self, items: List[tuple],
+                                user_ip: str = None, user_agent: str = None) -> int:
+        return await self._write(self.db.save_translations, items, user_ip, user_agent)
+
+    async def record_daily_stats(self, source_lang: str, target_lang: str,
+                                 category: str, is_cache_hit: bool = False):
+        return await self._write(self.db.record_daily_stats, source_lang, target_lang,
+                                 category, is_cache_hit)
+
+    def record_daily_stats_nowait(self, source_lang: str, target_lang: str,
+                                  category: str, is_cache_hit: bool = False):
+        """记录统计但不等待写入完成（用于缓存命中的快速路径）"""
+        self._write_nowait(self.db.record_daily_stats, source_lang, target_lang,
+                           category, is_cache_hit)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取数据访问层统计信息"""
+        return {
+            "reader_threads": self._readers._max_workers,
+            "write_queue_depth": self._write_queue.qsize(),
+            "reads": self.reads,
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+            "write_behind": self.db.write_buffer.stats(),
+            "compaction_in_progress": self._compacting
+        }
+
+
+# 全局异步数据访问实例：首次使用时才创建数据库和线程
+get_adb = LazyInstance(lambda: AsyncTranslationDatabase(
+    get_db(), reader_threads=settings.db_reader_threads,
+    flush_interval=settings.write_behind_flush_interval,
+    compaction_interval=settings.cache_compaction_interval))
+__getattr__ = module_getattr(__name__, {"adb": get_adb})
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+事件循环延迟基准测试
+在混合命中/未命中负载下，对比"同步调用SQLite"与"异步数据访问层"的事件循环延迟
+
+运行: cd backend && python -m benchmarks.bench_event_loop_lag
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+async def _lag_monitor(samples: list, stop: asyncio.Event, interval: float = 0.001):
+    """周期性睡眠，记录实际唤醒时间比预期晚了多少"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+
+async def _fake_upstream(text: str):
+    """模拟上游翻译：只占用等待时间，不占用事件循环"""
+    await asyncio.sleep(0.02)
+    return {"success": True, "data": {
+        "detected_language": "中文",
+        "translation_direction": "中→日",
+        "word_category": "通用词汇",
+        "translations": [{"original": text, "target": text, "reading": {"hiragana": ""},
+                          "meaning": "", "examples": []}]
+    }}
+
+
+async def _run(mode: str, requests: int, concurrency: int, hit_ratio: float) -> dict:
+    import api
+    from database import db
+
+    hot_terms = [f"热词{i}" for i in range(200)]
+    for term in hot_terms:
+        db.save_translation(term, (await _fake_upstream(term))["data"])
+
+    async def translate_sync(text: str):
+        # 旧实现：在事件循环线程中直接访问SQLite
+        cached = db.get_cached_translation(text)
+        if cached:
+            return cached
+        result = await _fake_upstream(text)
+        db.save_translation(text, result["data"])
+        return result
+
+    api._call_ai_translation = _fake_upstream
+    translate = translate_sync if mode == "sync" else api.translate_text
+
+    counter = iter(range(requests))
+    misses = iter(range(10 ** 9))
+
+    async def worker():
+        for _ in counter:
+            if random.random() < hit_ratio:
+                text = random.choice(hot_terms)
+            else:
+                text = f"{mode}新词{next(misses)}"
+            await translate(text)
+
+    samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_lag_monitor(samples, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    from async_db import adb
+    adb.close()
+
+    samples.sort()
+    return {
+        "elapsed": elapsed,
+        "lag_mean": statistics.mean(samples),
+        "lag_p99": samples[int(len(samples) * 0.99) - 1],
+        "lag_max": samples[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件循环延迟基准测试")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--hit-ratio", type=float, default=0.8)
+    parser.add_argument("--mode", choices=["sync", "async"], required=True,
+                        help="sync=旧的同步调用方式, async=异步数据访问层")
+    args = parser.parse_args()
+
+    # 在临时目录中使用独立数据库，并关闭内存缓存层以测量磁盘访问
+    os.chdir(tempfile.mkdtemp(prefix="bench_lag_"))
+    os.environ["MEMORY_CACHE_ENABLED"] = "false"
+
+    random.seed(42)
+    result = asyncio.run(_run(args.mode, args.requests, args.concurrency, args.hit_ratio))
+    print(f"模式={args.mode} 请求数={args.requests} 并发={args.concurrency} 命中率={args.hit_ratio:.0%}")
+    print(f"总耗时={result['elapsed']:.2f}s  吞吐={args.requests / result['elapsed']:.0f} req/s")
+    print(f"事件循环延迟 mean={result['lag_mean'] * 1000:.3f}ms  "
+          f"p99={result['lag_p99'] * 1000:.3f}ms  max={result['lag_max'] * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
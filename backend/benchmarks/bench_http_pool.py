@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+上游连接池基准测试
+对比"每次新建 httpx.AsyncClient"与"共享连接池"的缓存未命中延迟
+
+运行: cd backend && python -m benchmarks.bench_http_pool
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.mock_deepseek import MockDeepSeek, start_mock_server
+from config import settings
+import http_client
+
+PAYLOAD = {
+    "model": "deepseek-chat",
+    "messages": [{"role": "user", "content": "你好"}],
+    "temperature": 0.3,
+    "max_tokens": 1000
+}
+
+
+async def _per_call_client(url: str, n: int) -> list:
+    """旧实现：每次请求新建客户端"""
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json=PAYLOAD, timeout=30.0)
+            response.raise_for_status()
+            response.json()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _pooled_client(url: str, n: int) -> list:
+    """新实现：复用应用级连接池"""
+    await http_client.start_http_client()
+    client = http_client.get_http_client()
+    latencies = []
+    try:
+        for _ in range(n):
+            start = time.perf_counter()
+            response = await client.post(url, json=PAYLOAD)
+            response.raise_for_status()
+            response.json()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await http_client.close_http_client()
+    return latencies
+
+
+def _report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<12} mean={statistics.mean(latencies) * 1000:7.3f}ms  "
+          f"p50={statistics.median(latencies) * 1000:7.3f}ms  p95={p95 * 1000:7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="上游连接池基准测试")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟上游处理延迟（秒）")
+    parser.add_argument("--port", type=int, default=18765)
+    args = parser.parse_args()
+
+    server = start_mock_server(MockDeepSeek(latency=args.latency), port=args.port)
+    url = f"http://127.0.0.1:{args.port}/v1/chat/completions"
+    settings.deepseek_api_url = url
+
+    try:
+        per_call = asyncio.run(_per_call_client(url, args.requests))
+        pooled = asyncio.run(_pooled_client(url, args.requests))
+    finally:
+        server.should_exit = True
+
+    print(f"请求数: {args.requests}，模拟上游延迟: {args.latency * 1000:.0f}ms（本地明文HTTP，不含TLS握手）")
+    _report("每次新建", per_call)
+    _report("共享连接池", pooled)
+    print(f"平均节省: {(statistics.mean(per_call) - statistics.mean(pooled)) * 1000:.3f}ms/次")
+
+
+if __name__ == "__main__":
+    main()
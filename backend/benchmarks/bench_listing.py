@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+列表查询微基准测试
+对比旧的"读取整行JSON再解析第一条译文"与"按排序索引定位后只读窄列"
+在历史记录/热门词条接口上的耗时与内存分配
+
+运行: cd backend && python -m benchmarks.bench_listing
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def _result(i: int) -> dict:
+    """模拟真实负载：多条译文，每条带若干例句"""
+    return {
+        "detected_language": "中文",
+        "translation_direction": "中→日",
+        "word_category": "名词",
+        "translations": [{
+            "original": f"词条{i}",
+            "target": f"訳語{i}-{n}",
+            "reading": {"hiragana": "やくご"},
+            "meaning": "释义" * 20,
+            "examples": [{"sentence": "例文" * 15, "translation": "例句翻译" * 10} for _ in range(3)]
+        } for n in range(3)]
+    }
+
+
+def _legacy_history(database, limit: int) -> list:
+    """旧实现：SELECT translation_result 后逐行 json.loads"""
+    rows = database._get_connection().execute("""
+        SELECT text_hash, source_text, source_lang, target_lang, word_category,
+               translation_result, created_at, hit_count
+        FROM translation_cache ORDER BY updated_at DESC LIMIT ?
+    """, (limit,)).fetchall()
+    return [{
+        'source_text': row['source_text'],
+        'source_lang': row['source_lang'],
+        'target_lang': row['target_lang'],
+        'category': row['word_category'],
+        'translation': json.loads(row['translation_result']).get('translations', [{}])[0].get('target', ''),
+        'created_at': row['created_at'],
+        'hit_count': row['hit_count']
+    } for row in rows]
+
+
+def _measure(func, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表查询微基准测试")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_listing_")
+    os.chdir(workdir)
+    os.environ["MEMORY_CACHE_ENABLED"] = "false"
+
+    from database import TranslationDatabase
+
+    database = TranslationDatabase(os.path.join(workdir, "listing.db"))
+    database.save_translations([(f"词条{i}", _result(i)) for i in range(args.rows)])
+
+    legacy_time, legacy_peak = _measure(lambda: _legacy_history(database, args.rows), args.repeat)
+    columnar_time, columnar_peak = _measure(
+        lambda: database.get_translation_history(limit=args.rows), args.repeat)
+
+    print(f"历史记录列表 {args.rows} 行，重复 {args.repeat} 次")
+    print(f"{'':<10}{'耗时 ms':>12}{'峰值内存 KB':>14}")
+    print(f"{'JSON解析':<10}{legacy_time * 1000:>12.2f}{legacy_peak / 1024:>14.0f}")
+    print(f"{'窄列':<10}{columnar_time * 1000:>12.2f}{columnar_peak / 1024:>14.0f}")
+    print(f"提升: 耗时 {legacy_time / columnar_time:.1f}x，内存 {legacy_peak / columnar_peak:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
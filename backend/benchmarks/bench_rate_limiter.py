@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+速率限制基准测试
+对比旧的"每IP一个时间戳deque"与滑动窗口计数器在大量不同IP下的耗时和内存
+
+运行: cd backend && python -m benchmarks.bench_rate_limiter --ips 1000000
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+from rate_limiter import SlidingWindowRateLimiter
+
+
+class LegacyRateLimiter:
+    """旧实现：每个IP保存所有请求时间戳，分钟计数需遍历"""
+
+    def __init__(self, per_minute: int = 20, per_hour: int = 200):
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.rate_limits = defaultdict(lambda: deque())
+
+    def hit(self, client_ip: str, now: float):
+        rate_queue = self.rate_limits[client_ip]
+        while rate_queue and now - rate_queue[0] > 3600:
+            rate_queue.popleft()
+        if len(rate_queue) >= self.per_hour:
+            return False, "hour"
+        minute_requests = sum(1 for req_time in rate_queue if now - req_time < 60)
+        if minute_requests >= self.per_minute:
+            return False, "minute"
+        rate_queue.append(now)
+        return True, ""
+
+    def __len__(self):
+        return len(self.rate_limits)
+
+
+def _run(limiter, ips: int, repeat_ips: int, repeat_hits: int, trace: bool = False) -> dict:
+    if trace:
+        tracemalloc.start()
+    now = 1_700_000_000.0
+    start = time.perf_counter()
+
+    # 扫描器轮换地址：大量只出现一次的IP
+    for i in range(ips):
+        limiter.hit(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}#{i >> 24}", now + i * 0.0001)
+
+    # 少量活跃IP反复请求，检验单IP检查耗时
+    hot_start = time.perf_counter()
+    for i in range(repeat_hits):
+        limiter.hit(f"192.168.0.{i % repeat_ips}", now + ips * 0.0001 + i * 0.5)
+    hot_elapsed = time.perf_counter() - hot_start
+
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "elapsed": elapsed,
+        "hot_us": hot_elapsed / max(repeat_hits, 1) * 1e6,
+        "peak_mb": peak / 1024 / 1024,
+        "tracked": len(limiter)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="速率限制基准测试")
+    parser.add_argument("--ips", type=int, default=1000000, help="不同IP数量")
+    parser.add_argument("--hot-ips", type=int, default=10)
+    parser.add_argument("--hot-hits", type=int, default=200000)
+    parser.add_argument("--max-clients", type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, factory in (
+        ("旧实现(deque)", LegacyRateLimiter),
+        ("滑动窗口计数", lambda: SlidingWindowRateLimiter(max_clients=args.max_clients)),
+    ):
+        # 计时与内存分开测量，避免 tracemalloc 影响耗时
+        result = _run(factory(), args.ips, args.hot_ips, args.hot_hits)
+        result["peak_mb"] = _run(factory(), args.ips, args.hot_ips, 0, trace=True)["peak_mb"]
+        print(f"{name:<14} 总耗时={result['elapsed']:.2f}s  活跃IP单次检查={result['hot_us']:.2f}µs  "
+              f"内存峰值={result['peak_mb']:.1f}MB  跟踪IP数={result['tracked']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+翻译历史搜索基准测试（默认100万行）
+对比 LIKE '%…%' 全表扫描 + OFFSET 分页与 FTS5 trigram 索引 + keyset 游标分页：
+  - 常见词、罕见词、2字词（走LIKE回退）、译文读音子串、原文前缀的首页耗时
+  - 翻到第N页的耗时（OFFSET 需要跳过前面所有行，游标直接定位）
+同时输出建库耗时（含触发器维护FTS索引）和数据库大小。
+
+运行: cd backend && python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from database import TranslationDatabase
+
+CORPUS = Path(__file__).parent / "data" / "cjk_corpus.txt"
+# 补充的常用字，组合出大量不重复的原文
+_HANZI = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん"
+
+
+def _rows(count: int, seed: int):
+    rng = random.Random(seed)
+    words = [line.strip() for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    for i in range(count):
+        source = rng.choice(words) + "".join(rng.choices(_HANZI, k=rng.randint(2, 6))) + str(i)
+        target = "".join(rng.choices(_KANA, k=rng.randint(4, 10)))
+        reading = "".join(rng.choices(_KANA, k=rng.randint(4, 10)))
+        yield (hashlib.md5(source.encode("utf-8")).hexdigest(), source, "中文", "日语", "通用词汇", "{}",
+               target, reading)
+
+
+def _build(path: str, rows: int, seed: int, batch: int = 20000) -> TranslationDatabase:
+    """按真实表结构建库（触发器同步维护汇总表和FTS索引）"""
+    database = TranslationDatabase(path)
+    conn = database._get_connection()
+    pending = []
+    for row in _rows(rows, seed):
+        pending.append(row)
+        if len(pending) >= batch:
+            _insert(conn, pending)
+            pending = []
+    _insert(conn, pending)
+    return database
+
+
+def _insert(conn, rows: list):
+    with conn:
+        conn.executemany("""
+            INSERT INTO translation_cache (text_hash, source_text, source_lang, target_lang, word_category,
+                                           translation_result, primary_target, primary_reading)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+
+def _like_page(database, query: str, columns: tuple, limit: int, offset: int) -> list:
+    """旧做法：LIKE 子串匹配扫描全表，OFFSET 分页"""
+    condition = " OR ".join(f"{column} LIKE ?" for column in columns)
+    return database._get_connection().execute(f"""
+        SELECT id, source_text, primary_target FROM translation_cache
+        WHERE {condition} ORDER BY id DESC LIMIT ? OFFSET ?
+    """, (*[f"%{query}%"] * len(columns), limit, offset)).fetchall()
+
+
+def _timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def _cursor_page(database, query: str, page: int, limit: int, **options) -> dict:
+    cursor = None
+    for _ in range(page):
+        result = database.search_translations(query, limit=limit, cursor=cursor, **options)
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻译历史搜索基准测试")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--page", type=int, default=50, help="深翻页测试的页码")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "search.db")
+    started = time.perf_counter()
+    database = _build(path, args.rows, args.seed)
+    build_s = time.perf_counter() - started
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"行数={args.rows}  建库={build_s:.1f}s ({args.rows / build_s:.0f} 行/s)  数据库={size_mb:.1f}MB")
+
+    sample = database._get_connection().execute(
+        "SELECT source_text, primary_reading FROM translation_cache WHERE id = ?", (args.rows // 2,)
+    ).fetchone()
+    cases = [
+        ("常见词", "东京大学", {}, ("source_text", "primary_target", "primary_reading")),
+        ("罕见词", sample["source_text"][-8:], {}, ("source_text", "primary_target", "primary_reading")),
+        ("2字词(LIKE回退)", "大学", {}, ("source_text", "primary_target", "primary_reading")),
+        ("读音子串", sample["primary_reading"][:4], {"field": "target"}, ("primary_target", "primary_reading")),
+        ("原文前缀", "东京", {"mode": "prefix"}, None),
+    ]
+
+    print(f"{'查询':<16}{'LIKE首页':>12}{'索引首页':>12}{'LIKE第' + str(args.page) + '页':>14}"
+          f"{'游标第' + str(args.page) + '页':>14}  命中(首页)")
+    for name, query, options, like_columns in cases:
+        indexed = _timed(lambda: database.search_translations(query, limit=args.limit, **options), args.repeat)
+        # 游标翻页需要依次取前面的页，这里只计最后一页的耗时
+        deep_cursor = _cursor_page(database, query, args.page - 1, args.limit, **options)["next_cursor"]
+        deep_indexed = _timed(lambda: database.search_translations(
+            query, limit=args.limit, cursor=deep_cursor, **options), args.repeat) if deep_cursor else float("nan")
+        if like_columns:
+            like = _timed(lambda: _like_page(database, query, like_columns, args.limit, 0), args.repeat)
+            deep_like = _timed(lambda: _like_page(
+                database, query, like_columns, args.limit, args.limit * (args.page - 1)), args.repeat)
+        else:
+            like = _timed(lambda: database._get_connection().execute(
+                "SELECT id FROM translation_cache WHERE source_text LIKE ? ORDER BY source_text LIMIT ?",
+                (f"{query}%", args.limit)).fetchall(), args.repeat)
+            deep_like = float("nan")
+        hits = len(database.search_translations(query, limit=args.limit, **options)["results"])
+        print(f"{name:<16}{like:>10.2f}ms{indexed:>10.2f}ms{deep_like:>12.2f}ms{deep_indexed:>12.2f}ms  {hits}")
+
+
+if __name__ == "__main__":
+    main()
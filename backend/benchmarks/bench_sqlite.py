@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+SQLite访问层微基准测试
+对比旧的"每次调用新建连接 + 回滚日志"与"线程级持久连接 + WAL + PRAGMA调优"
+的缓存查询与保存吞吐
+
+运行: cd backend && python -m benchmarks.bench_sqlite
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+RESULT = {
+    "detected_language": "中文",
+    "translation_direction": "中→日",
+    "word_category": "地名",
+    "translations": [{"original": "东京", "target": "東京", "reading": {"hiragana": "とうきょう"},
+                      "meaning": "日本首都", "examples": []}]
+}
+
+
+def _legacy_database_class():
+    from database import TranslationDatabase
+
+    class LegacyTranslationDatabase(TranslationDatabase):
+        """旧行为：每次操作新建连接，使用默认PRAGMA"""
+
+        def _get_connection(self) -> sqlite3.Connection:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+    return LegacyTranslationDatabase
+
+
+def _bench(database, saves: int, lookups: int) -> dict:
+    start = time.perf_counter()
+    for i in range(saves):
+        database.save_translation(f"词条{i}", RESULT)
+    save_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(lookups):
+        database.get_cached_translation(f"词条{i % saves}")
+    lookup_elapsed = time.perf_counter() - start
+
+    return {"save_ops": saves / save_elapsed, "lookup_ops": lookups / lookup_elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite访问层微基准测试")
+    parser.add_argument("--saves", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_sqlite_")
+    os.chdir(workdir)
+    # 关闭内存缓存层，只测量SQLite访问
+    os.environ["MEMORY_CACHE_ENABLED"] = "false"
+
+    from config import settings
+    from database import TranslationDatabase
+    LegacyTranslationDatabase = _legacy_database_class()
+
+    # 旧实现使用默认的回滚日志
+    journal_mode, settings.sqlite_journal_mode = settings.sqlite_journal_mode, "DELETE"
+    legacy_db = LegacyTranslationDatabase(os.path.join(workdir, "legacy.db"))
+    settings.sqlite_journal_mode = journal_mode
+
+    legacy = _bench(legacy_db, args.saves, args.lookups)
+    pooled = _bench(TranslationDatabase(os.path.join(workdir, "pooled.db")), args.saves, args.lookups)
+
+    print(f"保存 {args.saves} 次，查询 {args.lookups} 次")
+    print(f"{'':<10}{'保存 ops/s':>14}{'查询 ops/s':>14}")
+    print(f"{'旧实现':<10}{legacy['save_ops']:>14.0f}{legacy['lookup_ops']:>14.0f}")
+    print(f"{'连接池+WAL':<10}{pooled['save_ops']:>14.0f}{pooled['lookup_ops']:>14.0f}")
+    print(f"提升: 保存 {pooled['save_ops'] / legacy['save_ops']:.1f}x，"
+          f"查询 {pooled['lookup_ops'] / legacy['lookup_ops']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+冷启动基准测试
+  - 导入耗时：python -X importtime -c "import main"，输出总耗时和自身耗时最多的模块，
+    并检查导入后工作目录中没有创建任何文件（数据库、状态文件都应在首次使用时才创建）
+  - 首次响应耗时：从启动uvicorn进程到 /health 返回，以及随后第一次 /translate
+    （上游指向本地模拟服务，包含数据库的延迟初始化）
+
+设置 --max-import-ms / --max-first-response-ms 后超出阈值以非零状态退出，可在CI中跟踪回退。
+
+运行: cd backend && python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.mock_deepseek import MockDeepSeek, start_mock_server
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _import_profile(workdir: str) -> dict:
+    """在空目录中导入main，返回总耗时、自身耗时最多的模块和导入后新建的文件"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=workdir, env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    total_us = next(cumulative for name, _, cumulative in modules if name == "main")
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:10]
+    return {
+        "total_ms": total_us / 1000,
+        "slowest_self_ms": {name: round(self_us / 1000, 2) for name, self_us, _ in slowest},
+        "created_files": sorted(os.listdir(workdir))
+    }
+
+
+def _first_response(workdir: str, port: int, mock_port: int) -> dict:
+    """启动服务进程，测量到第一次 /health 和第一次 /translate 返回的时间"""
+    env = {**os.environ, "DEEPSEEK_API_KEY": "mock",
+           "DEEPSEEK_API_URL": f"http://127.0.0.1:{mock_port}/v1/chat/completions"}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(BACKEND_DIR),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30.0) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("服务进程启动失败")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            health = time.perf_counter() - started
+            translate_started = time.perf_counter()
+            client.post("/translate", json={"text": "东京大学"}).raise_for_status()
+            translate = time.perf_counter() - translate_started
+    finally:
+        process.terminate()
+        process.wait()
+    return {"first_health_ms": health * 1000, "first_translate_ms": translate * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18780)
+    parser.add_argument("--mock-port", type=int, default=18781)
+    parser.add_argument("--max-import-ms", type=float, default=0, help="导入耗时中位数上限，0表示不检查")
+    parser.add_argument("--max-first-response-ms", type=float, default=0,
+                        help="首次 /health 响应中位数上限，0表示不检查")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    start_mock_server(MockDeepSeek(), port=args.mock_port)
+
+    imports, responses = [], []
+    for _ in range(args.runs):
+        imports.append(_import_profile(tempfile.mkdtemp(prefix="startup_import_")))
+        responses.append(_first_response(tempfile.mkdtemp(prefix="startup_serve_"), args.port, args.mock_port))
+
+    report = {
+        "runs": args.runs,
+        "import_ms": round(statistics.median(run["total_ms"] for run in imports), 1),
+        "first_health_ms": round(statistics.median(run["first_health_ms"] for run in responses), 1),
+        "first_translate_ms": round(statistics.median(run["first_translate_ms"] for run in responses), 1),
+        "slowest_self_ms": imports[-1]["slowest_self_ms"],
+        "files_created_on_import": sorted({name for run in imports for name in run["created_files"]})
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"导入main={report['import_ms']}ms  首次/health={report['first_health_ms']}ms  "
+              f"首次/translate={report['first_translate_ms']}ms  (中位数, {args.runs}次)")
+        print("自身耗时最多的模块: " + ", ".join(f"{name}={ms}ms" for name, ms in report["slowest_self_ms"].items()))
+        print(f"导入时创建的文件: {report['files_created_on_import'] or '无'}")
+
+    failures = []
+    if report["files_created_on_import"]:
+        failures.append("导入时不应创建文件")
+    if args.max_import_ms and report["import_ms"] > args.max_import_ms:
+        failures.append(f"导入耗时 {report['import_ms']}ms 超过 {args.max_import_ms}ms")
+    if args.max_first_response_ms and report["first_health_ms"] > args.max_first_response_ms:
+        failures.append(f"首次响应 {report['first_health_ms']}ms 超过 {args.max_first_response_ms}ms")
+    if failures:
+        print("；".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
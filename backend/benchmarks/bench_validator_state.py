@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+验证器状态后端基准测试
+  - 单次检查耗时：memory 与 sqlite（WAL共享文件）对比
+  - 多进程精确性：N个进程同时对同一IP请求，sqlite后端放行的总数应等于每分钟上限
+    加上拿不到写锁而放行（fail open）的次数
+
+运行: cd backend && python -m benchmarks.bench_validator_state --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from validator_state import create_validator_state
+
+LIMITS = {"per_minute": 20, "per_hour": 200, "max_clients": 100000, "idle_ttl": 3600}
+
+
+def _per_check_us(state, hits: int, ips: int) -> float:
+    started = time.perf_counter()
+    for i in range(hits):
+        state.hit(f"10.0.{i % ips >> 8 & 255}.{i % ips & 255}")
+    return (time.perf_counter() - started) / hits * 1e6
+
+
+def _worker(path: str, attempts: int, start, results):
+    state = create_validator_state("sqlite", path, **LIMITS)
+    start.wait()
+    allowed = sum(1 for _ in range(attempts) if state.hit("203.0.113.7")[0])
+    results.put((allowed, state.fail_open))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="验证器状态后端基准测试")
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--ips", type=int, default=5000, help="不同IP数（每IP请求数低于上限）")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=50, help="每个进程对同一IP的请求数")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="validator_state_")
+    for backend in ("memory", "sqlite"):
+        state = create_validator_state(backend, os.path.join(directory, "speed.db"), **LIMITS)
+        print(f"{backend:<7} 单次检查={_per_check_us(state, args.hits, args.ips):.1f}µs")
+
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Event(), context.Queue()
+    path = os.path.join(directory, "shared.db")
+    create_validator_state("sqlite", path, **LIMITS)
+    processes = [context.Process(target=_worker, args=(path, args.attempts, start, results))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)
+    start.set()
+    outcomes = [results.get() for _ in processes]
+    allowed = sum(allowed for allowed, _ in outcomes)
+    fail_open = sum(fail_open for _, fail_open in outcomes)
+    for process in processes:
+        process.join()
+    print(f"{args.workers}个进程共请求{args.workers * args.attempts}次，放行={allowed}（每分钟上限{LIMITS['per_minute']}，"
+          f"其中未拿到写锁直接放行={fail_open}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+端到端负载测试（完全离线）
+在后台线程启动模拟DeepSeek服务和本服务（上游指向模拟服务，数据库放在临时目录），
+按Zipf分布的词条热度、可配置的预热比例和大量客户端IP驱动 /translate，输出：
+  - 延迟 p50/p95/p99、吞吐（req/s）、缓存命中/上游调用/错误数
+  - 服务端事件循环延迟
+  - SQLite写入竞争：写队列深度、写操作失败数、写回批次、WAL大小
+
+客户端IP通过 X-Forwarded-For 头发送，每个模拟客户端一个地址。
+
+运行: cd backend && python -m benchmarks.load_test --requests 5000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.mock_deepseek import MockDeepSeek, mock_translation, start_mock_server
+
+CORPUS = Path(__file__).parent / "data" / "cjk_corpus.txt"
+
+
+def _vocabulary(size: int) -> list:
+    """语料库词条 + 合成术语，组成指定大小的词表（按热度排序）"""
+    words = [line.strip() for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    words += [f"专业术语{i}" for i in range(max(0, size - len(words)))]
+    return words[:size]
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class _LagMonitor:
+    """在服务端事件循环中周期性睡眠，记录唤醒延迟"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(loop.time() - start - self.interval)
+
+
+class _ContentionSampler(threading.Thread):
+    """后台线程定时采样写队列深度"""
+
+    def __init__(self, adb, interval: float = 0.01):
+        super().__init__(name="contention-sampler", daemon=True)
+        self.adb = adb
+        self.interval = interval
+        self.depths = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.depths.append(self.adb.stats()["write_queue_depth"])
+
+
+async def _drive(base_url: str, texts: list, ips: list, concurrency: int) -> dict:
+    latencies, outcomes = [], {"glossary": 0, "cache": 0, "upstream": 0, "error": 0}
+    queue = iter(range(len(texts)))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            for index in queue:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/translate", json={"text": texts[index]},
+                        headers={"X-Forwarded-For": ips[index], "User-Agent": "Mozilla/5.0 load-test"})
+                    body = response.json()
+                except (httpx.HTTPError, json.JSONDecodeError):
+                    body = {"error": "transport"}
+                latencies.append(time.perf_counter() - started)
+
+                data = body.get("data") or {}
+                if "error" in body or response.status_code != 200:
+                    outcomes["error"] += 1
+                elif data.get("from_glossary"):
+                    outcomes["glossary"] += 1
+                elif data.get("from_cache"):
+                    outcomes["cache"] += 1
+                else:
+                    outcomes["upstream"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {"elapsed": elapsed, "latencies": latencies, "outcomes": outcomes}
+
+
+def _client_process(base_url: str, texts: list, ips: list, concurrency: int, pipe):
+    """压测客户端在独立进程中运行，避免与服务端争用GIL而放大延迟"""
+    pipe.send(asyncio.run(_drive(base_url, texts, ips, concurrency)))
+    pipe.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端负载测试（离线）")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="不同词条数")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf分布指数，越大热点越集中")
+    parser.add_argument("--warm", type=float, default=0.2, help="测试前预热缓存的热门词条比例")
+    parser.add_argument("--clients", type=int, default=1000, help="模拟客户端IP数")
+    parser.add_argument("--upstream-latency", type=float, default=0.3)
+    parser.add_argument("--upstream-jitter", type=float, default=0.1)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-port", type=int, default=18765)
+    parser.add_argument("--port", type=int, default=18766)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果，便于对比不同版本")
+    args = parser.parse_args()
+
+    # 服务使用临时目录中的新数据库，上游指向模拟服务
+    os.chdir(tempfile.mkdtemp(prefix="load_test_"))
+    os.environ["DEEPSEEK_API_URL"] = f"http://127.0.0.1:{args.mock_port}/v1/chat/completions"
+    os.environ.setdefault("DEEPSEEK_API_KEY", "mock")
+
+    mock = MockDeepSeek(latency=args.upstream_latency, jitter=args.upstream_jitter,
+                        error_rate=args.upstream_error_rate, seed=args.seed)
+    mock_server = start_mock_server(mock, port=args.mock_port)
+
+    import main as service
+    from async_db import adb
+    from database import db
+
+    rng = random.Random(args.seed)
+    vocabulary = _vocabulary(args.vocabulary)
+    weights = [1 / rank ** args.zipf for rank in range(1, len(vocabulary) + 1)]
+    texts = rng.choices(vocabulary, weights=weights, k=args.requests)
+    ips = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}" for _ in range(args.clients)]
+    request_ips = [rng.choice(ips) for _ in range(args.requests)]
+
+    warm = vocabulary[:int(len(vocabulary) * args.warm)]
+    db.save_translations([(text, mock_translation(text)) for text in warm])
+
+    lag = _LagMonitor()
+    service.app.add_event_handler("startup", lag.start)
+    server = start_mock_server(service.app, port=args.port)
+    sampler = _ContentionSampler(adb)
+    sampler.start()
+
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    client = context.Process(target=_client_process, args=(
+        f"http://127.0.0.1:{args.port}", texts, request_ips, args.concurrency, sender))
+    client.start()
+    result = receiver.recv()
+    client.join()
+
+    sampler.stopped.set()
+    sampler.join()
+    server.should_exit = True
+    mock_server.should_exit = True
+    time.sleep(0.5)
+
+    latencies, lag_samples = result["latencies"], sorted(lag.samples)
+    summary = db.get_cache_summary()
+    data_access = adb.stats()
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(result["elapsed"], 3),
+        "rps": round(args.requests / result["elapsed"], 1),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "outcomes": result["outcomes"],
+        "upstream": mock.stats(),
+        "event_loop_lag_ms": {
+            "mean": round(statistics.mean(lag_samples) * 1000, 3) if lag_samples else 0.0,
+            "p99": round(_percentile(lag_samples, 0.99) * 1000, 3),
+            "max": round(lag_samples[-1] * 1000, 3) if lag_samples else 0.0,
+        },
+        "sqlite": {
+            "write_queue_depth_mean": round(statistics.mean(sampler.depths), 2) if sampler.depths else 0.0,
+            "write_queue_depth_max": max(sampler.depths, default=0),
+            "writes": data_access["writes"],
+            "write_errors": data_access["write_errors"],
+            "write_behind_flushes": data_access["write_behind"]["flushes"],
+            "wal_size_bytes": summary["wal_size_bytes"],
+        },
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    outcomes = report["outcomes"]
+    print(f"请求数={args.requests} 并发={args.concurrency} 词条数={len(vocabulary)} "
+          f"Zipf={args.zipf} 预热={args.warm:.0%} 客户端IP={args.clients}")
+    print(f"上游延迟={args.upstream_latency}s±{args.upstream_jitter}s 错误率={args.upstream_error_rate:.1%}")
+    print(f"吞吐={report['rps']} req/s  总耗时={report['elapsed_s']}s")
+    print("延迟 p50={p50}ms  p95={p95}ms  p99={p99}ms  max={max}ms".format(**report["latency_ms"]))
+    print(f"结果: 缓存命中={outcomes['cache']} 词表={outcomes['glossary']} "
+          f"上游翻译={outcomes['upstream']} 错误={outcomes['error']}  上游调用={report['upstream']['requests']}")
+    print("事件循环延迟 mean={mean}ms  p99={p99}ms  max={max}ms".format(**report["event_loop_lag_ms"]))
+    sqlite = report["sqlite"]
+    print(f"SQLite 写队列深度 mean={sqlite['write_queue_depth_mean']} max={sqlite['write_queue_depth_max']}  "
+          f"写操作={sqlite['writes']} 失败={sqlite['write_errors']} "
+          f"写回批次={sqlite['write_behind_flushes']} WAL={sqlite['wal_size_bytes']}B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+本地DeepSeek模拟服务 - 兼容 chat/completions 接口
+用于离线基准测试，不产生真实API调用
+
+支持：固定延迟 + 随机抖动、按比例返回错误（500/429）、stream=true 时的SSE分块输出、
+按编号返回的批量结果。翻译结果回显原文，不同文本得到不同的缓存内容。
+
+运行: cd backend && python -m benchmarks.mock_deepseek --latency 0.5 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+
+import uvicorn
+
+MOCK_TRANSLATION = {
+    "detected_language": "中文",
+    "translation_direction": "中→日",
+    "word_category": "通用词汇",
+    "translations": [{
+        "original": "你好",
+        "target": "こんにちは",
+        "reading": {"hiragana": "こんにちは"},
+        "meaning": "问候语",
+        "examples": [{"sentence": "こんにちは、田中さん。", "translation": "你好，田中先生。"}]
+    }]
+}
+
+# 单条提示词 "文本：xxx"，批量提示词 "1. \"xxx\""
+_SINGLE_TEXT = re.compile(r"文本：(.+)")
+_BATCH_ITEM = re.compile(r'^(\d+)\. (".*")$', re.MULTILINE)
+
+
+def mock_translation(text: str) -> dict:
+    result = json.loads(json.dumps(MOCK_TRANSLATION, ensure_ascii=False))
+    result["translations"][0]["original"] = text
+    result["translations"][0]["target"] = f"{text}（訳）"
+    return result
+
+
+def _completion_content(prompt: str) -> str:
+    """按提示词类型构造模型输出"""
+    items = _BATCH_ITEM.findall(prompt)
+    if items:
+        results = [{"id": int(index), **mock_translation(json.loads(text))} for index, text in items]
+        return json.dumps({"results": results}, ensure_ascii=False)
+    match = _SINGLE_TEXT.search(prompt)
+    return json.dumps(mock_translation(match.group(1).strip() if match else "你好"), ensure_ascii=False)
+
+
+class MockDeepSeek:
+    """最小ASGI应用，按配置延迟返回翻译结果"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 stream_chunk_size: int = 16, stream_chunk_delay: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_chunk_delay = stream_chunk_delay
+        self._random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.stream_count = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        # 读完请求体
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        self.request_count += 1
+        delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.error_count += 1
+            status = self._random.choice([429, 500])
+            await self._send_json(send, status, {"error": {"message": "mock upstream error", "code": status}})
+            return
+
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            payload = {}
+        messages = payload.get("messages") or [{}]
+        content = _completion_content(messages[-1].get("content", ""))
+        usage = {"prompt_tokens": len(messages[-1].get("content", "")), "completion_tokens": len(content)}
+
+        if payload.get("stream"):
+            self.stream_count += 1
+            include_usage = (payload.get("stream_options") or {}).get("include_usage")
+            await self._send_stream(send, content, usage if include_usage else None)
+            return
+
+        await self._send_json(send, 200, {
+            "id": "mock",
+            "object": "chat.completion",
+            "model": "deepseek-chat",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    @staticmethod
+    async def _send_json(send, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_stream(self, send, content: str, usage: dict = None):
+        """按 stream_chunk_size 个字符一块，以SSE格式逐块发送；请求了用量时最后附加一个空choices块"""
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        })
+        for start in range(0, len(content), self.stream_chunk_size):
+            chunk = {
+                "id": "mock",
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": content[start:start + self.stream_chunk_size]}}]
+            }
+            line = f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await send({"type": "http.response.body", "body": line.encode("utf-8"), "more_body": True})
+            if self.stream_chunk_delay:
+                await asyncio.sleep(self.stream_chunk_delay)
+        if usage:
+            chunk = {"id": "mock", "object": "chat.completion.chunk", "choices": [], "usage": usage}
+            line = f"data: {json.dumps(chunk)}\n\n"
+            await send({"type": "http.response.body", "body": line.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+
+    def stats(self) -> dict:
+        return {"requests": self.request_count, "errors": self.error_count, "streams": self.stream_count}
+
+
+def start_mock_server(app, host: str = "127.0.0.1", port: int = 18765) -> uvicorn.Server:
+    """在后台线程启动模拟服务，返回可用于停止的Server对象"""
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地DeepSeek模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--latency", type=float, default=0.0, help="每次调用的基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟随机抖动范围（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回429/500的比例")
+    parser.add_argument("--stream-chunk-size", type=int, default=16)
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = MockDeepSeek(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                       stream_chunk_size=args.stream_chunk_size, stream_chunk_delay=args.stream_chunk_delay)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
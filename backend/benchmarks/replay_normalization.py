@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+缓存键规范化离线回放
+把请求日志按顺序回放到一个无限容量的缓存中，对比旧缓存键（strip + lower）
+与当前 text_normalization 配置的命中率
+
+日志格式：每行一条请求原文，或 JSON 行（取 "text" 字段）
+未指定 --log 时，用语料库按 Zipf 分布生成带常见写法差异的模拟请求
+
+运行: cd backend && python -m benchmarks.replay_normalization [--log requests.log]
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Iterable, List
+
+from config import settings
+from normalization import TextNormalizer, legacy_normalizer
+
+CORPUS = Path(__file__).parent / "data" / "cjk_corpus.txt"
+
+_FULLWIDTH = str.maketrans({chr(c): chr(c + 0xFEE0) for c in range(0x21, 0x7F)})
+_HALFWIDTH_KATAKANA = str.maketrans({"カ": "ｶ", "タ": "ﾀ", "ナ": "ﾅ", "ア": "ｱ", "ル": "ﾙ", "バ": "ﾊﾞ",
+                                     "イ": "ｲ", "ト": "ﾄ", "ン": "ﾝ", "ス": "ｽ", "ー": "ｰ"})
+
+
+def _variant(text: str, rng: random.Random) -> str:
+    """模拟用户输入的常见差异：句末标点、多余空格、全角/半角"""
+    roll = rng.random()
+    if roll < 0.5:
+        return text
+    if roll < 0.65:
+        return text + rng.choice(["。", "？", "！", "?", "!", "."])
+    if roll < 0.75:
+        return f"  {text} "
+    if roll < 0.85:
+        middle = len(text) // 2
+        return f"{text[:middle]} {text[middle:]}"
+    if roll < 0.95:
+        return text.translate(_HALFWIDTH_KATAKANA)
+    return text.translate(_FULLWIDTH)
+
+
+def synthetic_log(requests: int, seed: int = 42) -> List[str]:
+    phrases = [line.strip() for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    phrases += ["Tokyo Station", "JR Pass", "SIM card", "My Number"]
+    weights = [1 / rank for rank in range(1, len(phrases) + 1)]
+    rng = random.Random(seed)
+    return [_variant(text, rng) for text in rng.choices(phrases, weights=weights, k=requests)]
+
+
+def read_log(path: str) -> List[str]:
+    texts = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        if line.lstrip().startswith("{"):
+            texts.append(json.loads(line).get("text", ""))
+        else:
+            texts.append(line)
+    return texts
+
+
+def replay(texts: Iterable[str], normalizer: TextNormalizer) -> dict:
+    seen = set()
+    hits = requests = 0
+    for text in texts:
+        key = normalizer(text)
+        requests += 1
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+    return {"requests": requests, "unique_keys": len(seen), "hits": hits,
+            "hit_rate": hits / requests if requests else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存键规范化离线回放")
+    parser.add_argument("--log", help="请求日志文件")
+    parser.add_argument("--requests", type=int, default=20000, help="模拟请求数（未指定日志时）")
+    args = parser.parse_args()
+
+    texts = read_log(args.log) if args.log else synthetic_log(args.requests)
+    legacy = replay(texts, legacy_normalizer)
+    current = replay(texts, TextNormalizer(settings.text_normalization))
+
+    print(f"回放 {legacy['requests']} 条请求（{'日志 ' + args.log if args.log else '模拟数据'}）")
+    print(f"规范化步骤: {', '.join(settings.text_normalization)}")
+    print(f"{'':<10}{'不同缓存键':>12}{'命中率':>10}{'上游调用':>10}")
+    for name, result in (("旧缓存键", legacy), ("规范化", current)):
+        print(f"{name:<10}{result['unique_keys']:>12}{result['hit_rate']:>10.1%}{result['unique_keys']:>10}")
+    saved = legacy['unique_keys'] - current['unique_keys']
+    print(f"命中率提升 {(current['hit_rate'] - legacy['hit_rate']) * 100:.1f} 个百分点，"
+          f"减少上游调用 {saved} 次（{saved / legacy['unique_keys']:.1%}）")
+
+
+if __name__ == "__main__":
+    main()
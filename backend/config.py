@@ -1,15 +1,101 @@
 from pydantic_settings import BaseSettings
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import Dict, List
 
 class Settings(BaseSettings):
-    deepseek_api_key: str = os.getenv("DEEPSEEK_API_KEY", "")
+    # 由 BaseSettings 从环境变量或 .env 读取（DEEPSEEK_API_KEY）
+    deepseek_api_key: str = ""
     deepseek_api_url: str = "https://api.deepseek.com/v1/chat/completions"
     max_text_length: int = 500
+
+    # 缓存键规范化步骤（按顺序执行）：nfkc | lower | whitespace | trailing_punctuation
+    # 修改后需运行 python maintenance.py rehash 合并已有缓存
+    text_normalization: List[str] = ["nfkc", "lower", "whitespace", "trailing_punctuation"]
+
+    # 上游并发限制、熔断与重试
+    upstream_max_concurrency: int = 16       # 同时在途的上游请求数
+    upstream_max_queue: int = 64             # 等待槽位的最大请求数，超出立即失败
+    upstream_queue_timeout: float = 5.0      # 秒，排队超过该时间放弃
+    upstream_failure_threshold: int = 5      # 连续失败多少次后熔断
+    upstream_recovery_timeout: float = 30.0  # 秒，熔断后多久放行探测请求
+    upstream_retry_attempts: int = 2         # 仅对连接失败和 429/502/503/504 重试
+    upstream_retry_base_delay: float = 0.2   # 秒，指数退避基数（全抖动）
+    upstream_retry_max_delay: float = 2.0
+
+    # 指标采集（/metrics）
+    metrics_enabled: bool = True
+
+    # 离线词表（CSV/TSV，列: zh,ja,reading,category,meaning），空字符串表示不启用
+    glossary_path: str = ""
+
+    # 上游HTTP客户端（连接池与超时）
+    http2_enabled: bool = False              # 需要安装 h2 包
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 30.0
+    http_write_timeout: float = 10.0
+    http_pool_timeout: float = 5.0
+
+    # 前端静态资源
+    assets_dev_mode: bool = False            # 每次请求检查文件修改时间，变化后重新加载
+    assets_max_age: int = 31536000           # 带指纹资源的缓存时间（秒）
+
+    # 限流与黑名单状态：memory（默认，每次检查约3µs）仅限单worker；
+    # 多worker时用 sqlite 共享同一个文件（约30µs，拿不到写锁时放行）
+    validator_state_backend: str = "memory"  # memory | sqlite
+    validator_state_path: str = "validator_state.db"
+
+    # 进程内翻译缓存层
+    memory_cache_enabled: bool = True
+    memory_cache_policy: str = "lru"         # lru | lfu
+    memory_cache_max_entries: int = 10000    # 0表示不限制
+    memory_cache_max_bytes: int = 0          # 按序列化大小估算，0表示不限制
+    memory_cache_ttl: float = 3600           # 秒，0表示永不过期
+
+    # 只读缓存快照（maintenance.py export 导出），SQLite未命中时回退查询；空表示不使用
+    cache_snapshot_path: str = ""
+
+    # 单条翻译的输出上限：基数 + 每个输入字符的配额，不超过上限
+    completion_base_tokens: int = 300
+    completion_tokens_per_char: int = 8
+    completion_max_tokens: int = 1000
+
+    # 分句翻译
+    segment_max_concurrency: int = 4         # 同一段落并发翻译的句子数
+
+    # 批量翻译
+    batch_max_items: int = 500               # 单次请求最多条数
+    batch_max_items_per_prompt: int = 20     # 每次上游调用最多打包条数
+    batch_max_chars_per_prompt: int = 2000   # 每次上游调用最多字符数
+    batch_max_concurrency: int = 4           # 同一批次并发上游调用数
+    batch_tokens_per_item: int = 400
+    batch_max_tokens: int = 8000
+
+    # 异步数据访问层
+    db_reader_threads: int = 4
+
+    # 命中次数与每日统计的批量写回
+    write_behind_flush_interval: float = 5.0  # 秒
+    write_behind_max_pending: int = 1000      # 累计事件数达到阈值时立即写回
+
+    # SQLite连接与PRAGMA
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"       # WAL模式下NORMAL可避免每次提交都fsync
+    sqlite_cache_size: int = -16000          # 负数表示KiB，约16MB页缓存
+    sqlite_mmap_size: int = 134217728        # 128MB内存映射读
+    sqlite_busy_timeout: int = 5000          # 毫秒
+    sqlite_statement_cache_size: int = 256   # 每个连接缓存的预编译语句数
+
+    # 磁盘缓存容量与后台整理
+    cache_max_rows: int = 0                  # 0表示不限制
+    cache_max_bytes: int = 0                 # 数据库已用空间上限，0表示不限制
+    cache_category_ttl: Dict[str, float] = {}  # 按词性设置闲置过期时间（秒），如 {"句子": 604800}
+    cache_compaction_interval: float = 300   # 秒，0表示关闭后台整理
+    cache_eviction_batch: int = 500          # 每个事务最多删除的行数
+    cache_vacuum_pages: int = 1000           # 每次增量回收的最大页数
     
     class Config:
         env_file = ".env"
 
-settings = Settings() 
\ No newline at end of file
+settings = Settings() 
@@ -4,21 +4,138 @@
 支持翻译缓存、历史查询、统计分析
 """
 import sqlite3
+import base64
+import binascii
 import json
 import hashlib
+import threading
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
+from config import settings
+from lazy import LazyInstance, module_getattr
+from memory_cache import MemoryCache
+from normalization import TextNormalizer
+from snapshot import open_snapshot, write_snapshot
+from write_behind import WriteBehindBuffer, STAT_FIELDS
+
+
+def _encode_cursor(*values) -> str:
+    """keyset分页游标：排序键的值，对客户端不透明"""
+    raw = json.dumps(values, ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise ValueError("无效的分页游标") from None
+    if not isinstance(values, list) or len(values) != size or \
+            not all(isinstance(value, (str, int)) for value in values):
+        raise ValueError("无效的分页游标")
+    return values
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _count_memory_hit(entry: Dict[str, Any]) -> tuple:
+    # 在缓存锁内执行，并发命中不会丢失计数
+    entry['hit_count'] += 1
+    return entry['result'], entry['hit_count']
+
+
 class TranslationDatabase:
     def __init__(self, db_path: str = "translation_cache.db"):
         """初始化数据库连接"""
         self.db_path = Path(db_path)
+        # 计算缓存键前的文本规范化
+        self.normalizer = TextNormalizer(settings.text_normalization)
+        
+        # 进程内缓存层：保存解析后的结果，热点词无需访问磁盘
+        self.memory_cache = None
+        if settings.memory_cache_enabled:
+            self.memory_cache = MemoryCache(
+                max_entries=settings.memory_cache_max_entries,
+                max_bytes=settings.memory_cache_max_bytes,
+                ttl=settings.memory_cache_ttl,
+                policy=settings.memory_cache_policy
+            )
+        
+        # 只读缓存快照：SQLite未命中时回退查询，新节点无需等待缓存重新积累
+        self.snapshot = None
+        if settings.cache_snapshot_path:
+            self.snapshot = open_snapshot(settings.cache_snapshot_path, self.normalizer.steps)
+        # 只存在于快照中的缓存键：本地没有对应行，命中次数无处写回，不计入写回缓冲区
+        self._snapshot_only = set()
+        
+        # 命中次数和每日统计先在内存中累积，批量写回磁盘
+        self.write_buffer = WriteBehindBuffer(max_pending=settings.write_behind_max_pending)
+        # 写回之间互斥；统计查询不持有该锁，"磁盘 + 未写回增量"的一致性见 _read_with_pending
+        self._flush_lock = threading.RLock()
+        
+        # 容量淘汰与后台整理的统计
+        self.eviction_stats = {
+            "ttl_evictions": 0,
+            "budget_evictions": 0,
+            "compaction_runs": 0,
+            "vacuumed_pages": 0,
+            "last_compaction": None
+        }
+        
+        # 每个线程复用一个连接，避免反复打开数据库
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
         self.init_database()
     
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的持久连接（首次使用时创建并设置PRAGMA）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=settings.sqlite_busy_timeout / 1000,
+                cached_statements=settings.sqlite_statement_cache_size,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}")
+            conn.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+            conn.execute(f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}")
+            conn.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                print(f"关闭数据库连接失败: {e}")
+        self._local = threading.local()
+    
     def init_database(self):
         """初始化数据库表结构"""
-        with sqlite3.connect(self.db_path) as conn:
+        conn = self._get_connection()
+        # 增量回收：删除行后释放的页可以分批归还给文件系统（只对新建数据库直接生效）
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL模式：读写互不阻塞（设置会持久化到数据库文件）
+        conn.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+        
+        with conn:
+            # 建表和迁移在同一个写事务中执行：多个worker同时冷启动时依次进行，
+            # 后拿到锁的进程在事务内读到已更新的 user_version，不会重复迁移
+            conn.execute("BEGIN IMMEDIATE")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS translation_cache (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,7 +149,9 @@ class TranslationDatabase:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     hit_count INTEGER DEFAULT 1,
                     user_ip TEXT,
-                    user_agent TEXT
+                    user_agent TEXT,
+                    primary_target TEXT NOT NULL DEFAULT '',
+                    primary_reading TEXT NOT NULL DEFAULT ''
                 )
             """)
             
@@ -55,17 +174,310 @@ class TranslationDatabase:
             conn.execute("CREATE INDEX IF NOT EXISTS idx_source_lang ON translation_cache(source_lang)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_category ON translation_cache(word_category)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON translation_cache(created_at)")
+            
+            # 汇总计数表：由触发器增量维护，统计接口无需扫描缓存表
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_summary (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (kind, key)
+                ) WITHOUT ROWID
+            """)
+            for trigger in self._SUMMARY_TRIGGERS:
+                conn.execute(trigger)
+            
+            # 翻译结果的规范化存储：每条译文一行，例句单独成表
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translation_items (
+                    cache_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    original TEXT,
+                    target TEXT,
+                    hiragana TEXT,
+                    meaning TEXT,
+                    PRIMARY KEY (cache_id, position)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translation_examples (
+                    cache_id INTEGER NOT NULL,
+                    item_position INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    sentence TEXT,
+                    translation TEXT,
+                    PRIMARY KEY (cache_id, item_position, position)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_items_delete AFTER DELETE ON translation_cache
+                BEGIN
+                    DELETE FROM translation_items WHERE cache_id = OLD.id;
+                    DELETE FROM translation_examples WHERE cache_id = OLD.id;
+                END
+            """)
+            
+            self._migrate(conn)
+            
+            # 全文检索：trigram分词适合不分词的中日文，由触发器随缓存表同步
+            self.search_enabled = self._create_search_index(conn)
+            
+            # 列表与热门排序的索引只含排序键：每次写回命中次数都会改写这两列，
+            # 索引越宽写回越慢；每页几十行按 rowid 回表读取窄列即可
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_listing ON translation_cache(updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_popular ON translation_cache(hit_count, updated_at)")
+            # 原文前缀搜索的范围扫描
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_source_text ON translation_cache(source_text)")
+        
+        # 已有数据库需要一次完整 VACUUM 才能切换到增量回收模式；大库耗时很长，启动时不执行
+        if settings.cache_compaction_interval > 0 and \
+                conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            print("数据库尚未启用增量回收，删除行后的空间不会归还；"
+                  "请在服务停止时运行 python maintenance.py compact 完成一次性转换")
+    
+    # 数据库结构版本（PRAGMA user_version）
+    SCHEMA_VERSION = 4
+    
+    def _migrate(self, conn):
+        """按 user_version 依次执行尚未执行的迁移（调用方已持有写锁，版本号在事务内读取）"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._rebuild_summary(conn)
+        if version < 2:
+            self._migrate_columnar(conn)
+        if version < 3:
+            self._rehash(conn)
+        if version < 4:
+            # 旧版的宽覆盖索引，随后按新定义重建
+            conn.execute("DROP INDEX IF EXISTS idx_listing")
+            conn.execute("DROP INDEX IF EXISTS idx_popular")
+        if version < self.SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+    
+    _SUMMARY_UPSERT = "ON CONFLICT(kind, key) DO UPDATE SET value = value + excluded.value"
+    
+    _SUMMARY_TRIGGERS = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_summary_insert AFTER INSERT ON translation_cache
+        BEGIN
+            INSERT INTO cache_summary (kind, key, value) VALUES
+                ('total', 'entries', 1), ('total', 'hits', NEW.hit_count),
+                ('lang', NEW.source_lang, 1), ('category', NEW.word_category, 1)
+            {_SUMMARY_UPSERT};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_summary_delete AFTER DELETE ON translation_cache
+        BEGIN
+            INSERT INTO cache_summary (kind, key, value) VALUES
+                ('total', 'entries', -1), ('total', 'hits', -OLD.hit_count),
+                ('lang', OLD.source_lang, -1), ('category', OLD.word_category, -1)
+            {_SUMMARY_UPSERT};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_summary_hits AFTER UPDATE OF hit_count ON translation_cache
+        WHEN NEW.hit_count != OLD.hit_count
+        BEGIN
+            INSERT INTO cache_summary (kind, key, value) VALUES
+                ('total', 'hits', NEW.hit_count - OLD.hit_count)
+            {_SUMMARY_UPSERT};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_summary_labels AFTER UPDATE OF source_lang, word_category ON translation_cache
+        WHEN NEW.source_lang != OLD.source_lang OR NEW.word_category != OLD.word_category
+        BEGIN
+            INSERT INTO cache_summary (kind, key, value) VALUES
+                ('lang', OLD.source_lang, -1), ('lang', NEW.source_lang, 1),
+                ('category', OLD.word_category, -1), ('category', NEW.word_category, 1)
+            {_SUMMARY_UPSERT};
+        END
+        """,
+    ]
+    
+    _SEARCH_TRIGGERS = [
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_search_insert AFTER INSERT ON translation_cache
+        BEGIN
+            INSERT INTO translation_search (rowid, source_text, primary_target, primary_reading)
+            VALUES (NEW.id, NEW.source_text, NEW.primary_target, NEW.primary_reading);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_search_delete AFTER DELETE ON translation_cache
+        BEGIN
+            INSERT INTO translation_search (translation_search, rowid, source_text, primary_target, primary_reading)
+            VALUES ('delete', OLD.id, OLD.source_text, OLD.primary_target, OLD.primary_reading);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_search_update AFTER UPDATE OF source_text, primary_target, primary_reading
+        ON translation_cache
+        WHEN NEW.source_text != OLD.source_text OR NEW.primary_target != OLD.primary_target
+             OR NEW.primary_reading != OLD.primary_reading
+        BEGIN
+            INSERT INTO translation_search (translation_search, rowid, source_text, primary_target, primary_reading)
+            VALUES ('delete', OLD.id, OLD.source_text, OLD.primary_target, OLD.primary_reading);
+            INSERT INTO translation_search (rowid, source_text, primary_target, primary_reading)
+            VALUES (NEW.id, NEW.source_text, NEW.primary_target, NEW.primary_reading);
+        END
+        """,
+    ]
+    
+    def _create_search_index(self, conn) -> bool:
+        """创建FTS5 trigram索引（外部内容表，只存索引）；首次创建时从缓存表重建"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'translation_search'"
+        ).fetchone()
+        if not exists:
+            try:
+                conn.execute("""
+                    CREATE VIRTUAL TABLE translation_search USING fts5(
+                        source_text, primary_target, primary_reading,
+                        content='translation_cache', content_rowid='id', tokenize='trigram')
+                """)
+            except sqlite3.OperationalError as e:
+                print(f"全文检索不可用（需要SQLite 3.34+并启用FTS5），搜索将使用LIKE扫描: {e}")
+                return False
+        for trigger in self._SEARCH_TRIGGERS:
+            conn.execute(trigger)
+        if not exists:
+            conn.execute("INSERT INTO translation_search (translation_search) VALUES ('rebuild')")
+        return True
+    
+    def _rebuild_summary(self, conn):
+        """从缓存表重新计算汇总计数（迁移已有数据库时执行一次）"""
+        conn.execute("DELETE FROM cache_summary")
+        conn.execute("""
+            INSERT INTO cache_summary (kind, key, value)
+            SELECT 'total', 'entries', COUNT(*) FROM translation_cache
+            UNION ALL SELECT 'total', 'hits', COALESCE(SUM(hit_count), 0) FROM translation_cache
+        """)
+        conn.execute("""
+            INSERT INTO cache_summary (kind, key, value)
+            SELECT 'lang', source_lang, COUNT(*) FROM translation_cache GROUP BY source_lang
+        """)
+        conn.execute("""
+            INSERT INTO cache_summary (kind, key, value)
+            SELECT 'category', word_category, COUNT(*) FROM translation_cache GROUP BY word_category
+        """)
+    
+    def _migrate_columnar(self, conn, batch_size: int = 1000):
+        """为旧数据库补充窄列，并把JSON结果拆分到规范化表"""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(translation_cache)")}
+        for column in ('primary_target', 'primary_reading'):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE translation_cache ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+        
+        last_id = 0
+        while True:
+            rows = conn.execute("""
+                SELECT id, translation_result FROM translation_cache 
+                WHERE id > ? ORDER BY id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    result = json.loads(row['translation_result'])
+                except (TypeError, json.JSONDecodeError):
+                    result = {}
+                self._write_items(conn, row['id'], result)
+            last_id = rows[-1]['id']
+    
+    @staticmethod
+    def _primary_fields(result: Dict[str, Any]) -> tuple:
+        """提取列表查询需要的第一条译文和读音"""
+        translations = result.get('translations') or [{}]
+        first = translations[0] if isinstance(translations[0], dict) else {}
+        reading = first.get('reading') or {}
+        hiragana = reading.get('hiragana', '') if isinstance(reading, dict) else reading
+        return str(first.get('target', '') or ''), str(hiragana or '')
+    
+    def _write_items(self, conn, cache_id: int, result: Dict[str, Any], update_primary: bool = True):
+        """写入一条缓存的窄列和规范化译文/例句（覆盖旧数据）；保存路径已在UPSERT中写入窄列"""
+        if update_primary:
+            primary_target, primary_reading = self._primary_fields(result)
+            conn.execute("""
+                UPDATE translation_cache SET primary_target = ?, primary_reading = ? WHERE id = ?
+            """, (primary_target, primary_reading, cache_id))
+        conn.execute("DELETE FROM translation_items WHERE cache_id = ?", (cache_id,))
+        conn.execute("DELETE FROM translation_examples WHERE cache_id = ?", (cache_id,))
+        
+        items, examples = [], []
+        for position, item in enumerate(result.get('translations') or []):
+            if not isinstance(item, dict):
+                continue
+            reading = item.get('reading') or {}
+            hiragana = reading.get('hiragana', '') if isinstance(reading, dict) else reading
+            items.append((cache_id, position, item.get('original'), item.get('target'),
+                          hiragana, item.get('meaning')))
+            for example_position, example in enumerate(item.get('examples') or []):
+                if isinstance(example, dict):
+                    examples.append((cache_id, position, example_position,
+                                     example.get('sentence'), example.get('translation')))
+        
+        conn.executemany("""
+            INSERT INTO translation_items (cache_id, position, original, target, hiragana, meaning)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, items)
+        conn.executemany("""
+            INSERT INTO translation_examples (cache_id, item_position, position, sentence, translation)
+            VALUES (?, ?, ?, ?, ?)
+        """, examples)
+    
+    def get_cache_summary(self) -> Dict[str, Any]:
+        """读取汇总计数（常数时间，包含尚未写回的命中次数）"""
+        def read(pending):
+            with self._get_connection() as conn:
+                return pending, conn.execute("SELECT kind, key, value FROM cache_summary WHERE value != 0").fetchall()
+        
+        pending, rows = self._read_with_pending(self.write_buffer.pending_hits_snapshot, read)
+        with self._get_connection() as conn:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        
+        summary = {"total_entries": 0, "total_hits": sum(count for count, _ in pending.values()), "by_language": {}, "by_category": {}}
+        for row in rows:
+            if row['kind'] == 'total':
+                summary[f"total_{row['key']}"] += row['value']
+            elif row['kind'] == 'lang':
+                summary['by_language'][row['key']] = row['value']
+            elif row['kind'] == 'category':
+                summary['by_category'][row['key']] = row['value']
+        
+        wal_path = Path(f"{self.db_path}-wal")
+        summary['db_size_bytes'] = page_size * page_count
+        summary['free_bytes'] = page_size * freelist_count
+        summary['wal_size_bytes'] = wal_path.stat().st_size if wal_path.exists() else 0
+        return summary
     
     def _generate_text_hash(self, text: str) -> str:
         """生成文本哈希值用于缓存查找"""
-        return hashlib.md5(text.strip().lower().encode('utf-8')).hexdigest()
+        return hashlib.md5(self.normalizer(text).encode('utf-8')).hexdigest()
     
     def get_cached_translation(self, text: str) -> Optional[Dict[str, Any]]:
         """获取缓存的翻译结果"""
+        cached = self.find_cached_translation(text)
+        if cached:
+            self.record_cache_hit(text)
+        return cached
+    
+    def find_cached_translation(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存的翻译结果（只读，不写磁盘）
+        返回的命中次数已包含本次命中，需配合 record_cache_hit 使用
+        """
         text_hash = self._generate_text_hash(text)
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        # 先查内存缓存层，命中时不访问磁盘
+        cached = self._find_in_memory(text_hash)
+        if cached is not None:
+            return cached
+        
+        with self._get_connection() as conn:
             cursor = conn.execute("""
                 SELECT * FROM translation_cache 
                 WHERE text_hash = ? 
@@ -75,197 +487,663 @@ class TranslationDatabase:
             
             row = cursor.fetchone()
             if row:
-                # 更新命中次数和时间
-                conn.execute("""
-                    UPDATE translation_cache 
-                    SET hit_count = hit_count + 1, updated_at = CURRENT_TIMESTAMP 
-                    WHERE id = ?
-                """, (row['id'],))
-                
-                # 解析翻译结果
-                translation_result = json.loads(row['translation_result'])
-                return {
-                    "from_cache": True,
-                    "cache_hit_count": row['hit_count'] + 1,
-                    **translation_result
-                }
-        return None
+                return self._cached_from_row(row)
+        return self._find_in_snapshot(text_hash)
+    
+    def find_cached_translations(self, texts: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量查询缓存（只读），返回 {text_hash: 结果}
+        未命中内存层的条目用一次 IN (...) 查询取回
+        """
+        found = {}
+        missing = []
+        seen = set()
+        for text in texts:
+            text_hash = self._generate_text_hash(text)
+            if text_hash in seen:
+                continue
+            seen.add(text_hash)
+            cached = self._find_in_memory(text_hash)
+            if cached is not None:
+                found[text_hash] = cached
+            else:
+                missing.append(text_hash)
+        
+        if missing:
+            with self._get_connection() as conn:
+                # SQLite 单条语句的参数个数有限，分块查询
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    for row in conn.execute(f"""
+                        SELECT * FROM translation_cache WHERE text_hash IN ({placeholders})
+                    """, chunk):
+                        found[row['text_hash']] = self._cached_from_row(row)
+        
+        for text_hash in missing:
+            if text_hash not in found:
+                cached = self._find_in_snapshot(text_hash)
+                if cached is not None:
+                    found[text_hash] = cached
+        
+        return found
+    
+    def _find_in_memory(self, text_hash: str) -> Optional[Dict[str, Any]]:
+        """查询内存缓存层"""
+        if self.memory_cache is None:
+            return None
+        cached = self.memory_cache.get(text_hash, update=_count_memory_hit)
+        if cached is None:
+            return None
+        result, hit_count = cached
+        return {
+            "from_cache": True,
+            "cache_hit_count": hit_count,
+            **result
+        }
+    
+    def _cached_from_row(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """解析数据库行并放入内存缓存层"""
+        text_hash = row['text_hash']
+        translation_result = json.loads(row['translation_result'])
+        hit_count = row['hit_count'] + 1 + self.write_buffer.pending_hits(text_hash)
+        
+        if self.memory_cache is not None:
+            self.memory_cache.set(
+                text_hash,
+                {"result": translation_result, "hit_count": hit_count},
+                size=len(row['translation_result'].encode('utf-8'))
+            )
+        
+        return {
+            "from_cache": True,
+            "cache_hit_count": hit_count,
+            **translation_result
+        }
+    
+    def _find_in_snapshot(self, text_hash: str) -> Optional[Dict[str, Any]]:
+        """查询只读快照，命中时放入内存缓存层（不写入SQLite）"""
+        if self.snapshot is None:
+            return None
+        entry = self.snapshot.get(text_hash)
+        if entry is None:
+            return None
+        translation_result, hit_count, size = entry
+        hit_count += 1
+        self._snapshot_only.add(text_hash)
+        
+        if self.memory_cache is not None:
+            self.memory_cache.set(
+                text_hash,
+                {"result": translation_result, "hit_count": hit_count},
+                size=size
+            )
+        
+        return {
+            "from_cache": True,
+            "cache_hit_count": hit_count,
+            **translation_result
+        }
+    
+    def export_snapshot(self, path: str, min_hits: int = 0, limit: int = 0) -> Dict[str, Any]:
+        """把缓存导出为只读快照文件，按命中次数从高到低取前 limit 条（0表示全部）"""
+        self.flush()
+        conn = self._get_connection()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM translation_cache WHERE hit_count >= ?", (min_hits,)
+        ).fetchone()[0]
+        if limit > 0:
+            count = min(count, limit)
+        rows = conn.execute("""
+            SELECT text_hash, translation_result, hit_count FROM translation_cache
+            WHERE hit_count >= ? ORDER BY hit_count DESC LIMIT ?
+        """, (min_hits, count))
+        return write_snapshot(path, rows, count, self.normalizer.steps)
+    
+    def _read_with_pending(self, snapshot, read):
+        """
+        不持有写回锁，读取"磁盘 + 未写回增量"：read(snapshot()) 期间有写回提交时重试，
+        以免提交前后的数据与增量重复或遗漏；连续冲突时才等待写回结束
+        """
+        for _ in range(3):
+            version = self.write_buffer.version
+            if version % 2 == 0:
+                result = read(snapshot())
+                if self.write_buffer.version == version:
+                    return result
+        with self._flush_lock:
+            return read(snapshot())
+    
+    def record_cache_hit(self, text: str):
+        """记录一次缓存命中（累积后批量更新命中次数和时间）"""
+        if self._add_hit(self._generate_text_hash(text)):
+            self.flush()
+    
+    def record_cache_hits(self, texts: List[str]):
+        """批量记录缓存命中"""
+        should_flush = False
+        for text in texts:
+            should_flush = self._add_hit(self._generate_text_hash(text)) or should_flush
+        if should_flush:
+            self.flush()
+    
+    def _add_hit(self, text_hash: str) -> bool:
+        """快照中的命中不计数：本地没有该行，写回时 UPDATE 不到任何行"""
+        if text_hash in self._snapshot_only:
+            return False
+        return self.write_buffer.add_hit(text_hash)
+    
+    def flush(self) -> int:
+        """将累积的命中次数和统计增量在一个事务中写回，返回写回的事件数"""
+        with self._flush_lock:
+            flushed = len(self.write_buffer)
+            hits, last_hit, stats = self.write_buffer.drain()
+            if not hits and not stats:
+                return 0
+            
+            try:
+                with self._get_connection() as conn:
+                    if hits:
+                        conn.executemany("""
+                            UPDATE translation_cache 
+                            SET hit_count = hit_count + ?, updated_at = ? 
+                            WHERE text_hash = ?
+                        """, [(count, last_hit[text_hash], text_hash) for text_hash, count in hits.items()])
+                    
+                    for date, delta in stats.items():
+                        self._merge_daily_stats(conn, date, delta)
+                    # 退出 with 时提交；此后到 finish_flush 之间的读取会重试
+                    self.write_buffer.begin_commit()
+            except Exception as e:
+                print(f"批量写回失败: {e}")
+                # 写回失败时放回缓冲区，下次重试
+                self.write_buffer.restore(hits, last_hit, stats)
+                return 0
+            finally:
+                self.write_buffer.finish_flush()
+            
+            self.write_buffer.flushes += 1
+            self.write_buffer.flushed_events += flushed
+            return flushed
+    
+    def rehash(self) -> Dict[str, int]:
+        """按当前规范化配置重新计算所有缓存键，合并变为同一个键的行"""
+        with self._flush_lock:
+            self.flush()
+            with self._get_connection() as conn:
+                result = self._rehash(conn)
+            if self.memory_cache is not None:
+                self.memory_cache.clear()
+            return result
+    
+    def _rehash(self, conn) -> Dict[str, int]:
+        """保留每组中命中次数最多（其次最近使用）的行，命中次数累加到该行"""
+        groups: Dict[str, List[sqlite3.Row]] = {}
+        for row in conn.execute("""
+            SELECT id, text_hash, source_text, hit_count, updated_at FROM translation_cache
+        """):
+            groups.setdefault(self._generate_text_hash(row['source_text']), []).append(row)
+        
+        updates = []
+        merged = 0
+        for text_hash, rows in groups.items():
+            rows.sort(key=lambda row: (row['hit_count'], row['updated_at'] or ''), reverse=True)
+            keeper, duplicates = rows[0], rows[1:]
+            if not duplicates and keeper['text_hash'] == text_hash:
+                continue
+            conn.executemany("DELETE FROM translation_cache WHERE id = ?",
+                             [(row['id'],) for row in duplicates])
+            updates.append((text_hash, sum(row['hit_count'] for row in duplicates), keeper['id']))
+            merged += len(duplicates)
+        
+        # 新哈希可能仍被其他尚未更新的行占用，先换成临时键再写入最终值
+        conn.executemany("UPDATE translation_cache SET text_hash = 'rehash:' || id WHERE id = ?",
+                         [(row_id,) for _, _, row_id in updates])
+        conn.executemany("""
+            UPDATE translation_cache SET text_hash = ?, hit_count = hit_count + ? WHERE id = ?
+        """, updates)
+        
+        return {"rows": sum(len(rows) for rows in groups.values()), "rehashed": len(updates), "merged": merged}
+    
+    def compact_step(self) -> bool:
+        """执行一批淘汰（过期优先，其次超出容量的低频旧词条），返回是否还有剩余工作
+        
+        每次调用只删除 cache_eviction_batch 行并在短事务中提交，
+        调用方可以在两次调用之间穿插其他写操作。没有可淘汰的行时执行增量回收。
+        """
+        batch = max(1, settings.cache_eviction_batch)
+        with self._flush_lock:
+            # 先写回累积的命中次数，保证按 hit_count 淘汰时看到的是最新值
+            self.flush()
+            conn = self._get_connection()
+            
+            for category, ttl in settings.cache_category_ttl.items():
+                if ttl <= 0:
+                    continue
+                victims = conn.execute("""
+                    SELECT id, text_hash FROM translation_cache 
+                    WHERE word_category = ? AND updated_at < datetime('now', ?) 
+                    LIMIT ?
+                """, (category, f"-{int(ttl)} seconds", batch)).fetchall()
+                if victims:
+                    self._evict_rows(conn, victims)
+                    self.eviction_stats["ttl_evictions"] += len(victims)
+                    return True
+            
+            excess = self._rows_over_budget(conn)
+            if excess > 0:
+                # 命中次数最少、最久未使用的先淘汰（由 idx_popular 提供顺序）
+                victims = conn.execute("""
+                    SELECT id, text_hash FROM translation_cache 
+                    ORDER BY hit_count, updated_at LIMIT ?
+                """, (min(excess, batch),)).fetchall()
+                self._evict_rows(conn, victims)
+                self.eviction_stats["budget_evictions"] += len(victims)
+                return True
+            
+            freed = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if freed and conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                # 通过 execute 执行时每步只回收一页，executescript 会执行到结束
+                conn.executescript(f"PRAGMA incremental_vacuum({int(settings.cache_vacuum_pages)})")
+                self.eviction_stats["vacuumed_pages"] += freed - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            self.eviction_stats["compaction_runs"] += 1
+            self.eviction_stats["last_compaction"] = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            return False
+    
+    def compact(self) -> Dict[str, Any]:
+        """
+        同步执行全部淘汰和回收（维护脚本使用；服务运行时由写线程分批调用 compact_step）
+        尚未启用增量回收的旧数据库在这里执行一次完整 VACUUM 完成转换
+        """
+        while self.compact_step():
+            pass
+        conn = self._get_connection()
+        converted = conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+        if converted:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        return {**self.eviction_stats, "auto_vacuum_converted": converted}
+    
+    def _rows_over_budget(self, conn) -> int:
+        """按行数和已用空间上限估算需要淘汰的行数"""
+        rows = conn.execute(
+            "SELECT value FROM cache_summary WHERE kind = 'total' AND key = 'entries'"
+        ).fetchone()
+        rows = rows[0] if rows else 0
+        excess = rows - settings.cache_max_rows if settings.cache_max_rows > 0 else 0
+        
+        if settings.cache_max_bytes > 0 and rows:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            used_pages = conn.execute("PRAGMA page_count").fetchone()[0] - \
+                conn.execute("PRAGMA freelist_count").fetchone()[0]
+            used = page_size * used_pages
+            if used > settings.cache_max_bytes:
+                # 按平均行大小折算，向上取整
+                bytes_excess = -(-rows * (used - settings.cache_max_bytes) // used)
+                excess = max(excess, bytes_excess)
+        return excess
+    
+    def _evict_rows(self, conn, victims: List[sqlite3.Row]):
+        """在一个事务中删除行（触发器同步维护汇总计数和规范化表）"""
+        with conn:
+            conn.executemany("DELETE FROM translation_cache WHERE id = ?",
+                             [(row['id'],) for row in victims])
+        if self.memory_cache is not None:
+            for row in victims:
+                self.memory_cache.discard(row['text_hash'])
+    
+    # 插入新记录，如果已存在则原地更新并保留命中次数
+    # （使用UPSERT而非 INSERT OR REPLACE，保证统计触发器看到的是UPDATE而不是DELETE+INSERT）
+    _SAVE_SQL = """
+        INSERT INTO translation_cache 
+        (text_hash, source_text, source_lang, target_lang, word_category, 
+         translation_result, user_ip, user_agent, primary_target, primary_reading, hit_count, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(text_hash) DO UPDATE SET
+            source_text = excluded.source_text,
+            source_lang = excluded.source_lang,
+            target_lang = excluded.target_lang,
+            word_category = excluded.word_category,
+            translation_result = excluded.translation_result,
+            user_ip = excluded.user_ip,
+            user_agent = excluded.user_agent,
+            primary_target = excluded.primary_target,
+            primary_reading = excluded.primary_reading,
+            updated_at = CURRENT_TIMESTAMP
+    """
+    
+    def _cache_row(self, text: str, result: Dict[str, Any],
+                   user_ip: str = None, user_agent: str = None) -> tuple:
+        """从翻译结果提取 _SAVE_SQL 所需的参数"""
+        text_hash = self._generate_text_hash(text)
+        
+        # 提取必要信息
+        source_lang = result.get('detected_language', '未知')
+        direction = result.get('translation_direction', '')
+        target_lang = '日语' if '→日' in direction else '中文' if '→中' in direction else '未知'
+        category = result.get('word_category', '通用词汇')
+        
+        return (text_hash, text, source_lang, target_lang, category,
+                json.dumps(result, ensure_ascii=False), user_ip, user_agent, *self._primary_fields(result))
     
     def save_translation(self, text: str, result: Dict[str, Any], 
                         user_ip: str = None, user_agent: str = None) -> bool:
         """保存翻译结果到数据库"""
+        return self.save_translations([(text, result)], user_ip, user_agent) == 1
+    
+    def save_translations(self, items: List[tuple], 
+                          user_ip: str = None, user_agent: str = None) -> int:
+        """在一个事务中保存多条翻译结果 [(text, result), ...]，返回保存条数"""
+        if not items:
+            return 0
         try:
-            text_hash = self._generate_text_hash(text)
+            rows = [self._cache_row(text, result, user_ip, user_agent) for text, result in items]
             
-            # 提取必要信息
-            source_lang = result.get('detected_language', '未知')
-            direction = result.get('translation_direction', '')
-            target_lang = '日语' if '→日' in direction else '中文' if '→中' in direction else '未知'
-            category = result.get('word_category', '通用词汇')
+            with self._get_connection() as conn:
+                for row, (_, result) in zip(rows, items):
+                    conn.execute(self._SAVE_SQL, row)
+                    cache_id = conn.execute(
+                        "SELECT id FROM translation_cache WHERE text_hash = ?", (row[0],)
+                    ).fetchone()[0]
+                    self._write_items(conn, cache_id, result, update_primary=False)
             
-            with sqlite3.connect(self.db_path) as conn:
-                # 尝试插入新记录，如果已存在则更新
-                conn.execute("""
-                    INSERT OR REPLACE INTO translation_cache 
-                    (text_hash, source_text, source_lang, target_lang, word_category, 
-                     translation_result, user_ip, user_agent, hit_count, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 
-                           COALESCE((SELECT hit_count FROM translation_cache WHERE text_hash = ?), 1),
-                           CURRENT_TIMESTAMP)
-                """, (text_hash, text, source_lang, target_lang, category, 
-                     json.dumps(result, ensure_ascii=False), user_ip, user_agent, text_hash))
+            for row in rows:
+                # 结果已更新，内存层旧条目作废
+                if self.memory_cache is not None:
+                    self.memory_cache.discard(row[0])
+                # 本地已有该行，之后的命中照常计数
+                self._snapshot_only.discard(row[0])
                 
                 # 更新统计信息
-                self._update_daily_stats(conn, source_lang, target_lang, category, is_cache_hit=False)
+                self.record_daily_stats(row[2], row[3], row[4], is_cache_hit=False)
                 
-            return True
+            return len(rows)
         except Exception as e:
             print(f"保存翻译结果失败: {e}")
-            return False
+            return 0
     
-    def _update_daily_stats(self, conn, source_lang: str, target_lang: str, 
-                          category: str, is_cache_hit: bool = False):
-        """更新每日统计信息"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        # 获取或创建今日统计
-        cursor = conn.execute("SELECT * FROM translation_stats WHERE date = ?", (today,))
+    def record_daily_stats(self, source_lang: str, target_lang: str,
+                           category: str, is_cache_hit: bool = False):
+        """记录每日统计信息（累积后批量写回）"""
+        if self.write_buffer.add_stats(source_lang, category, is_cache_hit):
+            self.flush()
+    
+    def _merge_daily_stats(self, conn, date: str, delta: Dict[str, Any]):
+        """将一天的统计增量合并到 translation_stats"""
+        cursor = conn.execute("SELECT category_stats FROM translation_stats WHERE date = ?", (date,))
         row = cursor.fetchone()
         
+        stats_data = json.loads(row['category_stats'] or '{}') if row else {}
+        for category, count in delta['category_stats'].items():
+            stats_data[category] = stats_data.get(category, 0) + count
+        category_json = json.dumps(stats_data, ensure_ascii=False)
+        
         if row:
-            # 更新现有统计
-            stats_data = json.loads(row[3] if row[3] else '{}')  # category_stats
-            stats_data[category] = stats_data.get(category, 0) + 1
-            
-            direction_field = ""
-            if source_lang == "中文":
-                direction_field = "chinese_to_japanese = chinese_to_japanese + 1"
-            elif source_lang == "日语":
-                direction_field = "japanese_to_chinese = japanese_to_chinese + 1"
-            
-            cache_update = "cache_hits = cache_hits + 1" if is_cache_hit else "new_translations = new_translations + 1"
-            
-            if direction_field:
-                conn.execute(f"""
-                    UPDATE translation_stats 
-                    SET total_requests = total_requests + 1,
-                        {cache_update},
-                        {direction_field},
-                        category_stats = ?
-                    WHERE date = ?
-                """, (json.dumps(stats_data, ensure_ascii=False), today))
-            else:
-                conn.execute(f"""
-                    UPDATE translation_stats 
-                    SET total_requests = total_requests + 1,
-                        {cache_update},
-                        category_stats = ?
-                    WHERE date = ?
-                """, (json.dumps(stats_data, ensure_ascii=False), today))
+            conn.execute("""
+                UPDATE translation_stats 
+                SET total_requests = total_requests + ?,
+                    cache_hits = cache_hits + ?,
+                    new_translations = new_translations + ?,
+                    chinese_to_japanese = chinese_to_japanese + ?,
+                    japanese_to_chinese = japanese_to_chinese + ?,
+                    category_stats = ?
+                WHERE date = ?
+            """, (*(delta[field] for field in STAT_FIELDS), category_json, date))
         else:
-            # 创建新的统计记录
-            stats_data = {category: 1}
-            chinese_to_japanese = 1 if source_lang == "中文" else 0
-            japanese_to_chinese = 1 if source_lang == "日语" else 0
-            cache_hits = 1 if is_cache_hit else 0
-            new_translations = 0 if is_cache_hit else 1
-            
             conn.execute("""
                 INSERT INTO translation_stats 
                 (date, total_requests, cache_hits, new_translations, 
                  chinese_to_japanese, japanese_to_chinese, category_stats)
-                VALUES (?, 1, ?, ?, ?, ?, ?)
-            """, (today, cache_hits, new_translations, chinese_to_japanese, 
-                 japanese_to_chinese, json.dumps(stats_data, ensure_ascii=False)))
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (date, *(delta[field] for field in STAT_FIELDS), category_json))
     
     def get_translation_history(self, limit: int = 50, category: str = None) -> List[Dict[str, Any]]:
         """获取翻译历史"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            
-            query = """
-                SELECT source_text, source_lang, target_lang, word_category, 
-                       translation_result, created_at, hit_count
-                FROM translation_cache 
-            """
-            params = []
-            
-            if category:
-                query += " WHERE word_category = ?"
-                params.append(category)
-            
-            query += " ORDER BY updated_at DESC LIMIT ?"
-            params.append(limit)
-            
-            cursor = conn.execute(query, params)
-            rows = cursor.fetchall()
-            
-            history = []
-            for row in rows:
-                translation_data = json.loads(row['translation_result'])
-                history.append({
-                    'source_text': row['source_text'],
-                    'source_lang': row['source_lang'],
-                    'target_lang': row['target_lang'],
-                    'category': row['word_category'],
-                    'translation': translation_data.get('translations', [{}])[0].get('target', ''),
-                    'created_at': row['created_at'],
-                    'hit_count': row['hit_count']
-                })
-            
-            return history
+        # 只读窄列，不解析JSON
+        query = """
+            SELECT text_hash, source_text, source_lang, target_lang, word_category, 
+                   primary_target, created_at, hit_count
+            FROM translation_cache 
+        """
+        params = []
+        
+        if category:
+            query += " WHERE word_category = ?"
+            params.append(category)
+        
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+        
+        def read(pending):
+            with self._get_connection() as conn:
+                return pending, conn.execute(query, params).fetchall()
+        
+        pending, rows = self._read_with_pending(self.write_buffer.pending_hits_snapshot, read)
+        
+        history = []
+        for row in rows:
+            history.append({
+                'source_text': row['source_text'],
+                'source_lang': row['source_lang'],
+                'target_lang': row['target_lang'],
+                'category': row['word_category'],
+                'translation': row['primary_target'],
+                'created_at': row['created_at'],
+                'hit_count': row['hit_count'] + pending.get(row['text_hash'], (0, ''))[0]
+            })
+        
+        return history
+    
+    _SEARCH_COLUMNS = """
+        c.id, c.text_hash, c.source_text, c.source_lang, c.target_lang, c.word_category,
+        c.primary_target, c.primary_reading, c.created_at, c.hit_count
+    """
+    # 全文检索的列过滤（FTS5列过滤语法）与对应的LIKE条件
+    _SEARCH_FIELDS = {
+        "all": ("", ("source_text", "primary_target", "primary_reading")),
+        "source": ("{source_text} : ", ("source_text",)),
+        "target": ("{primary_target primary_reading} : ", ("primary_target", "primary_reading")),
+    }
+    
+    def search_translations(self, query: str, field: str = "all", mode: str = "contains",
+                            category: str = None, limit: int = 20, cursor: str = None) -> Dict[str, Any]:
+        """
+        按原文/译文子串或原文前缀搜索缓存，keyset分页（cursor 为上一页返回的 next_cursor）
+        contains: 3个字符以上走FTS5 trigram索引，按写入时间倒序；更短的查询逐行LIKE匹配
+        prefix: 原文前缀，走 idx_source_text 范围扫描，按原文排序
+        """
+        if field not in self._SEARCH_FIELDS:
+            raise ValueError(f"未知的搜索字段: {field}")
+        if mode not in ("contains", "prefix"):
+            raise ValueError(f"未知的搜索方式: {mode}")
+        if mode == "prefix" and field == "target":
+            raise ValueError("前缀搜索只支持原文")
+        after = _decode_cursor(cursor, 2 if mode == "prefix" else 1) if cursor else None
+        
+        params: List[Any] = []
+        if mode == "prefix":
+            # 原文在 [query, query + U+10FFFF) 范围内即以 query 开头
+            conditions = ["c.source_text >= ?", "c.source_text < ?"]
+            params += [query, query + "\U0010ffff"]
+            if after:
+                conditions.append("(c.source_text, c.id) > (?, ?)")
+                params += after
+            order = "c.source_text, c.id"
+            source = "translation_cache c"
+        elif self.search_enabled and len(query) >= 3:
+            column_filter, _ = self._SEARCH_FIELDS[field]
+            conditions = ["translation_search MATCH ?"]
+            params.append(column_filter + '"' + query.replace('"', '""') + '"')
+            if after:
+                conditions.append("translation_search.rowid < ?")
+                params += after
+            order = "translation_search.rowid DESC"
+            source = "translation_search JOIN translation_cache c ON c.id = translation_search.rowid"
+        else:
+            # trigram索引无法匹配少于3个字符的查询
+            _, like_columns = self._SEARCH_FIELDS[field]
+            pattern = f"%{_escape_like(query)}%"
+            conditions = ["(" + " OR ".join(f"c.{column} LIKE ? ESCAPE '\\'" for column in like_columns) + ")"]
+            params += [pattern] * len(like_columns)
+            if after:
+                conditions.append("c.id < ?")
+                params += after
+            order = "c.id DESC"
+            source = "translation_cache c"
+        
+        if category:
+            conditions.append("c.word_category = ?")
+            params.append(category)
+        params.append(limit + 1)
+        
+        def read(pending):
+            with self._get_connection() as conn:
+                return pending, conn.execute(f"""
+                    SELECT {self._SEARCH_COLUMNS} FROM {source}
+                    WHERE {" AND ".join(conditions)} ORDER BY {order} LIMIT ?
+                """, params).fetchall()
+        
+        pending, rows = self._read_with_pending(self.write_buffer.pending_hits_snapshot, read)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(last['source_text'], last['id']) if mode == "prefix" \
+                else _encode_cursor(last['id'])
+        
+        return {
+            "results": [{
+                'source_text': row['source_text'],
+                'source_lang': row['source_lang'],
+                'target_lang': row['target_lang'],
+                'category': row['word_category'],
+                'translation': row['primary_target'],
+                'reading': row['primary_reading'],
+                'created_at': row['created_at'],
+                'hit_count': row['hit_count'] + pending.get(row['text_hash'], (0, ''))[0]
+            } for row in rows],
+            "next_cursor": next_cursor
+        }
+    
+    def get_translation_detail(self, text: str) -> Optional[Dict[str, Any]]:
+        """按需加载完整翻译结果（列表接口只返回窄列）"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT translation_result FROM translation_cache WHERE text_hash = ?
+            """, (self._generate_text_hash(text),)).fetchone()
+        return json.loads(row['translation_result']) if row else None
+    
+    def get_translation_items(self, text: str) -> List[Dict[str, Any]]:
+        """从规范化表读取译文、读音、释义和例句"""
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT id FROM translation_cache WHERE text_hash = ?",
+                               (self._generate_text_hash(text),)).fetchone()
+            if not row:
+                return []
+            items = conn.execute("""
+                SELECT position, original, target, hiragana, meaning 
+                FROM translation_items WHERE cache_id = ? ORDER BY position
+            """, (row['id'],)).fetchall()
+            examples = conn.execute("""
+                SELECT item_position, sentence, translation 
+                FROM translation_examples WHERE cache_id = ? ORDER BY item_position, position
+            """, (row['id'],)).fetchall()
+        
+        result = [{
+            'original': item['original'],
+            'target': item['target'],
+            'reading': {'hiragana': item['hiragana']},
+            'meaning': item['meaning'],
+            'examples': []
+        } for item in items]
+        by_position = {item['position']: entry for item, entry in zip(items, result)}
+        for example in examples:
+            entry = by_position.get(example['item_position'])
+            if entry is not None:
+                entry['examples'].append({'sentence': example['sentence'], 'translation': example['translation']})
+        return result
     
     def get_daily_stats(self, days: int = 7) -> List[Dict[str, Any]]:
-        """获取每日统计信息"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT * FROM translation_stats 
-                ORDER BY date DESC 
-                LIMIT ?
-            """, (days,))
-            
-            stats = []
-            for row in cursor.fetchall():
-                category_stats = json.loads(row['category_stats']) if row['category_stats'] else {}
-                stats.append({
-                    'date': row['date'],
-                    'total_requests': row['total_requests'],
-                    'cache_hits': row['cache_hits'],
-                    'new_translations': row['new_translations'],
-                    'chinese_to_japanese': row['chinese_to_japanese'],
-                    'japanese_to_chinese': row['japanese_to_chinese'],
-                    'category_stats': category_stats,
-                    'cache_hit_rate': round(row['cache_hits'] / max(row['total_requests'], 1) * 100, 2)
-                })
-            
-            return stats
+        """获取每日统计信息（合并尚未写回的增量）"""
+        def read(pending):
+            with self._get_connection() as conn:
+                return pending, conn.execute("""
+                    SELECT * FROM translation_stats 
+                    ORDER BY date DESC 
+                    LIMIT ?
+                """, (days,)).fetchall()
+        
+        pending, rows = self._read_with_pending(self.write_buffer.pending_stats_snapshot, read)
+        by_date = {}
+        for row in rows:
+            by_date[row['date']] = {
+                'date': row['date'],
+                **{field: row[field] for field in STAT_FIELDS},
+                'category_stats': json.loads(row['category_stats']) if row['category_stats'] else {}
+            }
+        
+        for date, delta in pending.items():
+            day = by_date.setdefault(date, {
+                'date': date, **{field: 0 for field in STAT_FIELDS}, 'category_stats': {}
+            })
+            for field in STAT_FIELDS:
+                day[field] += delta[field]
+            for category, count in delta['category_stats'].items():
+                day['category_stats'][category] = day['category_stats'].get(category, 0) + count
+        
+        stats = sorted(by_date.values(), key=lambda day: day['date'], reverse=True)[:days]
+        for day in stats:
+            day['cache_hit_rate'] = round(day['cache_hits'] / max(day['total_requests'], 1) * 100, 2)
+        return stats
     
     def get_popular_translations(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """获取热门翻译"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("""
-                SELECT source_text, word_category, translation_result, hit_count
-                FROM translation_cache 
-                WHERE hit_count > 1
-                ORDER BY hit_count DESC, updated_at DESC
-                LIMIT ?
-            """, (limit,))
-            
-            popular = []
-            for row in cursor.fetchall():
-                translation_data = json.loads(row['translation_result'])
-                translation = translation_data.get('translations', [{}])[0]
-                popular.append({
-                    'source_text': row['source_text'],
-                    'category': row['word_category'],
-                    'target': translation.get('target', ''),
-                    'reading': translation.get('reading', {}).get('hiragana', ''),
-                    'hit_count': row['hit_count']
-                })
-            
-            return popular
+        """获取热门翻译（合并尚未写回的命中次数）"""
+        columns = "text_hash, source_text, word_category, primary_target, primary_reading, hit_count, updated_at"
+        def read(pending):
+            with self._get_connection() as conn:
+                rows = conn.execute(f"""
+                    SELECT {columns}
+                    FROM translation_cache 
+                    WHERE hit_count > 1
+                    ORDER BY hit_count DESC, updated_at DESC
+                    LIMIT ?
+                """, (limit,)).fetchall()
+                
+                # 有未写回命中的条目可能排名上升，需要一并取出
+                candidates = {row['text_hash']: row for row in rows}
+                missing = [text_hash for text_hash in pending if text_hash not in candidates]
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    for row in conn.execute(f"""
+                        SELECT {columns} FROM translation_cache WHERE text_hash IN ({placeholders})
+                    """, chunk):
+                        candidates[row['text_hash']] = row
+            return pending, candidates
+        
+        pending, candidates = self._read_with_pending(self.write_buffer.pending_hits_snapshot, read)
+        
+        merged = []
+        for text_hash, row in candidates.items():
+            extra_hits, last_hit = pending.get(text_hash, (0, ''))
+            hit_count = row['hit_count'] + extra_hits
+            if hit_count > 1:
+                merged.append((hit_count, max(row['updated_at'] or '', last_hit), row))
+        merged.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        
+        popular = []
+        for hit_count, _, row in merged[:limit]:
+            popular.append({
+                'source_text': row['source_text'],
+                'category': row['word_category'],
+                'target': row['primary_target'],
+                'reading': row['primary_reading'],
+                'hit_count': hit_count
+            })
+        
+        return popular
 
-# 全局数据库实例
-db = TranslationDatabase() 
\ No newline at end of file
+# 全局数据库实例：首次使用时才打开SQLite并建表
+get_db = LazyInstance(TranslationDatabase)
+__getattr__ = module_getattr(__name__, {"db": get_db})
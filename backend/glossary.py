@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+离线词表 - 地名、大学、交通、医学等固定词条直接查表返回，不经过缓存和模型
+
+词表为 CSV 或 TSV（按扩展名区分，.tsv/.tab 为制表符分隔），首行为表头：
+    zh,ja,reading,category,meaning
+zh/ja 必填，其余可留空。中文和日文两侧都作为查询键；
+两侧写法相同的词（如"大学"）按中文→日文返回。
+"""
+import csv
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from lazy import LazyInstance, module_getattr
+from normalization import TextNormalizer
+
+_FIELDS = ("zh", "ja", "reading", "category", "meaning")
+
+
+class Glossary:
+    def __init__(self, normalizer: TextNormalizer):
+        """空词表；条目以元组存放，命中时才构造响应"""
+        self.normalizer = normalizer
+        self._entries: List[Tuple[str, str, str, str, str]] = []
+        # 规范化后的词 → (条目下标, 是否中文一侧)
+        self._index: Dict[str, Tuple[int, bool]] = {}
+        self.source: Optional[str] = None
+        self.load_ms = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_file(cls, path: str, normalizer: TextNormalizer) -> "Glossary":
+        glossary = cls(normalizer)
+        glossary.load(path)
+        return glossary
+
+    def load(self, path: str) -> int:
+        """加载词表文件（追加到已有条目），返回新增条目数"""
+        started = time.perf_counter()
+        file_path = Path(path)
+        delimiter = "\t" if file_path.suffix.lower() in (".tsv", ".tab") else ","
+
+        added = 0
+        with file_path.open(encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            missing = {"zh", "ja"} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"词表缺少列: {', '.join(sorted(missing))}")
+            for row in reader:
+                entry = tuple((row.get(field) or "").strip() for field in _FIELDS)
+                if not entry[0] or not entry[1]:
+                    continue
+                position = len(self._entries)
+                self._entries.append(entry)
+                self._index.setdefault(self.normalizer(entry[0]), (position, True))
+                self._index.setdefault(self.normalizer(entry[1]), (position, False))
+                added += 1
+
+        self.source = str(file_path)
+        self.load_ms += (time.perf_counter() - started) * 1000
+        return added
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """精确匹配（规范化后），返回与模型翻译结果相同结构的数据"""
+        found = self._index.get(self.normalizer(text))
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        position, from_chinese = found
+        zh, ja, reading, category, meaning = self._entries[position]
+        return {
+            "from_glossary": True,
+            "detected_language": "中文" if from_chinese else "日语",
+            "translation_direction": "中→日" if from_chinese else "日→中",
+            "word_category": category or "通用词汇",
+            "translations": [{
+                "original": zh if from_chinese else ja,
+                "target": ja if from_chinese else zh,
+                "reading": {"hiragana": reading},
+                "meaning": meaning,
+                "examples": []
+            }]
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "entries": len(self._entries),
+            "keys": len(self._index),
+            "load_ms": round(self.load_ms, 2),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def _load_default() -> Glossary:
+    glossary = Glossary(TextNormalizer(settings.text_normalization))
+    if settings.glossary_path:
+        try:
+            glossary.load(settings.glossary_path)
+            print(f"词表已加载: {len(glossary)} 条 ({glossary.load_ms:.1f}ms)")
+        except (OSError, ValueError) as e:
+            print(f"词表加载失败: {e}")
+    return glossary
+
+
+# 全局词表实例：首次查询时才加载
+get_glossary = LazyInstance(_load_default)
+__getattr__ = module_getattr(__name__, {"glossary": get_glossary})
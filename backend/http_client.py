@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+上游HTTP客户端模块 - 应用级共享连接池
+避免每次调用DeepSeek都重新建立TCP/TLS连接
+"""
+from typing import Optional
+
+import httpx
+
+from config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """检查是否安装了HTTP/2依赖"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    """根据配置创建带连接池的客户端"""
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.http_connect_timeout,
+        read=settings.http_read_timeout,
+        write=settings.http_write_timeout,
+        pool=settings.http_pool_timeout,
+    )
+
+    http2 = settings.http2_enabled
+    if http2 and not _http2_available():
+        print("未安装 h2，HTTP/2 已禁用（pip install httpx[http2]）")
+        http2 = False
+
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """应用启动时创建共享客户端"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client():
+    """应用关闭时释放连接池"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享客户端（未启动时按需创建，兼容脚本直接调用）"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+本地语言判定 - 按文字统计在调用模型前确定翻译方向
+假名是日语的可靠信号；全是汉字时再看简体专用字、中文虚词和日语新字体专用字，
+只含中日（含繁体）共用汉字时不下结论；
+一方明显占优才下结论，信号不足或相互矛盾时返回 None，由模型自行识别
+"""
+from typing import Dict, Optional
+
+ZH = "zh"
+JA = "ja"
+
+DIRECTIONS: Dict[str, Dict[str, str]] = {
+    ZH: {"detected_language": "中文", "translation_direction": "中→日"},
+    JA: {"detected_language": "日语", "translation_direction": "日→中"},
+}
+
+# 简体中文专用字（日语中不使用或写法不同；条、叶、个、几、站、稻等日语也用的字不在其中）
+_SIMPLIFIED_ONLY = frozenset(
+    "这们说么还过时对为吗呢吧啊给让从见问题习飞场车东门铁银药书买卖语请谢认识现实发电话"
+    "网络计经济专业务员办证历样华讯码钱汇报应该线环确认记录输开关听读练复图馆边长间损赔偿险难")
+# 中文常用虚词（日语中基本不单独出现；是、我、那 在是非、我孫子、那覇等日语词中常见，不计入）
+_CHINESE_PARTICLES = frozenset("吗呢吧你她它们这么怎哪")
+# 日语新字体专用字：简体和繁体写法都与之不同（時、間、語、電、請等与繁体相同的字不在其中，
+# 否则繁体中文会被判为日语）
+_JAPANESE_ONLY = frozenset(
+    "駅県円様込働峠畑気図広沢浜歳桜薬楽読売払辺験検険転伝関鉄覧帰営労効処収団"
+    "経済発実応録銭専証歴単戦変両満乗巻拠隠継縄焼")
+
+
+def _is_kana(char: str) -> bool:
+    code = ord(char)
+    return 0x3040 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF or 0xFF66 <= code <= 0xFF9D
+
+
+def _is_han(char: str) -> bool:
+    code = ord(char)
+    return 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF
+
+
+def detect_language(text: str) -> Optional[str]:
+    """返回 'zh'、'ja'，无法可靠判断时返回 None"""
+    kana = han = chinese = japanese = 0
+    for char in text:
+        if _is_kana(char):
+            kana += 1
+        elif _is_han(char):
+            han += 1
+            if char in _SIMPLIFIED_ONLY or char in _CHINESE_PARTICLES:
+                chinese += 1
+            elif char in _JAPANESE_ONLY:
+                japanese += 1
+
+    # 长音符"ー"等单个假名也可能出现在中文里，按比例判断
+    if kana and kana * 10 >= kana + han:
+        return JA
+    if _dominates(chinese, japanese):
+        return ZH
+    if _dominates(japanese, chinese):
+        return JA
+    return None
+
+
+def _dominates(score: int, other: int) -> bool:
+    """至少是另一方的两倍才算明显占优，如 2:1 可以判断，3:2 视为不确定"""
+    return score > other and score >= 2 * other
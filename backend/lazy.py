@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+延迟初始化 - 全局实例在第一次使用时才构造
+导入模块时不打开数据库、不读取词表、不创建状态文件，冷启动更快；
+数据库路径不可写之类的问题在第一次使用时才暴露，而不是让导入失败
+"""
+import threading
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyInstance(Generic[T]):
+    """调用时返回单例，首次调用才执行 factory（线程安全）"""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+
+def module_getattr(module_name: str, accessors: Dict[str, Callable[[], Any]]) -> Callable[[str], Any]:
+    """生成模块级 __getattr__，兼容 `from database import db` 的旧写法（此时立即初始化）"""
+    def __getattr__(name: str) -> Any:
+        if name in accessors:
+            return accessors[name]()
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+    return __getattr__
@@ -1,9 +1,19 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from api import translate_text
+from typing import List
+from api import translate_text, translate_batch, translate_text_stream, search_translations
+from config import settings
+from assets import AssetCache
+from async_db import get_adb
+from glossary import get_glossary
+from validation import get_validator
+from http_client import start_http_client, close_http_client
+from metrics import registry
+import asyncio
+import json
 import os
 import pathlib
 
@@ -22,30 +32,72 @@ app.add_middleware(
 backend_dir = pathlib.Path(__file__).parent.absolute()
 frontend_dir = backend_dir.parent / "frontend"
 
-# 挂载静态文件服务
-app.mount("/static", StaticFiles(directory=str(frontend_dir)), name="static")
+# 挂载静态文件服务（目录在第一次请求时才检查，缺失时不影响导入和API）
+app.mount("/static", StaticFiles(directory=str(frontend_dir), check_dir=False), name="static")
+
+# 前端页面：内容和压缩结果缓存在内存中，带ETag和指纹路径
+assets = AssetCache(frontend_dir, dev_mode=settings.assets_dev_mode, max_age=settings.assets_max_age)
+
+def _initialize_state():
+    """
+    预先构造数据库（建表、迁移、重建索引可能耗时较长）、词表和请求校验器
+    失败时只记录原因，服务照常启动（/health 仍可访问），首次实际使用时由访问函数重试并报错
+    """
+    for name, accessor in (("数据库", get_adb), ("词表", get_glossary), ("请求校验器", get_validator)):
+        try:
+            accessor()
+        except Exception as e:
+            print(f"启动时初始化{name}失败，将在首次使用时重试: {e}")
+
+@app.on_event("startup")
+async def startup():
+    """
+    启动时创建共享的上游HTTP连接池，在线程中完成数据库等的初始化后才开始接受请求，
+    第一个请求不会在事件循环上执行建表和迁移；前端资源在后台预先加载和压缩
+    """
+    await start_http_client()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _initialize_state)
+    loop.run_in_executor(None, assets.preload)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """关闭时释放上游连接，写回累积的命中次数并停止数据库线程"""
+    await close_http_client()
+    # 没有用到数据库的进程无需为关闭而创建它
+    if get_adb.initialized:
+        get_adb().close()
 
 class TranslationRequest(BaseModel):
     text: str
+    segment: bool = False  # 按句切分，逐句缓存和并发翻译
+
+class BatchTranslationRequest(BaseModel):
+    texts: List[str]
 
 class TranslationResponse(BaseModel):
     detected_language: str
     translations: list
 
 @app.get("/")
-async def serve_frontend():
+async def serve_frontend(request: Request):
     """提供前端页面"""
-    return FileResponse(frontend_dir / 'index.html')
+    return assets.response(request, "index.html")
 
 @app.get("/style.css")
-async def serve_css():
+async def serve_css(request: Request):
     """提供CSS文件"""
-    return FileResponse(frontend_dir / 'style.css')
+    return assets.response(request, "style.css")
 
 @app.get("/script.js")
-async def serve_js():
+async def serve_js(request: Request):
     """提供JavaScript文件"""
-    return FileResponse(frontend_dir / 'script.js')
+    return assets.response(request, "script.js")
+
+@app.get("/assets/{filename}")
+async def serve_fingerprinted_asset(request: Request, filename: str):
+    """带内容指纹的前端资源，可长期缓存"""
+    return assets.fingerprinted_response(request, filename)
 
 @app.post("/translate", response_model=dict)
 async def translate_endpoint(request: TranslationRequest):
@@ -57,13 +109,67 @@ async def translate_endpoint(request: TranslationRequest):
         if len(request.text) > 500:
             raise HTTPException(status_code=400, detail="输入文本超过500字符限制")
         
-        result = await translate_text(request.text)
+        result = await translate_text(request.text, segmented=request.segment)
         return result
         
     except Exception as e:
         print(f"翻译错误: {e}")
         raise HTTPException(status_code=500, detail=f"翻译失败: {str(e)}")
 
+@app.post("/translate/stream")
+async def translate_stream_endpoint(request: TranslationRequest):
+    """流式翻译接口（SSE），字段解析完成即推送"""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="输入文本不能为空")
+    
+    if len(request.text) > 500:
+        raise HTTPException(status_code=400, detail="输入文本超过500字符限制")
+    
+    async def event_stream():
+        async for event, data in translate_text_stream(request.text):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/translate/batch", response_model=dict)
+async def translate_batch_endpoint(request: BatchTranslationRequest):
+    """批量翻译接口，results 与 texts 一一对应，单条失败不影响整批"""
+    if not request.texts:
+        raise HTTPException(status_code=400, detail="texts不能为空")
+    
+    if len(request.texts) > settings.batch_max_items:
+        raise HTTPException(status_code=400, detail=f"单次最多翻译{settings.batch_max_items}条")
+    
+    try:
+        return await translate_batch(request.texts)
+    except Exception as e:
+        print(f"批量翻译错误: {e}")
+        raise HTTPException(status_code=500, detail=f"翻译失败: {str(e)}")
+
+@app.get("/search", response_model=dict)
+async def search_endpoint(q: str, field: str = "all", mode: str = "contains",
+                          category: str = None, limit: int = 20, cursor: str = None):
+    """搜索翻译历史：field=all|source|target，mode=contains|prefix，用返回的 next_cursor 取下一页"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="搜索内容不能为空")
+    
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit 须在1到100之间")
+    
+    result = await search_translations(q.strip(), field, mode, category, limit, cursor)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus 文本格式的指标"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
     """健康检查"""
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+缓存数据库维护脚本（服务停止时运行）
+
+运行: cd backend && python maintenance.py rehash
+      cd backend && python maintenance.py compact
+      cd backend && python maintenance.py export --output cache.snapshot --limit 100000
+"""
+import argparse
+import json
+
+from database import TranslationDatabase
+
+
+def rehash(database: TranslationDatabase, args) -> dict:
+    """修改 text_normalization 后按新规则重新计算缓存键并合并重复行"""
+    return database.rehash()
+
+
+def compact(database: TranslationDatabase, args) -> dict:
+    """立即执行全部淘汰和增量回收；旧数据库首次运行时转换为增量回收模式（完整VACUUM）"""
+    return database.compact()
+
+
+def export(database: TranslationDatabase, args) -> dict:
+    """导出只读缓存快照，供新节点通过 cache_snapshot_path 预热"""
+    return database.export_snapshot(args.output, min_hits=args.min_hits, limit=args.limit)
+
+
+COMMANDS = {
+    "rehash": rehash,
+    "compact": compact,
+    "export": export,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存数据库维护")
+    parser.add_argument("--db", default="translation_cache.db", help="数据库文件路径")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rehash", help=rehash.__doc__)
+    subparsers.add_parser("compact", help=compact.__doc__)
+    export_parser = subparsers.add_parser("export", help=export.__doc__)
+    export_parser.add_argument("--output", default="translation_cache.snapshot", help="快照文件路径")
+    export_parser.add_argument("--min-hits", type=int, default=0, help="只导出命中次数不少于该值的条目")
+    export_parser.add_argument("--limit", type=int, default=0, help="最多导出条数（按命中次数从高到低），0表示全部")
+    args = parser.parse_args()
+
+    database = TranslationDatabase(args.db)
+    try:
+        result = COMMANDS[args.command](database, args)
+    finally:
+        database.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+内存缓存模块 - SQLite翻译缓存前的进程内缓存层
+支持LRU/LFU淘汰、条目数/字节数上限和TTL过期
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _LRUPolicy:
+    """最近最少使用：按访问顺序淘汰"""
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def add(self, key: Hashable):
+        self._order[key] = None
+
+    def touch(self, key: Hashable):
+        self._order.move_to_end(key)
+
+    def remove(self, key: Hashable):
+        self._order.pop(key, None)
+
+    def victim(self) -> Optional[Hashable]:
+        return next(iter(self._order), None)
+
+    def clear(self):
+        self._order.clear()
+
+
+class _LFUPolicy:
+    """最不经常使用：按访问频次淘汰，同频次内按最久未访问淘汰"""
+
+    def __init__(self):
+        self._freq: Dict[Hashable, int] = {}
+        self._buckets = defaultdict(OrderedDict)
+        self._min_freq = 0
+
+    def add(self, key: Hashable):
+        self._freq[key] = 1
+        self._buckets[1][key] = None
+        self._min_freq = 1
+
+    def touch(self, key: Hashable):
+        freq = self._freq[key]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets[freq + 1][key] = None
+
+    def remove(self, key: Hashable):
+        freq = self._freq.pop(key, None)
+        if freq is None:
+            return
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = min(self._buckets) if self._buckets else 0
+
+    def victim(self) -> Optional[Hashable]:
+        if not self._freq:
+            return None
+        if self._min_freq not in self._buckets:
+            self._min_freq = min(self._buckets)
+        return next(iter(self._buckets[self._min_freq]))
+
+    def clear(self):
+        self._freq.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 0,
+                 ttl: float = 3600, policy: str = "lru"):
+        """
+        初始化内存缓存
+        max_entries/max_bytes 为0表示不限制，ttl为0表示永不过期
+        """
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"不支持的淘汰策略: {policy}")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy_name = policy
+        self._policy = _LRUPolicy() if policy == "lru" else _LFUPolicy()
+
+        # key -> [value, size, expires_at]
+        self._entries: Dict[Hashable, list] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, update: Optional[Callable[[Any], Any]] = None) -> Optional[Any]:
+        """
+        读取缓存，过期条目视为未命中
+        传入 update 时在锁内对缓存值调用它并返回其结果（用于原子地修改可变的值）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[2] and entry[2] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._policy.touch(key)
+            self.hits += 1
+            return update(entry[0]) if update is not None else entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int = 0):
+        """写入缓存，超出上限时按策略淘汰"""
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # 先淘汰再加入，否则LFU会把频次为1的新条目选为淘汰对象
+            while ((self.max_entries and len(self._entries) >= self.max_entries) or
+                   (self.max_bytes and self._bytes + size > self.max_bytes)):
+                victim = self._policy.victim()
+                if victim is None:
+                    break
+                self._remove(victim)
+                self.evictions += 1
+
+            self._entries[key] = [value, size, expires_at]
+            self._bytes += size
+            self._policy.add(key)
+
+    def discard(self, key: Hashable):
+        """移除指定条目（数据被更新时调用）"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._policy.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+        self._policy.remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "policy": self.policy_name,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / max(total, 1) * 100, 2)
+        }
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+轻量指标采集 - 计数器与直方图，按 Prometheus 文本格式输出
+每次记录只做一次加锁和一次二分查找，可在生产环境常开
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from config import settings
+
+# 默认耗时分桶（秒）：覆盖微秒级的规则检查到数十秒的上游调用
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签: [各分桶计数..., +Inf计数, 总和]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """统计代码块耗时（异常时也记录）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = _format_labels(self.labels, label_values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """输出时才计算的值；kind="counter" 用于读取其他模块自行维护的累计计数"""
+
+    def __init__(self, name: str, help_text: str, func: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.func = func
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}",
+                f"{self.name} {self.func():g}"]
+
+
+class _Disabled:
+    """关闭指标时使用的空实现"""
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    def observe(self, *args, **kwargs):
+        pass
+
+    def value(self, *args) -> float:
+        return 0.0
+
+    @contextmanager
+    def time(self, *args) -> Iterator[None]:
+        yield
+
+    def render(self) -> List[str]:
+        return []
+
+
+class Registry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: list = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, func: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, help_text, func))
+
+    def counter_func(self, name: str, help_text: str, func: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, help_text, func, kind="counter"))
+
+    def _register(self, metric):
+        if not self.enabled:
+            return _Disabled()
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标
+registry = Registry(enabled=settings.metrics_enabled)
+
+STAGE_SECONDS = registry.histogram(
+    "translator_stage_seconds", "各处理阶段耗时", ["stage"])
+VALIDATION_SECONDS = registry.histogram(
+    "translator_validation_seconds", "请求验证各规则组耗时", ["rule"])
+VALIDATION_REJECTIONS = registry.counter(
+    "translator_validation_rejections_total", "验证未通过的请求数", ["rule"])
+DB_SECONDS = registry.histogram(
+    "translator_db_seconds", "SQLite操作执行耗时（不含排队）", ["kind", "operation"])
+DB_QUEUE_SECONDS = registry.histogram(
+    "translator_db_write_queue_seconds", "写操作在写队列中的等待时间")
+UPSTREAM_SECONDS = registry.histogram(
+    "translator_upstream_seconds", "上游模型调用耗时", ["mode", "prompt"])
+UPSTREAM_TOKENS = registry.histogram(
+    "translator_upstream_tokens", "每次上游调用的token用量", ["kind", "prompt"],
+    buckets=(25, 50, 100, 200, 400, 800, 1600, 3200, 6400))
+UPSTREAM_REQUESTS = registry.counter(
+    "translator_upstream_requests_total", "上游模型调用次数", ["mode", "status"])
+PARSE_FAILURES = registry.counter(
+    "translator_parse_failures_total", "模型输出JSON解析失败次数", ["mode"])
+CACHE_LOOKUPS = registry.counter(
+    "translator_cache_lookups_total", "翻译查询结果（glossary/hit/miss）", ["result"])
+
+
+def _cache_hit_ratio() -> float:
+    hits = CACHE_LOOKUPS.value("glossary") + CACHE_LOOKUPS.value("hit")
+    total = hits + CACHE_LOOKUPS.value("miss")
+    return hits / total if total else 0.0
+
+
+registry.gauge("translator_cache_hit_ratio", "词表与缓存命中占全部查询的比例", _cache_hit_ratio)
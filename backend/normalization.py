@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+缓存键文本规范化 - 在计算哈希前把等价的输入写法统一成同一个键
+步骤按配置顺序执行，只影响缓存查找，不改变发送给模型的原文
+"""
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List
+
+# 句末可以忽略的标点（NFKC之后全角 ！？ 已变为半角）
+_TRAILING_PUNCTUATION = re.compile(r"[\s。．.!?！？、，,…~～]+$")
+_WHITESPACE = re.compile(r"\s+")
+# 中日文字符之间的空格没有意义
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_CJK_GAP = re.compile(f"(?<=[{_CJK}]) (?=[{_CJK}])")
+
+
+def _nfkc(text: str) -> str:
+    """全角英数→半角、半角片假名→全角、兼容字符→标准字符"""
+    return unicodedata.normalize("NFKC", text)
+
+
+def _lower(text: str) -> str:
+    return text.lower()
+
+
+def _whitespace(text: str) -> str:
+    """合并连续空白，去掉中日文字符之间的空格"""
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _CJK_GAP.sub("", text)
+
+
+def _trailing_punctuation(text: str) -> str:
+    """去掉句末标点；全部是标点时保持原样"""
+    stripped = _TRAILING_PUNCTUATION.sub("", text)
+    return stripped if stripped else text
+
+
+STEPS: Dict[str, Callable[[str], str]] = {
+    "nfkc": _nfkc,
+    "lower": _lower,
+    "whitespace": _whitespace,
+    "trailing_punctuation": _trailing_punctuation,
+}
+
+
+class TextNormalizer:
+    def __init__(self, steps: Iterable[str]):
+        """按名称组装规范化步骤，未知名称直接报错"""
+        unknown = [name for name in steps if name not in STEPS]
+        if unknown:
+            raise ValueError(f"未知的规范化步骤: {', '.join(unknown)}")
+        self.steps: List[str] = list(steps)
+        self._funcs = [STEPS[name] for name in self.steps]
+
+    def __call__(self, text: str) -> str:
+        text = text.strip()
+        for func in self._funcs:
+            text = func(text)
+        return text
+
+
+# 旧版缓存键：只做 strip().lower()，用于重新计算已有数据的哈希和离线对比
+legacy_normalizer = TextNormalizer(["lower"])
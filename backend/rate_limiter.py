@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+速率限制模块 - 滑动窗口计数器
+每个IP只保存固定数量的计数，检查为O(1)；空闲IP自动淘汰，跟踪的IP数有硬上限
+"""
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterator, Optional, Tuple
+
+# 每个客户端的状态下标
+_MIN_WINDOW, _MIN_CUR, _MIN_PREV, _HOUR_WINDOW, _HOUR_CUR, _HOUR_PREV, _LAST_SEEN = range(7)
+
+
+def _estimate(state: list, now: float, window: int, window_idx: int, cur_idx: int, prev_idx: int) -> float:
+    """滚动窗口并估算最近 window 秒内的请求数"""
+    current = int(now // window)
+    if state[window_idx] != current:
+        # 刚好进入下一个窗口时保留上一窗口计数，跨越多个窗口则清零
+        state[prev_idx] = state[cur_idx] if state[window_idx] == current - 1 else 0
+        state[cur_idx] = 0
+        state[window_idx] = current
+    elapsed = now - current * window
+    return state[prev_idx] * (1 - elapsed / window) + state[cur_idx]
+
+
+def apply_hit(state: list, now: float, per_minute: int, per_hour: int, cost: int = 1) -> Tuple[bool, str]:
+    """
+    在一个客户端的状态上检查并记录 cost 次请求（原地修改 state），额度不足时一次也不记录
+    state 布局: [分钟窗口号, 本分钟计数, 上分钟计数, 小时窗口号, 本小时计数, 上小时计数, ...]
+    返回: (是否允许, 超限类型 "hour"/"minute"/"")
+    """
+    if _estimate(state, now, 3600, _HOUR_WINDOW, _HOUR_CUR, _HOUR_PREV) + cost - 1 >= per_hour:
+        return False, "hour"
+    if _estimate(state, now, 60, _MIN_WINDOW, _MIN_CUR, _MIN_PREV) + cost - 1 >= per_minute:
+        return False, "minute"
+    state[_MIN_CUR] += cost
+    state[_HOUR_CUR] += cost
+    return True, ""
+
+
+def estimate_counts(state: list, now: float) -> Tuple[int, int]:
+    """估算最近一分钟和一小时的请求数（不修改 state）"""
+    state = list(state)
+    minute = _estimate(state, now, 60, _MIN_WINDOW, _MIN_CUR, _MIN_PREV)
+    hour = _estimate(state, now, 3600, _HOUR_WINDOW, _HOUR_CUR, _HOUR_PREV)
+    return int(round(minute)), int(round(hour))
+
+
+class SlidingWindowRateLimiter:
+    def __init__(self, per_minute: int = 20, per_hour: int = 200,
+                 max_clients: int = 100000, idle_ttl: float = 3600):
+        """
+        初始化限流器
+        计数按"上一窗口按剩余比例加权 + 当前窗口"估算滑动窗口内的请求数
+        """
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+
+        # IP -> [分钟窗口号, 本分钟计数, 上分钟计数, 小时窗口号, 本小时计数, 上小时计数, 最近访问时间]
+        # 按最近访问排序，队首即最久未访问的IP
+        self._clients: "OrderedDict[str, list]" = OrderedDict()
+        self.evictions = 0
+
+    def hit(self, client_ip: str, now: Optional[float] = None, cost: int = 1) -> Tuple[bool, str]:
+        """
+        检查并记录 cost 次请求
+        返回: (是否允许, 超限类型 "hour"/"minute"/"")
+        """
+        now = time.time() if now is None else now
+        state = self._clients.get(client_ip)
+        if state is None:
+            state = [0, 0, 0, 0, 0, 0, now]
+            self._clients[client_ip] = state
+            self._evict(now)
+        else:
+            self._clients.move_to_end(client_ip)
+        state[_LAST_SEEN] = now
+        return apply_hit(state, now, self.per_minute, self.per_hour, cost)
+
+    def counts(self, client_ip: str, now: Optional[float] = None) -> Tuple[int, int]:
+        """获取客户端最近一分钟和一小时的请求数（不记录请求）"""
+        state = self._clients.get(client_ip)
+        if state is None:
+            return 0, 0
+        return estimate_counts(state, time.time() if now is None else now)
+
+    def _evict(self, now: float):
+        """淘汰空闲IP（每次最多检查少量队首元素，均摊O(1)）并执行数量上限"""
+        for _ in range(2):
+            oldest = next(iter(self._clients.values()))
+            if now - oldest[_LAST_SEEN] <= self.idle_ttl:
+                break
+            self._clients.popitem(last=False)
+            self.evictions += 1
+
+        while self.max_clients and len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, client_ip: str) -> bool:
+        return client_ip in self._clients
+
+
+class BoundedCounter:
+    """有容量上限的计数器，超出时淘汰最久未更新的键"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._counts: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def increment(self, key: Hashable, amount: int = 1) -> int:
+        count = self._counts.pop(key, 0) + amount
+        self._counts[key] = count
+        if self.max_keys and len(self._counts) > self.max_keys:
+            self._counts.popitem(last=False)
+        return count
+
+    def reset(self, key: Hashable):
+        self._counts.pop(key, None)
+
+    def __getitem__(self, key: Hashable) -> int:
+        # 读取不创建条目
+        return self._counts.get(key, 0)
+
+    def items(self) -> Iterator[Tuple[Hashable, int]]:
+        return iter(self._counts.items())
+
+    def __len__(self) -> int:
+        return len(self._counts)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+内容筛查模块 - 预编译的单次扫描筛查引擎
+所有规则合并为一个正则，一次扫描即可判断命中的规则；
+形如 A.*?B 的规则拆成有序关键词序列逐行匹配，最坏情况仍为线性时间
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 恶意内容规则: (规则名, 正则)；序列规则为 (规则名, [关键词正则, ...])，等价于同一行内 A.*?B.*?C
+MALICIOUS_RULES = [
+    ("xss_script", [r'<script', r'>', r'</script>']),  # XSS脚本
+    ("javascript_uri", r'javascript:'),                # JavaScript注入
+    ("data_uri", r'data:text/html'),                    # Data URI攻击
+    ("vbscript_uri", r'vbscript:'),                     # VBScript注入
+    ("sql_union", [r'\bUNION\b', r'\bSELECT\b']),       # SQL注入
+    ("sql_drop", [r'\bDROP\b', r'\bTABLE\b']),          # SQL删除
+    ("sql_insert", [r'\bINSERT\b', r'\bINTO\b']),       # SQL插入
+    ("path_traversal", r'\.\./'),                       # 路径遍历
+    ("hex_escape", r'\\x[0-9a-fA-F]{2}'),               # 十六进制编码
+]
+
+# 垃圾内容规则（只需判断是否出现，均改写为有界匹配）
+SPAM_RULES = [
+    ("repeated_char", r'(?P<_rc>.)(?P=_rc){10}'),      # 重复字符
+    ("symbol_flood", r'[!@#$%^&*]{5}'),                 # 大量特殊符号
+    ("url", r'http[s]?://[^\s]'),                       # URL链接
+    ("long_number", r'\b\d{10,}\b'),                    # 长数字串
+]
+
+# 自动化工具User Agent: (规则名, 原始关键词)
+USER_AGENT_RULES = [
+    ("bot", r'bot'),
+    ("crawler", r'crawler'),
+    ("spider", r'spider'),
+    ("scraper", r'scraper'),
+    ("python_requests", r'python-requests'),
+    ("curl", r'curl/'),
+    ("wget", r'wget'),
+]
+
+
+class ContentScreener:
+    def __init__(self, malicious_rules: Sequence = MALICIOUS_RULES,
+                 spam_rules: Sequence = SPAM_RULES):
+        """把所有规则编译为一个合并正则"""
+        self.kinds: Dict[str, str] = {}
+        # 序列规则: 规则名 -> 后续关键词的编译正则
+        self._sequences: Dict[str, List[re.Pattern]] = {}
+
+        alternatives = []
+        for kind, rules in (("malicious", malicious_rules), ("spam", spam_rules)):
+            for name, pattern in rules:
+                self.kinds[name] = kind
+                if isinstance(pattern, (list, tuple)):
+                    # 合并正则只负责定位第一个关键词，其余关键词命中后再确认
+                    self._sequences[name] = [re.compile(p, re.IGNORECASE) for p in pattern[1:]]
+                    pattern = pattern[0]
+                # 零宽断言包裹：匹配不消耗字符，避免长匹配遮住其后的其他规则
+                alternatives.append(f"(?=(?P<{name}>{pattern}))")
+
+        # 恶意规则排在前面：同一位置同时命中时优先判为恶意
+        self._combined = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def screen(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        扫描文本，返回 (类型 "malicious"/"spam", 规则名)，未命中返回 None
+        恶意规则优先：先遇到垃圾规则时继续扫描，直到确认没有恶意内容
+        """
+        first_spam = None
+        # 序列规则在某一行确认失败后，同一行后面的起始关键词也不可能成功
+        failed_until: Dict[str, int] = {}
+
+        for match in self._combined.finditer(text):
+            name = match.lastgroup
+            kind = self.kinds[name]
+            if kind == "spam":
+                if first_spam is None:
+                    first_spam = name
+                continue
+
+            followers = self._sequences.get(name)
+            if followers is not None:
+                start = match.start()
+                if start < failed_until.get(name, -1):
+                    continue
+                line_end = text.find('\n', start)
+                if line_end < 0:
+                    line_end = len(text)
+                if not self._match_sequence(text, match.end(name), line_end, followers):
+                    failed_until[name] = line_end
+                    continue
+
+            return kind, name
+
+        if first_spam is not None:
+            return "spam", first_spam
+        return None
+
+    @staticmethod
+    def _match_sequence(text: str, pos: int, line_end: int, followers: List[re.Pattern]) -> bool:
+        """在同一行内依次查找后续关键词（每个取最早出现的位置）"""
+        for pattern in followers:
+            match = pattern.search(text, pos, line_end)
+            if match is None:
+                return False
+            pos = match.end()
+        return True
+
+
+class UserAgentScreener:
+    def __init__(self, rules: Sequence = USER_AGENT_RULES):
+        """合并User Agent关键词为一个正则"""
+        self._keywords = dict(rules)
+        self._combined = re.compile(
+            "|".join(f"(?P<{name}>{re.escape(keyword)})" for name, keyword in rules),
+            re.IGNORECASE
+        )
+
+    def screen(self, user_agent: str) -> Optional[str]:
+        """返回命中的原始关键词，未命中返回 None"""
+        match = self._combined.search(user_agent)
+        if match is None:
+            return None
+        return self._keywords[match.lastgroup]
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+分句 - 在中日文句末标点处切分段落，每句单独查缓存和翻译
+连续的句末标点留在同一句；引号、括号内的句末标点不切分；换行也作为句子边界
+"""
+from typing import List
+
+_TERMINATORS = frozenset("。！？!?…")
+_OPENING = frozenset("「『“‘（(【《")
+_CLOSING = frozenset("」』”’）)】》")
+
+
+def split_segments(text: str) -> List[str]:
+    """按句切分，去掉首尾空白；只有标点的片段并入下一句；没有句末标点时返回整段"""
+    segments: List[str] = []
+    current: List[str] = []
+    depth = 0
+
+    def flush():
+        segment = "".join(current).strip()
+        # 只有标点（如开头的"……"）不单独成句
+        if any(char.isalnum() for char in segment):
+            segments.append(segment)
+            current.clear()
+
+    for index, char in enumerate(text):
+        if char == "\n":
+            flush()
+            continue
+        current.append(char)
+        if char in _OPENING:
+            depth += 1
+        elif char in _CLOSING:
+            depth = max(0, depth - 1)
+        elif char in _TERMINATORS and depth == 0:
+            following = text[index + 1:index + 2]
+            if following not in _TERMINATORS:
+                flush()
+
+    segment = "".join(current).strip()
+    if segment:
+        if segments and not any(char.isalnum() for char in segment):
+            segments[-1] += segment
+        else:
+            segments.append(segment)
+    return segments
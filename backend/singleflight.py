@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+请求合并模块 - 相同键的并发请求只执行一次
+热门词被大量用户同时提交时，只发起一次上游调用，所有等待者共享结果
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    def __init__(self):
+        """初始化请求合并器"""
+        # key -> 正在执行的任务
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # 统计计数
+        self.leaders = 0            # 实际执行的调用次数
+        self.coalesced_waiters = 0  # 被合并、直接等待已有调用的请求数
+        self.failures = 0           # 执行失败（抛出异常）的调用次数
+        self.cancelled_waiters = 0  # 等待中途断开的请求数
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行 func 并返回结果；同一 key 已有调用在进行时直接等待其结果
+        单个等待者被取消不会取消共享的调用
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+        else:
+            self.coalesced_waiters += 1
+
+        try:
+            # shield：调用方断开只取消自己的等待，不影响其他等待者
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                self.cancelled_waiters += 1
+            raise
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        """调用结束后移出在途表，并取走异常避免未处理告警"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced_waiters": self.coalesced_waiters,
+            "failures": self.failures,
+            "cancelled_waiters": self.cancelled_waiters
+        }
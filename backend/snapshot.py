@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+只读缓存快照 - 从 translation_cache 导出的不可变文件，新节点启动时直接内存映射使用
+查找只在映射区域上计算槽位、比较摘要，命中后才解压并解析该条结果，无需整体加载
+
+文件布局（小端）:
+  头部   magic(8) | 版本 u32 | 条目数 u32 | 槽位数 u32 | 规范化规则摘要(16) | 填充(4)
+  索引   槽位数 × [text_hash 原始16字节 | 记录偏移 u64]，开放寻址、线性探测，偏移为0表示空槽
+  记录   [压缩后长度 u32 | 命中次数 u32 | zlib压缩的结果JSON]...
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+MAGIC = b"TRSNAP\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sIII16s4x")
+_SLOT = struct.Struct("<16sQ")
+_RECORD = struct.Struct("<II")
+_OFFSET = struct.Struct("<Q")
+
+
+def normalization_digest(steps: Sequence[str]) -> bytes:
+    """缓存键依赖规范化规则，规则不同的快照不能使用"""
+    return hashlib.md5(",".join(steps).encode("utf-8")).digest()
+
+
+def _bucket_count(entries: int) -> int:
+    # 装载因子不超过0.5，探测链很短
+    buckets = 1
+    while buckets < entries * 2:
+        buckets <<= 1
+    return buckets
+
+
+def _start_slot(digest: bytes, mask: int) -> int:
+    return int.from_bytes(digest[:8], "little") & mask
+
+
+def write_snapshot(path: str, rows: Iterable[Tuple[str, str, int]], count: int,
+                   normalization_steps: Sequence[str], level: int = 9) -> Dict[str, Any]:
+    """
+    写入快照 rows=[(text_hash, 结果JSON, 命中次数), ...]，count 为条目数上限
+    先写到临时文件，完成后原子替换，正在映射旧文件的进程不受影响
+    """
+    buckets = _bucket_count(count)
+    mask = buckets - 1
+    index_offset = _HEADER.size
+    slots = bytearray(buckets * _SLOT.size)
+    written = payload_bytes = raw_bytes = 0
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as output:
+        output.seek(index_offset + len(slots))
+        for text_hash, result_json, hit_count in rows:
+            if written >= count:
+                break
+            digest = bytes.fromhex(text_hash)
+            raw = result_json.encode("utf-8")
+            payload = zlib.compress(raw, level)
+            offset = output.tell()
+            output.write(_RECORD.pack(len(payload), min(int(hit_count), 0xFFFFFFFF)))
+            output.write(payload)
+
+            slot = _start_slot(digest, mask)
+            while _OFFSET.unpack_from(slots, slot * _SLOT.size + 16)[0]:
+                slot = (slot + 1) & mask
+            _SLOT.pack_into(slots, slot * _SLOT.size, digest, offset)
+            written += 1
+            payload_bytes += len(payload)
+            raw_bytes += len(raw)
+
+        output.seek(0)
+        output.write(_HEADER.pack(MAGIC, VERSION, written, buckets, normalization_digest(normalization_steps)))
+        output.write(slots)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temp_path, path)
+
+    return {
+        "path": path,
+        "entries": written,
+        "slots": buckets,
+        "file_bytes": os.path.getsize(path),
+        "payload_bytes": payload_bytes,
+        "uncompressed_bytes": raw_bytes
+    }
+
+
+class CacheSnapshot:
+    def __init__(self, path: str, normalization_steps: Sequence[str]):
+        """映射快照文件并校验头部；格式或规范化规则不符时抛出 ValueError"""
+        self.path = path
+        with open(path, "rb") as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            if len(self._view) < _HEADER.size:
+                raise ValueError("快照文件不完整")
+            magic, version, self.entries, buckets, digest = _HEADER.unpack_from(self._view, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("不是受支持的快照文件")
+            if digest != normalization_digest(normalization_steps):
+                raise ValueError("快照的文本规范化规则与当前配置不同")
+            if buckets & (buckets - 1) or len(self._view) < _HEADER.size + buckets * _SLOT.size:
+                raise ValueError("快照索引损坏")
+        except ValueError:
+            self.close()
+            raise
+        self._mask = buckets - 1
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text_hash: str) -> Optional[Tuple[Dict[str, Any], int, int]]:
+        """按缓存键查找，返回 (结果, 命中次数, 结果JSON字节数)；未命中返回 None"""
+        try:
+            digest = bytes.fromhex(text_hash)
+        except ValueError:
+            return None
+        view = self._view
+        slot = _start_slot(digest, self._mask)
+        while True:
+            position = _HEADER.size + slot * _SLOT.size
+            offset = _OFFSET.unpack_from(view, position + 16)[0]
+            if not offset:
+                self.misses += 1
+                return None
+            # 直接在映射区域上比较，不复制
+            if view[position:position + 16] == digest:
+                break
+            slot = (slot + 1) & self._mask
+
+        length, hit_count = _RECORD.unpack_from(view, offset)
+        start = offset + _RECORD.size
+        raw = zlib.decompress(view[start:start + length])
+        self.hits += 1
+        return json.loads(raw), hit_count, len(raw)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "entries": self.entries,
+            "file_bytes": len(self._mmap),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def open_snapshot(path: str, normalization_steps: Sequence[str]) -> Optional[CacheSnapshot]:
+    """打开快照；文件缺失或不可用时只打印原因，服务照常使用SQLite缓存"""
+    try:
+        snapshot = CacheSnapshot(path, normalization_steps)
+    except (OSError, ValueError) as e:
+        print(f"缓存快照不可用: {e}")
+        return None
+    print(f"缓存快照已加载: {len(snapshot)} 条 ({path})")
+    return snapshot
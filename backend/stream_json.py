@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+增量JSON解析模块 - 解析流式返回的翻译结果
+顶层字段（如 detected_language）和 translations[] 的每一项一旦完整就立即输出
+"""
+import json
+from typing import Any, List, Tuple
+
+
+class IncrementalJSONParser:
+    def __init__(self, array_key: str = "translations"):
+        """array_key 为需要逐项输出的顶层数组字段"""
+        self.array_key = array_key
+        self._text = ""
+        self._pos = 0
+        self._start = -1           # 第一个 '{' 的位置（之前的文字忽略）
+        self._end = -1             # 顶层对象结束位置
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+
+        # 顶层键值跟踪
+        self._key = None
+        self._expect_key = False
+        self._value_start = -1     # -1: 尚未开始, -2: 已输出
+        self._element_start = -1
+
+    @property
+    def done(self) -> bool:
+        return self._end >= 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        输入一段文本，返回本段中新完成的事件
+        顶层字段为 (字段名, 值)，数组项为 ("translation", 对象)
+        """
+        self._text += chunk
+        text = self._text
+        events = []
+        i = self._pos
+        n = len(text)
+
+        while i < n and self._end < 0:
+            ch = text[i]
+
+            if self._start < 0:
+                if ch == '{':
+                    self._start = i
+                    self._stack.append('{')
+                    self._expect_key = True
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._on_string_end(i, events)
+                i += 1
+                continue
+
+            depth = len(self._stack)
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                if depth == 1 and not self._expect_key and self._value_start == -1:
+                    self._value_start = i
+            elif ch in '{[':
+                if depth == 1 and self._value_start == -1:
+                    self._value_start = i
+                elif depth == 2 and ch == '{' and self._key == self.array_key and self._stack[-1] == '[':
+                    self._element_start = i
+                self._stack.append(ch)
+            elif ch in '}]':
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 2 and ch == '}' and self._element_start >= 0:
+                    self._emit(events, "translation", text[self._element_start:i + 1])
+                    self._element_start = -1
+                elif depth == 1:
+                    if self._key != self.array_key:
+                        self._emit(events, self._key, text[self._value_start:i + 1])
+                    self._value_start = -2
+                elif depth == 0:
+                    self._flush_scalar(i, events)
+                    self._end = i
+            elif depth == 1:
+                if ch == ':':
+                    self._expect_key = False
+                    self._value_start = -1
+                elif ch == ',':
+                    self._flush_scalar(i, events)
+                    self._expect_key = True
+                    self._key = None
+                elif not ch.isspace() and not self._expect_key and self._value_start == -1:
+                    # 数字、true/false/null
+                    self._value_start = i
+            i += 1
+
+        self._pos = i
+        return events
+
+    def _on_string_end(self, i: int, events: list):
+        if len(self._stack) != 1:
+            return
+        raw = self._text[self._string_start:i + 1]
+        if self._expect_key:
+            self._key = json.loads(raw)
+        elif self._value_start == self._string_start:
+            self._emit(events, self._key, raw)
+            self._value_start = -2
+
+    def _flush_scalar(self, i: int, events: list):
+        """输出以 ',' 或 '}' 结束的非字符串标量"""
+        if self._value_start >= 0 and self._key is not None:
+            self._emit(events, self._key, self._text[self._value_start:i].strip())
+        self._value_start = -2
+
+    @staticmethod
+    def _emit(events: list, name: str, raw: str):
+        try:
+            events.append((name, json.loads(raw)))
+        except json.JSONDecodeError:
+            # 单个字段格式异常不影响后续解析，最终结果由 result() 兜底
+            pass
+
+    def result(self) -> Any:
+        """返回完整解析结果，对象尚未结束时抛出 json.JSONDecodeError"""
+        if self._start < 0 or self._end < 0:
+            raise json.JSONDecodeError("JSON对象不完整", self._text, len(self._text))
+        return json.loads(self._text[self._start:self._end + 1])
+
+    @property
+    def text(self) -> str:
+        """已接收的全部文本"""
+        return self._text
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 后端模块按顶层模块导入（from config import settings）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,48 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from assets import AssetCache, StaticAsset
+
+SCRIPT = ("console.log('translate');\n" * 100).encode("utf-8")
+
+
+def _client(tmp_path):
+    (tmp_path / "script.js").write_bytes(SCRIPT)
+    (tmp_path / "index.html").write_text('<script src="/script.js"></script>', encoding="utf-8")
+    cache = AssetCache(tmp_path)
+    cache.preload()
+    app = FastAPI()
+
+    @app.get("/script.js")
+    def script(request: Request):
+        return cache.response(request, "script.js")
+
+    return TestClient(app)
+
+
+def test_each_encoding_has_its_own_etag(tmp_path):
+    client = _client(tmp_path)
+    gzipped = client.get("/script.js", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/script.js", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["etag"] != identity.headers["etag"]
+    assert identity.content == SCRIPT
+
+
+def test_if_none_match_is_checked_against_the_served_encoding(tmp_path):
+    client = _client(tmp_path)
+    gzip_etag = client.get("/script.js", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    same = client.get("/script.js", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    other = client.get("/script.js", headers={"Accept-Encoding": "identity", "If-None-Match": gzip_etag})
+    assert same.status_code == 304
+    assert other.status_code == 200 and other.content == SCRIPT
+
+
+def test_identity_is_served_until_compression_finishes():
+    asset = StaticAsset("script.js", SCRIPT, 0)
+    assert not asset.compressed
+    assert asset.select("gzip, br") == ("identity", SCRIPT)
+    asset.compress()
+    assert asset.select("gzip")[0] == "gzip"
+    assert asset.etag("gzip") != asset.etag("identity")
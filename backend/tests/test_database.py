@@ -0,0 +1,83 @@
+import threading
+
+from database import TranslationDatabase
+
+RESULT = {"source_lang": "中文", "target_lang": "日语", "word_category": "通用词汇",
+          "translations": [{"target": "東京", "reading": {"hiragana": "とうきょう"}}]}
+
+
+def _index_columns(database, name):
+    return [row["name"] for row in database._get_connection().execute(f"PRAGMA index_info({name})")]
+
+
+def test_sort_indexes_only_hold_sort_keys(tmp_path):
+    database = TranslationDatabase(str(tmp_path / "cache.db"))
+    assert _index_columns(database, "idx_listing") == ["updated_at"]
+    assert _index_columns(database, "idx_popular") == ["hit_count", "updated_at"]
+
+
+def test_migration_replaces_wide_indexes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    database = TranslationDatabase(path)
+    conn = database._get_connection()
+    conn.execute("DROP INDEX idx_listing")
+    conn.execute("CREATE INDEX idx_listing ON translation_cache(updated_at, text_hash, source_text)")
+    conn.execute("PRAGMA user_version = 3")
+    database.close()
+    assert _index_columns(TranslationDatabase(path), "idx_listing") == ["updated_at"]
+
+
+def _total_hits(database):
+    return sum(entry["hit_count"] for entry in database.get_translation_history(limit=50))
+
+
+def test_listing_does_not_wait_for_flush(tmp_path):
+    database = TranslationDatabase(str(tmp_path / "cache.db"))
+    database.save_translation("东京", RESULT)
+    database.record_cache_hit("东京")
+    with database._flush_lock:
+        # 写回持有锁（如长事务）时列表查询照常返回，并计入未写回的命中
+        reader = threading.Thread(target=lambda: results.append(_total_hits(database)))
+        results = []
+        reader.start()
+        reader.join(timeout=2)
+        assert results == [2]
+
+
+def test_read_during_commit_counts_hits_once(tmp_path, monkeypatch):
+    database = TranslationDatabase(str(tmp_path / "cache.db"))
+    database.save_translations([(f"词{i}", RESULT) for i in range(10)])
+    database.record_cache_hits([f"词{i}" for i in range(10)])
+    results = []
+    readers = []
+    finish_flush = database.write_buffer.finish_flush
+
+    def read_between_commit_and_finish():
+        # 此时磁盘已包含写回的命中，缓冲区仍记着它们
+        reader = threading.Thread(target=lambda: results.append(_total_hits(database)))
+        reader.start()
+        reader.join(timeout=0.2)
+        readers.append(reader)
+        finish_flush()
+
+    monkeypatch.setattr(database.write_buffer, "finish_flush", read_between_commit_and_finish)
+    database.flush()
+    readers[0].join(timeout=2)
+    assert results == [20]
+    assert _total_hits(database) == 20
+
+
+def test_auto_vacuum_conversion_is_left_to_compact(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute("CREATE TABLE legacy (id INTEGER)")
+    legacy.commit()
+    legacy.close()
+
+    database = TranslationDatabase(path)
+    assert database._get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+    assert database.compact()["auto_vacuum_converted"]
+    assert database._get_connection().execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert not database.compact()["auto_vacuum_converted"]
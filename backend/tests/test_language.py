@@ -0,0 +1,31 @@
+import pytest
+
+from language import JA, ZH, detect_language
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("这是什么", ZH),
+    ("经济发展", ZH),
+    ("东京大学", ZH),
+    ("你好吗", ZH),
+    ("ありがとう", JA),
+    ("東京駅", JA),
+    ("駅前広場", JA),
+])
+def test_clear_signals(text, expected):
+    assert detect_language(text) == expected
+
+
+@pytest.mark.parametrize("text", ["那覇", "我孫子", "是非", "叶う", "条約"])
+def test_japanese_words_with_shared_characters_are_not_chinese(text):
+    assert detect_language(text) != ZH
+
+
+@pytest.mark.parametrize("text", ["大学", "学生", "这駅", "経济"])
+def test_ambiguous_text_is_left_to_the_model(text):
+    assert detect_language(text) is None
+
+
+@pytest.mark.parametrize("text", ["我們的時間很長", "請問", "電話號碼", "東京車站", "謝謝你們"])
+def test_traditional_chinese_is_not_japanese(text):
+    assert detect_language(text) != JA
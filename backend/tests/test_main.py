@@ -0,0 +1,28 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+import async_db
+import database
+import main
+
+
+def test_app_starts_when_database_cannot_be_opened(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+
+    def broken():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(database.get_db, "_factory", broken)
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        assert not async_db.get_adb.initialized
+
+
+def test_metrics_include_request_coalescing_counters():
+    client = TestClient(main.app)
+    body = client.get("/metrics").text
+    assert "# TYPE translator_coalescing_leaders_total counter" in body
+    assert "translator_coalesced_waiters_total " in body
+    assert "translator_coalescing_cancelled_waiters_total " in body
+    assert "translator_coalescing_in_flight " in body
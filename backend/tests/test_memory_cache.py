@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from memory_cache import MemoryCache
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_new_key_survives_set_when_full(policy):
+    cache = MemoryCache(max_entries=2, ttl=0, policy=policy)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.get("b")
+    cache.set("c", 3)
+    assert "c" in cache
+    assert len(cache) == 2
+    assert cache.evictions == 1
+
+
+def test_lfu_evicts_least_frequent_resident():
+    cache = MemoryCache(max_entries=2, ttl=0, policy="lfu")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_byte_budget_evicts_before_insert():
+    cache = MemoryCache(max_entries=0, max_bytes=10, ttl=0, policy="lfu")
+    cache.set("a", 1, size=6)
+    cache.get("a")
+    cache.set("b", 2, size=6)
+    assert "b" in cache and "a" not in cache
+    assert cache.stats()["bytes"] == 6
+
+
+def test_get_update_runs_under_lock():
+    cache = MemoryCache(ttl=0)
+    cache.set("k", {"hit_count": 0})
+
+    def increment(entry):
+        entry["hit_count"] += 1
+        return entry["hit_count"]
+
+    def worker():
+        for _ in range(2000):
+            cache.get("k", update=increment)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.get("k")["hit_count"] == 16000
@@ -0,0 +1,62 @@
+import pytest
+
+from config import settings
+from database import TranslationDatabase
+from snapshot import open_snapshot
+
+RESULT = {"source_lang": "中文", "target_lang": "日语", "word_category": "通用词汇",
+          "translations": [{"target": "東京", "reading": {"hiragana": "とうきょう"}}]}
+
+
+@pytest.fixture
+def exported(tmp_path):
+    source = TranslationDatabase(str(tmp_path / "source.db"))
+    source.save_translations([(f"词{i}", {**RESULT, "index": i}) for i in range(200)])
+    source.save_translation("东京", RESULT)
+    source.record_cache_hit("东京")
+    stats = source.export_snapshot(str(tmp_path / "cache.snapshot"))
+    source.close()
+    assert stats["entries"] == 201
+    return tmp_path / "cache.snapshot"
+
+
+@pytest.fixture
+def replica(tmp_path, exported, monkeypatch):
+    monkeypatch.setattr(settings, "cache_snapshot_path", str(exported))
+    database = TranslationDatabase(str(tmp_path / "replica.db"))
+    yield database
+    database.close()
+    database.snapshot.close()
+
+
+def test_lookup_falls_back_to_snapshot(replica):
+    cached = replica.find_cached_translation("东京")
+    assert cached["from_cache"] and cached["translations"] == RESULT["translations"]
+    assert cached["cache_hit_count"] == 3
+    assert replica.find_cached_translation("不存在") is None
+    found = replica.find_cached_translations(["词1", "词199", "不存在"])
+    assert {result["index"] for result in found.values()} == {1, 199}
+
+
+def test_snapshot_only_hits_are_not_buffered(replica):
+    assert replica.get_cached_translation("东京") is not None
+    assert replica.get_cached_translation("东京") is not None
+    assert len(replica.find_cached_translations(["词1", "词2"])) == 2
+    replica.record_cache_hits(["词1", "词2"])
+    assert replica.write_buffer.pending_hits(replica._generate_text_hash("东京")) == 0
+    assert len(replica.write_buffer) == 0
+
+
+def test_hits_are_counted_once_the_row_exists_locally(replica):
+    replica.get_cached_translation("东京")
+    replica.save_translation("东京", RESULT)
+    replica.record_cache_hit("东京")
+    replica.flush()
+    row = replica._get_connection().execute(
+        "SELECT hit_count FROM translation_cache WHERE text_hash = ?", (replica._generate_text_hash("东京"),)
+    ).fetchone()
+    assert row["hit_count"] == 2
+
+
+def test_snapshot_with_other_normalization_is_rejected(exported):
+    assert open_snapshot(str(exported), ["lower"]) is None
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import BACKEND_DIR, _import_profile
+
+# python -X importtime 自身会拖慢导入，阈值留出余量；回退到导入时打开数据库或读词表会明显超出
+MAX_IMPORT_MS = float(os.environ.get("STARTUP_MAX_IMPORT_MS", 3000))
+
+
+def test_import_creates_no_files(tmp_path):
+    profile = _import_profile(str(tmp_path))
+    assert profile["created_files"] == []
+    assert profile["total_ms"] < MAX_IMPORT_MS
+
+
+def test_import_does_not_initialize_state(tmp_path):
+    code = (
+        "import json, main, async_db, database, glossary, validation\n"
+        "print(json.dumps([async_db.get_adb.initialized, database.get_db.initialized,\n"
+        "                  glossary.get_glossary.initialized, validation.get_validator.initialized]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True, text=True, check=True
+    )
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == [False, False, False, False]
+    assert os.listdir(tmp_path) == []
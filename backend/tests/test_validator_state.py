@@ -0,0 +1,101 @@
+import sqlite3
+import time
+
+from validator_state import create_validator_state
+
+LIMITS = {"per_minute": 3, "per_hour": 100, "max_clients": 5, "idle_ttl": 3600}
+
+
+def _state(tmp_path, **options):
+    return create_validator_state("sqlite", str(tmp_path / "state.db"), cleanup_interval=0, **LIMITS, **options)
+
+
+def test_rate_limit_is_shared_between_instances(tmp_path):
+    first, second = _state(tmp_path), _state(tmp_path)
+    assert [first.hit("1.2.3.4")[0], second.hit("1.2.3.4")[0], first.hit("1.2.3.4")[0]] == [True] * 3
+    assert second.hit("1.2.3.4") == (False, "minute")
+
+
+def test_hit_fails_open_when_write_lock_is_held(tmp_path):
+    state = _state(tmp_path)
+    blocker = sqlite3.connect(str(tmp_path / "state.db"), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        assert state.hit("1.2.3.4") == (True, "")
+        assert time.perf_counter() - started < 0.5
+        assert state.stats()["fail_open"] == 1
+    finally:
+        blocker.execute("ROLLBACK")
+    assert state.hit("1.2.3.4") == (True, "")
+    assert state.stats()["fail_open"] == 1
+
+
+def test_cleanup_keeps_most_recent_clients(tmp_path):
+    state = _state(tmp_path)
+    for i in range(8):
+        state.hit(f"10.0.0.{i}")
+    state.cleanup()
+    conn = sqlite3.connect(str(tmp_path / "state.db"))
+    kept = {row[0] for row in conn.execute("SELECT client_ip FROM rate_limits")}
+    assert kept == {f"10.0.0.{i}" for i in range(3, 8)}
+
+
+def test_cleanup_drops_idle_clients(tmp_path):
+    state = _state(tmp_path)
+    state.hit("10.0.0.1")
+    state.record_suspicious("10.0.0.1")
+    state.cleanup(now=time.time() + LIMITS["idle_ttl"] + 1)
+    assert state.stats()["total_ips"] == 0
+    assert state.suspicious_count("10.0.0.1") == 0
+
+
+def test_background_cleanup_thread_stops(tmp_path):
+    state = create_validator_state("sqlite", str(tmp_path / "state.db"), cleanup_interval=0.01, **LIMITS)
+    for i in range(8):
+        state.hit(f"10.0.0.{i}")
+    time.sleep(0.1)
+    state.close()
+    assert state.stats()["total_ips"] == 5
+
+
+def test_suspicious_and_blacklist_writes_are_skipped_when_locked(tmp_path):
+    state = _state(tmp_path)
+    blocker = sqlite3.connect(str(tmp_path / "state.db"), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        assert state.record_suspicious("1.2.3.4") == 0
+        state.blacklist("1.2.3.4")
+        assert state.stats()["skipped_writes"] == 2
+    finally:
+        blocker.execute("ROLLBACK")
+    assert not state.is_blacklisted("1.2.3.4")
+    assert state.record_suspicious("1.2.3.4") == 1
+
+
+def test_locked_state_does_not_reject_valid_request(tmp_path):
+    from validation import RequestValidator
+
+    validator = RequestValidator("sqlite", str(tmp_path / "state.db"))
+    blocker = sqlite3.connect(str(tmp_path / "state.db"), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        assert validator.validate_request("你好世界", "1.1.1.2", "python-requests/2.0")[0]
+    finally:
+        blocker.execute("ROLLBACK")
+        validator.state.close()
+
+
+def test_batch_is_charged_per_upstream_item(tmp_path):
+    from validation import RequestValidator
+
+    for backend in ("memory", "sqlite"):
+        validator = RequestValidator(backend, str(tmp_path / f"{backend}.db"))
+        assert validator.validate_batch_request(["你好"] * 500, "1.1.1.3")[0]
+        assert validator.charge_batch("1.1.1.3", 15)[0]
+        # 额度不足时整份拒绝且不扣，剩余额度仍可使用
+        assert not validator.charge_batch("1.1.1.3", 6)[0]
+        assert validator.charge_batch("1.1.1.3", 5)[0]
+        assert validator.state.hit("1.1.1.3") == (False, "minute")
+        if backend == "sqlite":
+            validator.state.close()
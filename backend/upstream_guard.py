@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+上游调用保护 - 并发上限、有界等待队列、熔断器和带抖动的重试
+上游变慢时限制同时在途的请求数，超出的请求排队等待（有超时），
+队列满或熔断打开时立即失败，由调用方退回到只读缓存的应答
+"""
+import asyncio
+import collections
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict
+
+import httpx
+
+from config import settings
+from metrics import registry
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 重试不会造成重复处理（请求未送达或上游明确拒绝）的状态码
+_RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """熔断打开、等待队列已满或排队超时，本次请求未发往上游"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def is_retryable(error: Exception) -> bool:
+    """连接阶段失败或上游明确表示过载时可以安全重试"""
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in _RETRYABLE_STATUS
+    return False
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """计入熔断的失败：网络错误、超时、5xx 和 429（其他4xx是请求本身的问题）"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, httpx.TransportError)
+
+
+class UpstreamGuard:
+    def __init__(self, max_concurrency: int = 16, max_queue: int = 64, queue_timeout: float = 5.0,
+                 failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1,
+                 retry_attempts: int = 2, retry_base_delay: float = 0.2, retry_max_delay: float = 2.0):
+        """初始化并发槽位、等待队列和熔断器"""
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.retry_attempts = retry_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        # 在途请求数与按先后顺序排队的等待者
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+        # 熔断器状态
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        # 统计计数
+        self.rejected = {"circuit_open": 0, "queue_full": 0, "queue_timeout": 0}
+        self.retries = 0
+        self.failures = 0
+        self.times_opened = 0
+
+    # ---------- 熔断器 ----------
+
+    def _admit(self) -> bool:
+        """熔断打开时拒绝；半开时只放行少量探测请求。返回本次是否为探测请求"""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.recovery_timeout:
+                self.rejected["circuit_open"] += 1
+                raise UpstreamUnavailable("circuit_open", "上游服务暂不可用（熔断中）")
+            # 冷却结束，进入半开状态
+            self.state = HALF_OPEN
+            self._half_open_calls = 0
+        if self.state == HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected["circuit_open"] += 1
+                raise UpstreamUnavailable("circuit_open", "上游服务暂不可用（熔断中）")
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def _record_success(self):
+        self._consecutive_failures = 0
+        self.state = CLOSED
+
+    def _record_failure(self):
+        self.failures += 1
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+    # ---------- 并发槽位 ----------
+
+    async def _acquire(self):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise UpstreamUnavailable("queue_full", "上游请求排队已满")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 槽位已经移交给本请求，放弃时要还回去
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected["queue_timeout"] += 1
+                raise UpstreamUnavailable("queue_timeout", "上游请求排队超时") from None
+            raise
+
+    def _release(self):
+        # 有人排队时直接把槽位移交给最早的等待者
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def guarded(self) -> AsyncIterator[None]:
+        """占用一个上游槽位；根据块内是否抛出异常更新熔断器"""
+        probe = self._admit()
+        try:
+            await self._acquire()
+        except BaseException:
+            if probe:
+                self._half_open_calls -= 1
+            raise
+        try:
+            yield
+        except Exception as e:
+            if is_upstream_failure(e):
+                self._record_failure()
+            elif self.state == HALF_OPEN:
+                self._record_success()
+            raise
+        else:
+            self._record_success()
+        finally:
+            self._release()
+            # 探测请求被取消时没有结论，让出探测名额
+            if probe and self.state == HALF_OPEN:
+                self._half_open_calls -= 1
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """在槽位内执行 func；可重试的失败按指数退避加全抖动重试（等待时不占用槽位）"""
+        attempt = 0
+        while True:
+            try:
+                async with self.guarded():
+                    return await func()
+            except Exception as e:
+                if attempt >= self.retry_attempts or not is_retryable(e):
+                    raise
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(random.uniform(0, min(self.retry_max_delay,
+                                                      self.retry_base_delay * 2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """获取并发、排队和熔断状态"""
+        return {
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "consecutive_failures": self._consecutive_failures,
+            "failures": self.failures,
+            "times_opened": self.times_opened,
+            "retries": self.retries,
+            "rejected": dict(self.rejected)
+        }
+
+
+# 全局上游保护实例
+upstream_guard = UpstreamGuard(
+    max_concurrency=settings.upstream_max_concurrency,
+    max_queue=settings.upstream_max_queue,
+    queue_timeout=settings.upstream_queue_timeout,
+    failure_threshold=settings.upstream_failure_threshold,
+    recovery_timeout=settings.upstream_recovery_timeout,
+    retry_attempts=settings.upstream_retry_attempts,
+    retry_base_delay=settings.upstream_retry_base_delay,
+    retry_max_delay=settings.upstream_retry_max_delay
+)
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+registry.gauge("translator_upstream_in_flight", "在途上游请求数", lambda: upstream_guard.in_flight)
+registry.gauge("translator_upstream_queue_depth", "等待上游槽位的请求数", lambda: len(upstream_guard._waiters))
+registry.gauge("translator_upstream_circuit_state", "熔断器状态（0=关闭 1=半开 2=打开）",
+               lambda: _STATE_VALUES[upstream_guard.state])
@@ -4,54 +4,42 @@
 包含速率限制、内容过滤、垃圾请求检测
 """
 import re
-import time
-import hashlib
-from typing import Dict, Any, Optional, Tuple
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+from functools import lru_cache
+
+from config import settings
+from lazy import LazyInstance, module_getattr
+from metrics import VALIDATION_SECONDS, VALIDATION_REJECTIONS
+from screening import ContentScreener, UserAgentScreener, MALICIOUS_RULES, SPAM_RULES, USER_AGENT_RULES
+from validator_state import create_validator_state
+
+# 中日文字符（平假名、片假名、汉字）
+_CJK_PATTERN = re.compile(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]')
 
 class RequestValidator:
-    def __init__(self):
-        """初始化验证器"""
-        # 速率限制: IP -> (请求次数, 时间窗口)
-        self.rate_limits = defaultdict(lambda: deque())
-        
-        # 恶意IP黑名单
-        self.blacklisted_ips = set()
-        
-        # 可疑请求记录
-        self.suspicious_requests = defaultdict(int)
-        
+    def __init__(self, state_backend: str = "memory", state_path: str = "validator_state.db"):
+        """初始化验证器；多worker部署时使用 sqlite 状态后端共享限流和黑名单"""
         # 配置
         self.MAX_REQUESTS_PER_MINUTE = 20  # 每分钟最多20个请求
         self.MAX_REQUESTS_PER_HOUR = 200   # 每小时最多200个请求
         self.MAX_TEXT_LENGTH = 500         # 最大文本长度
         self.MIN_TEXT_LENGTH = 1           # 最小文本长度
-        
-        # 恶意内容模式
-        self.malicious_patterns = [
-            r'<script.*?>.*?</script>',  # XSS脚本
-            r'javascript:',              # JavaScript注入
-            r'data:text/html',          # Data URI攻击
-            r'vbscript:',               # VBScript注入
-            r'\bUNION\b.*?\bSELECT\b',  # SQL注入
-            r'\bDROP\b.*?\bTABLE\b',    # SQL删除
-            r'\bINSERT\b.*?\bINTO\b',   # SQL插入
-            r'\.\./',                   # 路径遍历
-            r'\\x[0-9a-fA-F]{2}',       # 十六进制编码
-        ]
-        
-        # 垃圾内容模式
-        self.spam_patterns = [
-            r'(.)\1{10,}',              # 重复字符
-            r'[!@#$%^&*]{5,}',          # 大量特殊符号
-            r'http[s]?://[^\s]+',       # URL链接
-            r'\b\d{10,}\b',             # 长数字串
-        ]
-        
-        # 编译正则表达式
-        self.compiled_malicious = [re.compile(pattern, re.IGNORECASE) for pattern in self.malicious_patterns]
-        self.compiled_spam = [re.compile(pattern, re.IGNORECASE) for pattern in self.spam_patterns]
+        self.MAX_TRACKED_CLIENTS = 100000  # 最多跟踪的IP数，超出时淘汰最久未访问的
+        self.CLIENT_IDLE_TTL = 3600        # 超过1小时未访问的IP不再跟踪
+        
+        # 速率限制计数、IP黑名单和可疑请求记录（实现见 validator_state.py）
+        self.state = create_validator_state(
+            state_backend, state_path,
+            per_minute=self.MAX_REQUESTS_PER_MINUTE,
+            per_hour=self.MAX_REQUESTS_PER_HOUR,
+            max_clients=self.MAX_TRACKED_CLIENTS,
+            idle_ttl=self.CLIENT_IDLE_TTL
+        )
+        
+        # 恶意/垃圾内容规则合并为一次扫描（规则定义见 screening.py）
+        self.screener = ContentScreener(MALICIOUS_RULES, SPAM_RULES)
+        self.ua_screener = UserAgentScreener(USER_AGENT_RULES)
+        self._check_user_agent = lru_cache(maxsize=1024)(self._check_user_agent)
     
     def validate_request(self, text: str, client_ip: str, user_agent: str = None) -> Tuple[bool, str]:
         """
@@ -59,90 +47,124 @@ class RequestValidator:
         返回: (是否通过, 错误信息)
         """
         try:
-            # 1. 检查IP黑名单
-            if client_ip in self.blacklisted_ips:
-                return False, "IP地址已被封禁"
-            
-            # 2. 速率限制检查
-            rate_check, rate_msg = self._check_rate_limit(client_ip)
-            if not rate_check:
-                return False, rate_msg
+            # 1-2. IP黑名单与速率限制
+            with VALIDATION_SECONDS.time("client"):
+                client_check, client_msg = self._check_client(client_ip)
+            if not client_check:
+                VALIDATION_REJECTIONS.inc("client")
+                return False, client_msg
             
-            # 3. 文本长度验证
-            if len(text) < self.MIN_TEXT_LENGTH:
-                return False, "输入文本太短"
+            # 3-6. 文本内容检查
+            with VALIDATION_SECONDS.time("text"):
+                text_check, text_msg = self._check_text(text, client_ip)
+            if not text_check:
+                VALIDATION_REJECTIONS.inc("text")
+                return False, text_msg
             
-            if len(text) > self.MAX_TEXT_LENGTH:
-                return False, f"输入文本超过{self.MAX_TEXT_LENGTH}字符限制"
+            # 7. User Agent验证（可选）
+            with VALIDATION_SECONDS.time("user_agent"):
+                self._check_request_user_agent(client_ip, user_agent)
             
-            # 4. 恶意内容检测
-            malicious_check, malicious_msg = self._check_malicious_content(text)
-            if not malicious_check:
-                self._record_suspicious_activity(client_ip, "恶意内容")
-                return False, malicious_msg
+            return True, "验证通过"
             
-            # 5. 垃圾内容检测
-            spam_check, spam_msg = self._check_spam_content(text)
-            if not spam_check:
-                self._record_suspicious_activity(client_ip, "垃圾内容")
-                return False, spam_msg
+        except Exception as e:
+            print(f"请求验证错误: {e}")
+            return False, "验证过程出错"
+    
+    def validate_batch_request(self, texts: List[str], client_ip: str, 
+                               user_agent: str = None) -> Tuple[bool, str, Dict[int, str]]:
+        """
+        验证批量请求：只检查黑名单并逐条检查文本内容，速率限制在去掉词表和缓存命中后
+        由 charge_batch 按实际发往上游的条数扣除
+        返回: (整批是否通过, 错误信息, {条目序号: 错误信息})
+        """
+        try:
+            if self.state.is_blacklisted(client_ip):
+                return False, "IP地址已被封禁", {}
             
-            # 6. 中日文内容验证
-            content_check, content_msg = self._check_content_language(text)
-            if not content_check:
-                return False, content_msg
+            item_errors = {}
+            for index, text in enumerate(texts):
+                text_check, text_msg = self._check_text(text, client_ip)
+                if not text_check:
+                    item_errors[index] = text_msg
+                    # 只有未通过的条目会累计可疑次数，可能在本批中被封禁
+                    if self.state.is_blacklisted(client_ip):
+                        return False, "IP地址已被封禁", {}
             
-            # 7. User Agent验证（可选）
-            if user_agent:
-                ua_check, ua_msg = self._check_user_agent(user_agent)
-                if not ua_check:
-                    self._record_suspicious_activity(client_ip, "可疑User Agent")
-                    # 不直接拒绝，只记录
+            self._check_request_user_agent(client_ip, user_agent)
             
-            return True, "验证通过"
+            return True, "验证通过", item_errors
             
+        except Exception as e:
+            print(f"请求验证错误: {e}")
+            return False, "验证过程出错", {}
+    
+    def charge_batch(self, client_ip: str, count: int) -> Tuple[bool, str]:
+        """批量请求中需要调用上游的 count 条按每条一次计入速率限制，额度不足时整份都不扣"""
+        try:
+            allowed, message = self._check_rate_limit(client_ip, count)
         except Exception as e:
             print(f"请求验证错误: {e}")
             return False, "验证过程出错"
+        if not allowed:
+            VALIDATION_REJECTIONS.inc("client")
+        return allowed, message
     
-    def _check_rate_limit(self, client_ip: str) -> Tuple[bool, str]:
-        """检查速率限制"""
-        current_time = time.time()
-        
-        # 清理过期请求记录
-        rate_queue = self.rate_limits[client_ip]
+    def _check_client(self, client_ip: str) -> Tuple[bool, str]:
+        """检查IP黑名单和速率限制（状态后端一次完成）"""
+        return self._check_rate_limit(client_ip)
+    
+    def _check_text(self, text: str, client_ip: str) -> Tuple[bool, str]:
+        """检查单条文本的长度和内容"""
+        # 3. 文本长度验证
+        if len(text) < self.MIN_TEXT_LENGTH:
+            return False, "输入文本太短"
+        
+        if len(text) > self.MAX_TEXT_LENGTH:
+            return False, f"输入文本超过{self.MAX_TEXT_LENGTH}字符限制"
+        
+        # 4-5. 恶意内容和垃圾内容检测（单次扫描）
+        screen_check, screen_msg = self._check_screened_content(text, client_ip)
+        if not screen_check:
+            return False, screen_msg
+        
+        # 6. 中日文内容验证
+        return self._check_content_language(text)
+    
+    def _check_request_user_agent(self, client_ip: str, user_agent: str = None):
+        """检查User Agent，可疑时只记录不拒绝"""
+        if user_agent:
+            ua_check, ua_msg = self._check_user_agent(user_agent)
+            if not ua_check:
+                self._record_suspicious_activity(client_ip, "可疑User Agent")
+    
+    def _check_rate_limit(self, client_ip: str, cost: int = 1) -> Tuple[bool, str]:
+        """检查速率限制，cost 为本次计入的请求数"""
+        allowed, exceeded = self.state.hit(client_ip, cost)
+        if allowed:
+            return True, ""
         
-        # 移除1小时前的记录
-        while rate_queue and current_time - rate_queue[0] > 3600:
-            rate_queue.popleft()
+        # 1. 检查IP黑名单
+        if exceeded == "blacklisted":
+            return False, "IP地址已被封禁"
         
         # 检查小时限制
-        if len(rate_queue) >= self.MAX_REQUESTS_PER_HOUR:
+        if exceeded == "hour":
             return False, f"超过小时请求限制({self.MAX_REQUESTS_PER_HOUR}次/小时)"
         
         # 检查分钟限制
-        minute_requests = sum(1 for req_time in rate_queue if current_time - req_time < 60)
-        if minute_requests >= self.MAX_REQUESTS_PER_MINUTE:
-            return False, f"请求过于频繁，请等待({self.MAX_REQUESTS_PER_MINUTE}次/分钟)"
-        
-        # 记录当前请求
-        rate_queue.append(current_time)
-        
-        return True, ""
+        return False, f"请求过于频繁，请等待({self.MAX_REQUESTS_PER_MINUTE}次/分钟)"
     
-    def _check_malicious_content(self, text: str) -> Tuple[bool, str]:
-        """检测恶意内容"""
-        for pattern in self.compiled_malicious:
-            if pattern.search(text):
+    def _check_screened_content(self, text: str, client_ip: str) -> Tuple[bool, str]:
+        """检测恶意内容和垃圾内容，命中时记录触发的规则"""
+        hit = self.screener.screen(text)
+        if hit:
+            kind, rule = hit
+            if kind == "malicious":
+                self._record_suspicious_activity(client_ip, f"恶意内容({rule})")
                 return False, "检测到恶意内容，请求被拒绝"
-        return True, ""
-    
-    def _check_spam_content(self, text: str) -> Tuple[bool, str]:
-        """检测垃圾内容"""
-        # 检查重复字符
-        for pattern in self.compiled_spam:
-            if pattern.search(text):
-                return False, "检测到垃圾内容，请输入有意义的文本"
+            self._record_suspicious_activity(client_ip, f"垃圾内容({rule})")
+            return False, "检测到垃圾内容，请输入有意义的文本"
         
         # 检查文本质量
         if len(set(text.strip())) < 2:  # 字符种类太少
@@ -152,64 +174,42 @@ class RequestValidator:
     
     def _check_content_language(self, text: str) -> Tuple[bool, str]:
         """检查内容是否包含中日文"""
-        # 中文字符范围
-        chinese_pattern = r'[\u4e00-\u9fff]'
-        # 日文字符范围（平假名、片假名、汉字）
-        japanese_pattern = r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]'
-        
-        has_chinese = bool(re.search(chinese_pattern, text))
-        has_japanese = bool(re.search(japanese_pattern, text))
-        
-        # 至少包含中文或日文
-        if not (has_chinese or has_japanese):
+        # 至少包含中文或日文（平假名、片假名、汉字）
+        if not _CJK_PATTERN.search(text):
             return False, "请输入中文或日文内容"
         
         return True, ""
     
     def _check_user_agent(self, user_agent: str) -> Tuple[bool, str]:
-        """检查User Agent"""
+        """检查User Agent（结果按UA字符串缓存）"""
         if not user_agent or len(user_agent) < 10:
             return False, "User Agent异常"
         
         # 检查是否为已知的恶意User Agent
-        malicious_ua_patterns = [
-            r'bot',
-            r'crawler',
-            r'spider',
-            r'scraper',
-            r'python-requests',
-            r'curl/',
-            r'wget',
-        ]
-        
-        for pattern in malicious_ua_patterns:
-            if re.search(pattern, user_agent, re.IGNORECASE):
-                return False, f"检测到自动化工具: {pattern}"
+        keyword = self.ua_screener.screen(user_agent)
+        if keyword:
+            return False, f"检测到自动化工具: {keyword}"
         
         return True, ""
     
     def _record_suspicious_activity(self, client_ip: str, activity_type: str):
         """记录可疑活动"""
-        self.suspicious_requests[client_ip] += 1
+        suspicious_count = self.state.record_suspicious(client_ip)
         
         # 如果可疑活动次数过多，加入黑名单
-        if self.suspicious_requests[client_ip] >= 5:
-            self.blacklisted_ips.add(client_ip)
+        if suspicious_count >= 5:
+            self.state.blacklist(client_ip)
             print(f"IP {client_ip} 已被加入黑名单，原因: {activity_type}")
     
     def get_client_status(self, client_ip: str) -> Dict[str, Any]:
         """获取客户端状态信息"""
-        current_time = time.time()
-        rate_queue = self.rate_limits[client_ip]
-        
         # 计算最近的请求次数
-        minute_requests = sum(1 for req_time in rate_queue if current_time - req_time < 60)
-        hour_requests = len(rate_queue)
+        minute_requests, hour_requests = self.state.counts(client_ip)
         
         return {
             "ip": client_ip,
-            "is_blacklisted": client_ip in self.blacklisted_ips,
-            "suspicious_count": self.suspicious_requests[client_ip],
+            "is_blacklisted": self.state.is_blacklisted(client_ip),
+            "suspicious_count": self.state.suspicious_count(client_ip),
             "requests_last_minute": minute_requests,
             "requests_last_hour": hour_requests,
             "minute_limit": self.MAX_REQUESTS_PER_MINUTE,
@@ -220,22 +220,17 @@ class RequestValidator:
     
     def unblock_ip(self, client_ip: str) -> bool:
         """解除IP封禁"""
-        if client_ip in self.blacklisted_ips:
-            self.blacklisted_ips.remove(client_ip)
-            self.suspicious_requests[client_ip] = 0
-            return True
-        return False
+        return self.state.unblock(client_ip)
     
     def get_system_stats(self) -> Dict[str, Any]:
         """获取系统统计信息"""
-        total_ips = len(self.rate_limits)
-        blocked_ips = len(self.blacklisted_ips)
-        suspicious_ips = len([ip for ip, count in self.suspicious_requests.items() if count > 0])
+        state_stats = self.state.stats()
         
         return {
-            "total_ips": total_ips,
-            "blocked_ips": blocked_ips,
-            "suspicious_ips": suspicious_ips,
+            "total_ips": state_stats["total_ips"],
+            "blocked_ips": state_stats["blocked_ips"],
+            "suspicious_ips": state_stats["suspicious_ips"],
+            "state_backend": state_stats["backend"],
             "rate_limit_rules": {
                 "requests_per_minute": self.MAX_REQUESTS_PER_MINUTE,
                 "requests_per_hour": self.MAX_REQUESTS_PER_HOUR,
@@ -244,4 +239,6 @@ class RequestValidator:
         }
 
 # 全局验证器实例
-validator = RequestValidator() 
\ No newline at end of file
+get_validator = LazyInstance(
+    lambda: RequestValidator(settings.validator_state_backend, settings.validator_state_path))
+__getattr__ = module_getattr(__name__, {"validator": get_validator})
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+验证器状态后端 - 速率限制计数、IP黑名单和可疑活动计数的存放位置
+memory: 进程内数据结构，只适用于单个worker
+sqlite: 本机WAL数据库文件，多个uvicorn worker共享同一份状态；
+        每次检查是一个短的 BEGIN IMMEDIATE 事务，读-改-写串行执行，计数在worker之间精确。
+        检查在事件循环上同步执行，写锁等待很短，拿不到锁时放行本次请求（fail open），
+        空闲IP的清理由后台线程定时执行，不占用请求路径
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from rate_limiter import BoundedCounter, SlidingWindowRateLimiter, apply_hit, estimate_counts
+
+
+class MemoryValidatorState:
+    def __init__(self, per_minute: int, per_hour: int, max_clients: int, idle_ttl: float):
+        # 速率限制: IP -> 滑动窗口计数（固定大小，O(1)检查）
+        self.rate_limits = SlidingWindowRateLimiter(
+            per_minute=per_minute, per_hour=per_hour, max_clients=max_clients, idle_ttl=idle_ttl
+        )
+        # 恶意IP黑名单
+        self.blacklisted_ips = set()
+        # 可疑请求记录（有容量上限）
+        self.suspicious_requests = BoundedCounter(max_keys=max_clients)
+
+    def hit(self, client_ip: str, cost: int = 1) -> Tuple[bool, str]:
+        """检查黑名单并记录 cost 次请求，返回: (是否允许, "blacklisted"/"hour"/"minute"/"")"""
+        if client_ip in self.blacklisted_ips:
+            return False, "blacklisted"
+        return self.rate_limits.hit(client_ip, cost=cost)
+
+    def counts(self, client_ip: str) -> Tuple[int, int]:
+        return self.rate_limits.counts(client_ip)
+
+    def is_blacklisted(self, client_ip: str) -> bool:
+        return client_ip in self.blacklisted_ips
+
+    def blacklist(self, client_ip: str):
+        self.blacklisted_ips.add(client_ip)
+
+    def unblock(self, client_ip: str) -> bool:
+        if client_ip not in self.blacklisted_ips:
+            return False
+        self.blacklisted_ips.remove(client_ip)
+        self.suspicious_requests.reset(client_ip)
+        return True
+
+    def record_suspicious(self, client_ip: str) -> int:
+        return self.suspicious_requests.increment(client_ip)
+
+    def suspicious_count(self, client_ip: str) -> int:
+        return self.suspicious_requests[client_ip]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "total_ips": len(self.rate_limits),
+            "blocked_ips": len(self.blacklisted_ips),
+            "suspicious_ips": len(self.suspicious_requests)
+        }
+
+
+class SQLiteValidatorState:
+    def __init__(self, path: str, per_minute: int, per_hour: int, max_clients: int, idle_ttl: float,
+                 busy_timeout: float = 0.05, busy_retries: int = 1, cleanup_interval: float = 60):
+        """
+        初始化共享状态文件，cleanup_interval 秒清理一次（0表示不清理）
+        计数丢失只会让限流暂时放宽，因此 synchronous=OFF，提交时不做fsync
+        """
+        self.path = path
+        self.per_minute = per_minute
+        self.per_hour = per_hour
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.busy_timeout = busy_timeout
+        self.busy_retries = busy_retries
+        self.cleanup_interval = cleanup_interval
+        self.evictions = 0
+        self.fail_open = 0
+        self.skipped_writes = 0
+        self._local = threading.local()
+
+        conn = self._get_connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                client_ip TEXT PRIMARY KEY,
+                minute_window INTEGER NOT NULL,
+                minute_count INTEGER NOT NULL,
+                minute_prev INTEGER NOT NULL,
+                hour_window INTEGER NOT NULL,
+                hour_count INTEGER NOT NULL,
+                hour_prev INTEGER NOT NULL,
+                last_seen REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_rate_limits_last_seen ON rate_limits(last_seen);
+            CREATE TABLE IF NOT EXISTS blacklist (
+                client_ip TEXT PRIMARY KEY,
+                created_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS suspicious (
+                client_ip TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_suspicious_updated ON suspicious(updated_at);
+        """)
+
+        self._stop_cleanup = threading.Event()
+        self._cleanup_thread = None
+        if cleanup_interval > 0:
+            self._cleanup_thread = threading.Thread(target=self._cleanup_loop, name="validator-state-cleanup",
+                                                    daemon=True)
+            self._cleanup_thread.start()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """每个线程一个自动提交模式的连接，事务显式控制"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, client_ip: str, cost: int = 1) -> Tuple[bool, str]:
+        """
+        检查黑名单并记录 cost 次请求，返回: (是否允许, "blacklisted"/"hour"/"minute"/"")
+        其他worker长时间持有写锁时重试 busy_retries 次后放行，不让请求失败
+        """
+        result = self._retry_busy(self._hit, client_ip, cost)
+        if result is _BUSY:
+            self.fail_open += 1
+            return True, ""
+        return result
+
+    def _retry_busy(self, operation, *args):
+        """写锁被占用时重试 busy_retries 次，仍拿不到锁时返回 _BUSY"""
+        for _ in range(self.busy_retries + 1):
+            try:
+                return operation(*args)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e):
+                    raise
+        return _BUSY
+
+    def _hit(self, client_ip: str, cost: int) -> Tuple[bool, str]:
+        conn = self._get_connection()
+        now = time.time()
+        # 写锁保证多个worker对同一IP的读-改-写不会交错
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM blacklist WHERE client_ip = ?", (client_ip,)).fetchone():
+                conn.execute("COMMIT")
+                return False, "blacklisted"
+            row = conn.execute(
+                "SELECT minute_window, minute_count, minute_prev, hour_window, hour_count, hour_prev "
+                "FROM rate_limits WHERE client_ip = ?", (client_ip,)
+            ).fetchone()
+            state = list(row) if row else [0, 0, 0, 0, 0, 0]
+            allowed, exceeded = apply_hit(state, now, self.per_minute, self.per_hour, cost)
+            conn.execute("INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (client_ip, *state, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, exceeded
+
+    def _cleanup_loop(self):
+        while not self._stop_cleanup.wait(self.cleanup_interval):
+            self.cleanup()
+
+    def cleanup(self, now: float = None):
+        """删除空闲IP，并把跟踪的IP数限制在上限内（按最近访问时间保留）"""
+        conn = self._get_connection()
+        now = time.time() if now is None else now
+        try:
+            for table, column in (("rate_limits", "last_seen"), ("suspicious", "updated_at")):
+                # 超出上限时，第 max_clients+1 新的时间及更早的都删除（沿索引定位一次，不逐行比较）
+                cap = None
+                if self.max_clients:
+                    row = conn.execute(
+                        f"SELECT {column} FROM {table} ORDER BY {column} DESC LIMIT 1 OFFSET ?",
+                        (self.max_clients,)
+                    ).fetchone()
+                    cap = row[0] if row else None
+                cutoff = now - self.idle_ttl
+                if cap is not None and cap >= cutoff:
+                    sql, params = f"DELETE FROM {table} WHERE {column} <= ?", (cap,)
+                else:
+                    sql, params = f"DELETE FROM {table} WHERE {column} < ?", (cutoff,)
+                self.evictions += conn.execute(sql, params).rowcount
+        except sqlite3.OperationalError as e:
+            # 其他worker长时间持有写锁时下次再清理
+            print(f"验证器状态清理跳过: {e}")
+
+    def close(self):
+        """停止后台清理线程"""
+        self._stop_cleanup.set()
+        if self._cleanup_thread is not None:
+            self._cleanup_thread.join()
+
+    def counts(self, client_ip: str) -> Tuple[int, int]:
+        row = self._get_connection().execute(
+            "SELECT minute_window, minute_count, minute_prev, hour_window, hour_count, hour_prev "
+            "FROM rate_limits WHERE client_ip = ?", (client_ip,)
+        ).fetchone()
+        return estimate_counts(list(row), time.time()) if row else (0, 0)
+
+    def is_blacklisted(self, client_ip: str) -> bool:
+        return self._get_connection().execute(
+            "SELECT 1 FROM blacklist WHERE client_ip = ?", (client_ip,)
+        ).fetchone() is not None
+
+    def blacklist(self, client_ip: str):
+        """拿不到写锁时跳过（计入 skipped_writes），下次可疑请求时再加入"""
+        if self._retry_busy(self._get_connection().execute,
+                            "INSERT OR IGNORE INTO blacklist VALUES (?, ?)", (client_ip, time.time())) is _BUSY:
+            self.skipped_writes += 1
+
+    def unblock(self, client_ip: str) -> bool:
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute("DELETE FROM blacklist WHERE client_ip = ?", (client_ip,)).rowcount
+            if removed:
+                conn.execute("DELETE FROM suspicious WHERE client_ip = ?", (client_ip,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(removed)
+
+    def record_suspicious(self, client_ip: str) -> int:
+        """返回累计次数；拿不到写锁时跳过本次记录（计入 skipped_writes）并返回0"""
+        count = self._retry_busy(self._record_suspicious, client_ip)
+        if count is _BUSY:
+            self.skipped_writes += 1
+            return 0
+        return count
+
+    def _record_suspicious(self, client_ip: str) -> int:
+        # 单条语句的UPSERT本身是原子的
+        return self._get_connection().execute(
+            "INSERT INTO suspicious VALUES (?, 1, ?) "
+            "ON CONFLICT(client_ip) DO UPDATE SET count = count + 1, updated_at = excluded.updated_at "
+            "RETURNING count", (client_ip, time.time())
+        ).fetchone()[0]
+
+    def suspicious_count(self, client_ip: str) -> int:
+        row = self._get_connection().execute(
+            "SELECT count FROM suspicious WHERE client_ip = ?", (client_ip,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._get_connection()
+        return {
+            "backend": "sqlite",
+            "total_ips": conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0],
+            "blocked_ips": conn.execute("SELECT COUNT(*) FROM blacklist").fetchone()[0],
+            "suspicious_ips": conn.execute("SELECT COUNT(*) FROM suspicious").fetchone()[0],
+            "evictions": self.evictions,
+            "fail_open": self.fail_open,
+            "skipped_writes": self.skipped_writes
+        }
+
+
+_BUSY = object()
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    return getattr(error, "sqlite_errorcode", None) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) or \
+        "locked" in str(error)
+
+
+def create_validator_state(backend: str, path: str, **limits):
+    """按名称创建状态后端，未知名称直接报错"""
+    if backend == "memory":
+        return MemoryValidatorState(**limits)
+    if backend == "sqlite":
+        return SQLiteValidatorState(path, **limits)
+    raise ValueError(f"未知的验证器状态后端: {backend}")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+写回缓冲模块 - 命中次数和每日统计先在内存中累积
+按定时器或数量阈值批量写入数据库，减少热点路径上的写操作
+"""
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+STAT_FIELDS = ("total_requests", "cache_hits", "new_translations",
+               "chinese_to_japanese", "japanese_to_chinese")
+
+
+def _new_stats_delta() -> Dict[str, Any]:
+    delta = {field: 0 for field in STAT_FIELDS}
+    delta["category_stats"] = Counter()
+    return delta
+
+
+class WriteBehindBuffer:
+    def __init__(self, max_pending: int = 1000):
+        """初始化缓冲区，max_pending 为触发写回的累计事件数"""
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._reset()
+        self._clear_inflight()
+        # 提交写回期间为奇数；读取前后版本号不同，说明读到的磁盘数据可能已包含写回的增量
+        self.version = 0
+
+        # 统计计数
+        self.flushes = 0
+        self.flushed_events = 0
+
+    def _reset(self):
+        # text_hash -> 新增命中次数
+        self._hits: Dict[str, int] = defaultdict(int)
+        # text_hash -> 最近一次命中时间（与 CURRENT_TIMESTAMP 同格式，UTC）
+        self._last_hit: Dict[str, str] = {}
+        # date -> 统计增量
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(_new_stats_delta)
+        self._events = 0
+
+    def add_hit(self, text_hash: str) -> bool:
+        """记录一次缓存命中，返回是否达到写回阈值"""
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._hits[text_hash] += 1
+            self._last_hit[text_hash] = now
+            self._events += 1
+            return self._events >= self.max_pending
+
+    def add_stats(self, source_lang: str, category: str, is_cache_hit: bool) -> bool:
+        """记录一次请求统计，返回是否达到写回阈值"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            delta = self._stats[today]
+            delta["total_requests"] += 1
+            if is_cache_hit:
+                delta["cache_hits"] += 1
+            else:
+                delta["new_translations"] += 1
+            if source_lang == "中文":
+                delta["chinese_to_japanese"] += 1
+            elif source_lang == "日语":
+                delta["japanese_to_chinese"] += 1
+            delta["category_stats"][category] += 1
+            self._events += 1
+            return self._events >= self.max_pending
+
+    def _clear_inflight(self):
+        # 已取出、正在写回的数据：提交完成前仍计入快照，读取方不会漏算
+        self._inflight_hits: Dict[str, int] = {}
+        self._inflight_last_hit: Dict[str, str] = {}
+        self._inflight_stats: Dict[str, Dict[str, Any]] = {}
+
+    def drain(self) -> Tuple[Dict[str, int], Dict[str, str], Dict[str, Dict[str, Any]]]:
+        """取出全部待写数据并清空缓冲区（提交完成前仍计入快照）"""
+        with self._lock:
+            drained = (self._hits, self._last_hit, self._stats)
+            self._inflight_hits, self._inflight_last_hit, self._inflight_stats = drained
+            self._reset()
+        return drained
+
+    def begin_commit(self):
+        """写回事务即将提交"""
+        with self._lock:
+            self.version += 1
+
+    def finish_flush(self):
+        """写回结束（提交成功或已 restore），不再计入已取出的数据"""
+        with self._lock:
+            self._clear_inflight()
+            if self.version % 2:
+                self.version += 1
+
+    def restore(self, hits: Dict[str, int], last_hit: Dict[str, str],
+                stats: Dict[str, Dict[str, Any]]):
+        """写回失败时把数据放回缓冲区，等待下次重试"""
+        with self._lock:
+            self._clear_inflight()
+            for text_hash, count in hits.items():
+                self._hits[text_hash] += count
+                self._events += count
+            for text_hash, timestamp in last_hit.items():
+                self._last_hit.setdefault(text_hash, timestamp)
+            for date, delta in stats.items():
+                merged = self._stats[date]
+                for field in STAT_FIELDS:
+                    merged[field] += delta[field]
+                merged["category_stats"].update(delta["category_stats"])
+                self._events += delta["total_requests"]
+
+    def pending_hits(self, text_hash: str) -> int:
+        """获取某条缓存尚未写回的命中次数"""
+        with self._lock:
+            return self._hits.get(text_hash, 0) + self._inflight_hits.get(text_hash, 0)
+
+    def pending_hits_snapshot(self) -> Dict[str, Tuple[int, str]]:
+        """text_hash -> (未写回的命中次数, 最近命中时间)"""
+        with self._lock:
+            snapshot = {text_hash: (count, self._inflight_last_hit.get(text_hash, ''))
+                        for text_hash, count in self._inflight_hits.items()}
+            for text_hash, count in self._hits.items():
+                inflight, _ = snapshot.get(text_hash, (0, ''))
+                snapshot[text_hash] = (inflight + count, self._last_hit.get(text_hash, ''))
+            return snapshot
+
+    def pending_stats_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {}
+            for source in (self._inflight_stats, self._stats):
+                for date, delta in source.items():
+                    merged = snapshot.setdefault(date, _new_stats_delta())
+                    for field in STAT_FIELDS:
+                        merged[field] += delta[field]
+                    merged["category_stats"].update(delta["category_stats"])
+            return snapshot
+
+    def __len__(self) -> int:
+        return self._events
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓冲区统计信息"""
+        return {
+            "pending_events": self._events,
+            "pending_hit_keys": len(self._hits),
+            "max_pending": self.max_pending,
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events
+        }